@@ -0,0 +1,35 @@
+"""Sitemap 文档缓存验证器.
+
+Revision ID: 002
+Revises: 001
+Create Date: 2026-10-17 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision = "002"
+down_revision = "001"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Sitemap 文档表（ETag / Last-Modified 条件请求）
+    op.create_table(
+        "sitemap_documents",
+        sa.Column("id", sa.String(36), primary_key=True),
+        sa.Column("monitor_task_id", sa.String(36), sa.ForeignKey("monitor_tasks.id", ondelete="CASCADE"), nullable=False, index=True),
+        sa.Column("url", sa.String(2048), nullable=False),
+        sa.Column("etag", sa.String(512), nullable=True),
+        sa.Column("last_modified", sa.String(64), nullable=True),
+        sa.Column("children", postgresql.JSONB(), nullable=True),
+        sa.Column("urls", postgresql.JSONB(), nullable=True),
+        sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.func.now(), onupdate=sa.func.now(), nullable=False),
+        sa.UniqueConstraint("monitor_task_id", "url", name="uq_sitemap_documents_monitor_url"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("sitemap_documents")
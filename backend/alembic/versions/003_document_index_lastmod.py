@@ -0,0 +1,22 @@
+"""Sitemap 文档记录父 Index 中的 lastmod.
+
+Revision ID: 003
+Revises: 002
+Create Date: 2026-10-17 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "003"
+down_revision = "002"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("sitemap_documents", sa.Column("index_lastmod", sa.String(64), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("sitemap_documents", "index_lastmod")
@@ -0,0 +1,47 @@
+"""监控任务下次检查时间.
+
+Revision ID: 005
+Revises: 004
+Create Date: 2026-10-17 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "005"
+down_revision = "004"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "monitor_tasks",
+        sa.Column("next_check_at", sa.DateTime(timezone=True), nullable=True),
+    )
+    # 回填：上次检查时间 + 检查间隔，从未检查过的任务立即到期
+    op.execute(
+        """
+        UPDATE monitor_tasks
+        SET next_check_at = COALESCE(
+            last_check_at + check_interval_minutes * INTERVAL '1 minute',
+            now()
+        )
+        """
+    )
+    op.alter_column(
+        "monitor_tasks",
+        "next_check_at",
+        nullable=False,
+        server_default=sa.func.now(),
+    )
+    op.create_index(
+        "ix_monitor_tasks_status_next_check_at",
+        "monitor_tasks",
+        ["status", "next_check_at"],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_monitor_tasks_status_next_check_at", table_name="monitor_tasks")
+    op.drop_column("monitor_tasks", "next_check_at")
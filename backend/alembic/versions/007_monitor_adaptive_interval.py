@@ -0,0 +1,33 @@
+"""监控任务自适应检查间隔.
+
+Revision ID: 007
+Revises: 006
+Create Date: 2026-10-17 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "007"
+down_revision = "006"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "monitor_tasks",
+        sa.Column("adaptive_interval", sa.Boolean(), server_default="false", nullable=False),
+    )
+    op.add_column("monitor_tasks", sa.Column("min_interval_minutes", sa.Integer(), nullable=True))
+    op.add_column("monitor_tasks", sa.Column("max_interval_minutes", sa.Integer(), nullable=True))
+    op.add_column(
+        "monitor_tasks", sa.Column("effective_interval_minutes", sa.Integer(), nullable=True)
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("monitor_tasks", "effective_interval_minutes")
+    op.drop_column("monitor_tasks", "max_interval_minutes")
+    op.drop_column("monitor_tasks", "min_interval_minutes")
+    op.drop_column("monitor_tasks", "adaptive_interval")
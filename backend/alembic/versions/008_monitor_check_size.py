@@ -0,0 +1,41 @@
+"""监控任务最近检查规模.
+
+Revision ID: 008
+Revises: 007
+Create Date: 2026-10-17 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "008"
+down_revision = "007"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("monitor_tasks", sa.Column("last_url_count", sa.Integer(), nullable=True))
+    op.add_column(
+        "monitor_tasks", sa.Column("last_check_duration_ms", sa.Integer(), nullable=True)
+    )
+    # 回填：取每个监控任务最新快照的规模
+    op.execute(
+        """
+        UPDATE monitor_tasks AS m
+        SET last_url_count = s.url_count,
+            last_check_duration_ms = s.fetch_duration_ms + s.parse_duration_ms
+        FROM (
+            SELECT DISTINCT ON (monitor_task_id)
+                monitor_task_id, url_count, fetch_duration_ms, parse_duration_ms
+            FROM sitemap_snapshots
+            ORDER BY monitor_task_id, created_at DESC
+        ) AS s
+        WHERE s.monitor_task_id = m.id
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("monitor_tasks", "last_check_duration_ms")
+    op.drop_column("monitor_tasks", "last_url_count")
@@ -0,0 +1,36 @@
+"""检查执行记录.
+
+Revision ID: 009
+Revises: 008
+Create Date: 2026-10-17 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "009"
+down_revision = "008"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # 检查执行记录表（调度延迟和排队时间统计）
+    op.create_table(
+        "check_runs",
+        sa.Column("id", sa.String(36), primary_key=True),
+        sa.Column("monitor_task_id", sa.String(36), sa.ForeignKey("monitor_tasks.id", ondelete="CASCADE"), nullable=False, index=True),
+        sa.Column("queue", sa.String(64), nullable=True),
+        sa.Column("worker", sa.String(255), nullable=True),
+        sa.Column("due_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("enqueued_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("started_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("finished_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("outcome", sa.String(20), nullable=False),
+    )
+    op.create_index("ix_check_runs_started_at", "check_runs", ["started_at"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_check_runs_started_at", table_name="check_runs")
+    op.drop_table("check_runs")
@@ -0,0 +1,32 @@
+"""快照最后确认时间和检查次数.
+
+Revision ID: 010
+Revises: 009
+Create Date: 2026-10-17 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "010"
+down_revision = "009"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "sitemap_snapshots",
+        sa.Column("last_seen_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+    )
+    op.add_column(
+        "sitemap_snapshots",
+        sa.Column("check_count", sa.Integer(), server_default="1", nullable=False),
+    )
+    # 回填：已有快照的最后确认时间即创建时间
+    op.execute("UPDATE sitemap_snapshots SET last_seen_at = created_at")
+
+
+def downgrade() -> None:
+    op.drop_column("sitemap_snapshots", "check_count")
+    op.drop_column("sitemap_snapshots", "last_seen_at")
@@ -0,0 +1,76 @@
+"""快照增量链存储.
+
+Revision ID: 011
+Revises: 010
+Create Date: 2026-10-17 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision = "011"
+down_revision = "010"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # 已有快照均为关键帧，由 compact_snapshots 任务逐步改写为增量链
+    op.alter_column("sitemap_snapshots", "urls", existing_type=postgresql.JSONB(), nullable=True)
+    op.add_column(
+        "sitemap_snapshots",
+        sa.Column("keyframe_id", sa.String(36), sa.ForeignKey("sitemap_snapshots.id", ondelete="CASCADE"), nullable=True),
+    )
+    op.add_column(
+        "sitemap_snapshots",
+        sa.Column("chain_index", sa.Integer(), server_default="0", nullable=False),
+    )
+    op.add_column("sitemap_snapshots", sa.Column("delta", postgresql.JSONB(), nullable=True))
+    op.create_index("ix_sitemap_snapshots_keyframe_id", "sitemap_snapshots", ["keyframe_id"])
+
+
+def downgrade() -> None:
+    # 先把增量快照还原为完整列表
+    op.execute(
+        """
+        DO $$
+        DECLARE
+            r RECORD;
+        BEGIN
+            FOR r IN
+                SELECT id, keyframe_id, chain_index FROM sitemap_snapshots
+                WHERE keyframe_id IS NOT NULL
+                ORDER BY keyframe_id, chain_index
+            LOOP
+                UPDATE sitemap_snapshots AS s
+                SET urls = (
+                    SELECT COALESCE(jsonb_agg(e.item), '[]'::jsonb)
+                    FROM (
+                        SELECT item FROM jsonb_array_elements(
+                            (SELECT urls FROM sitemap_snapshots p
+                             WHERE p.keyframe_id = r.keyframe_id AND p.chain_index = r.chain_index - 1
+                             UNION ALL
+                             SELECT urls FROM sitemap_snapshots k
+                             WHERE k.id = r.keyframe_id AND r.chain_index = 1)
+                        ) AS item
+                        WHERE item->>'url' NOT IN (SELECT jsonb_array_elements_text(s.delta->'removed'))
+                          AND item->>'url' NOT IN (
+                              SELECT m->>'url' FROM jsonb_array_elements(s.delta->'modified') AS m
+                          )
+                        UNION ALL
+                        SELECT item FROM jsonb_array_elements(s.delta->'added') AS item
+                        UNION ALL
+                        SELECT item FROM jsonb_array_elements(s.delta->'modified') AS item
+                    ) AS e
+                )
+                WHERE s.id = r.id;
+            END LOOP;
+        END $$;
+        """
+    )
+    op.drop_index("ix_sitemap_snapshots_keyframe_id", table_name="sitemap_snapshots")
+    op.drop_column("sitemap_snapshots", "delta")
+    op.drop_column("sitemap_snapshots", "chain_index")
+    op.drop_column("sitemap_snapshots", "keyframe_id")
+    op.alter_column("sitemap_snapshots", "urls", existing_type=postgresql.JSONB(), nullable=False)
@@ -0,0 +1,99 @@
+"""快照 URL 列表压缩二进制编码.
+
+Revision ID: 012
+Revises: 011
+Create Date: 2026-10-17 00:00:00.000000
+
+"""
+import json
+import struct
+import zlib
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "012"
+down_revision = "011"
+branch_labels = None
+depends_on = None
+
+# 降级时使用的解码器：迁移中保留一份当时的格式实现，
+# 不引用应用代码，应用中的编解码器以后修改不影响本迁移
+_MAGIC_URLS = b"SMB1"
+_U32 = struct.Struct("<I")
+_FIELDS = ("lastmod", "changefreq", "priority")
+_SEPARATOR = "\0"
+
+
+def _read_section(data: bytes, offset: int) -> tuple[bytes, int]:
+    (size,) = _U32.unpack_from(data, offset)
+    offset += _U32.size
+    return data[offset : offset + size], offset + size
+
+
+def _read_fields(data: bytes, offset: int, count: int) -> tuple[list[list], int]:
+    """读取块内的 lastmod / changefreq / priority 列（块内字典 + 序号数组）."""
+    columns = []
+    for _ in _FIELDS:
+        (size,) = _U32.unpack_from(data, offset)
+        values, offset = _read_section(data, offset + _U32.size)
+        table = [None, *(values.decode().split(_SEPARATOR) if size else [])]
+        indices, offset = _read_section(data, offset)
+        columns.append([table[index] for index in struct.unpack(f"<{count}I", indices)])
+    return columns, offset
+
+
+def _iter_blocks(blob: bytes, magic: bytes):
+    """解压并逐块产出 (条目数, 数据, 块内容起始位置)."""
+    if bytes(blob[: len(magic)]) != magic:
+        raise ValueError("未知的快照数据格式")
+    data = zlib.decompress(bytes(blob[len(magic) :]))
+    offset = 0
+    while True:
+        (count,) = _U32.unpack_from(data, offset)
+        if count == 0:
+            return
+        (size,) = _U32.unpack_from(data, offset + _U32.size)
+        start = offset + 2 * _U32.size
+        yield count, data, start
+        offset = start + size
+
+
+def _decode_urls(blob: bytes) -> list[dict]:
+    """解码 URL 字符串格式（SMB1）的 URL 列表."""
+    items = []
+    for count, data, offset in _iter_blocks(blob, _MAGIC_URLS):
+        prefixes, offset = _read_section(data, offset)
+        suffixes, offset = _read_section(data, offset)
+        columns, offset = _read_fields(data, offset, count)
+        prefix_lengths = struct.unpack(f"<{count}I", prefixes)
+        previous = ""
+        for i, suffix in enumerate(suffixes.decode().split(_SEPARATOR)):
+            url = previous[: prefix_lengths[i]] + suffix
+            previous = url
+            fields = {name: column[i] for name, column in zip(_FIELDS, columns, strict=True)}
+            items.append({"url": url, **fields})
+    return items
+
+
+def upgrade() -> None:
+    # 已有的 JSONB 关键帧保持可读，由 compact_snapshots 任务逐步改写为 urls_blob
+    op.add_column("sitemap_snapshots", sa.Column("urls_blob", sa.LargeBinary(), nullable=True))
+
+
+def downgrade() -> None:
+    # 把压缩编码的关键帧还原为 JSONB
+    bind = op.get_bind()
+    rows = bind.execute(
+        sa.text("SELECT id FROM sitemap_snapshots WHERE urls_blob IS NOT NULL")
+    ).scalars().all()
+    for snapshot_id in rows:
+        blob = bind.execute(
+            sa.text("SELECT urls_blob FROM sitemap_snapshots WHERE id = :id"),
+            {"id": snapshot_id},
+        ).scalar_one()
+        bind.execute(
+            sa.text("UPDATE sitemap_snapshots SET urls = CAST(:urls AS JSONB) WHERE id = :id"),
+            {"id": snapshot_id, "urls": json.dumps(_decode_urls(blob))},
+        )
+    op.drop_column("sitemap_snapshots", "urls_blob")
@@ -0,0 +1,186 @@
+"""监控任务 URL 字典.
+
+Revision ID: 013
+Revises: 012
+Create Date: 2026-10-17 00:00:00.000000
+
+"""
+import json
+import os
+import struct
+import zlib
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "013"
+down_revision = "012"
+branch_labels = None
+depends_on = None
+
+# 降级时使用的编解码器：迁移中保留一份当时的格式实现，
+# 不引用应用代码，应用中的编解码器以后修改不影响本迁移
+_MAGIC = b"SMB2"
+_MAGIC_URLS = b"SMB1"
+_BLOCK_SIZE = 4096
+_U32 = struct.Struct("<I")
+_FIELDS = ("lastmod", "changefreq", "priority")
+_SEPARATOR = "\0"
+
+
+def _read_section(data: bytes, offset: int) -> tuple[bytes, int]:
+    (size,) = _U32.unpack_from(data, offset)
+    offset += _U32.size
+    return data[offset : offset + size], offset + size
+
+
+def _read_fields(data: bytes, offset: int, count: int) -> tuple[list[list], int]:
+    """读取块内的 lastmod / changefreq / priority 列（块内字典 + 序号数组）."""
+    columns = []
+    for _ in _FIELDS:
+        (size,) = _U32.unpack_from(data, offset)
+        values, offset = _read_section(data, offset + _U32.size)
+        table = [None, *(values.decode().split(_SEPARATOR) if size else [])]
+        indices, offset = _read_section(data, offset)
+        columns.append([table[index] for index in struct.unpack(f"<{count}I", indices)])
+    return columns, offset
+
+
+def _iter_blocks(blob: bytes, magic: bytes):
+    """解压并逐块产出 (条目数, 数据, 块内容起始位置)."""
+    if bytes(blob[: len(magic)]) != magic:
+        raise ValueError("未知的快照数据格式")
+    data = zlib.decompress(bytes(blob[len(magic) :]))
+    offset = 0
+    while True:
+        (count,) = _U32.unpack_from(data, offset)
+        if count == 0:
+            return
+        (size,) = _U32.unpack_from(data, offset + _U32.size)
+        start = offset + 2 * _U32.size
+        yield count, data, start
+        offset = start + size
+
+
+def _iter_entries(blob: bytes):
+    """解码 URL 字典 ID 格式（SMB2），按 ID 升序产出 (URL ID, 字段)."""
+    previous = 0
+    for count, data, offset in _iter_blocks(blob, _MAGIC):
+        gaps, offset = _read_section(data, offset)
+        columns, offset = _read_fields(data, offset, count)
+        for i, gap in enumerate(struct.unpack(f"<{count}Q", gaps)):
+            previous += gap
+            yield previous, tuple(column[i] for column in columns)
+
+
+def _section(data: bytes) -> bytes:
+    return _U32.pack(len(data)) + data
+
+
+def _encode_fields(rows: list[tuple]) -> bytes:
+    parts = []
+    for column in range(len(_FIELDS)):
+        table: dict[str, int] = {}
+        indices = [
+            0 if row[column] is None else table.setdefault(row[column], len(table) + 1)
+            for row in rows
+        ]
+        parts.append(_U32.pack(len(table)))
+        parts.append(_section(_SEPARATOR.join(table).encode()))
+        parts.append(_section(struct.pack(f"<{len(indices)}I", *indices)))
+    return b"".join(parts)
+
+
+def _encode_urls(items) -> bytes:
+    """编码为 URL 字符串格式（SMB1）：按 URL 排序，分块前缀压缩."""
+    items = sorted(items, key=lambda item: item["url"])
+    compressor = zlib.compressobj(6)
+    chunks = [_MAGIC_URLS]
+    for start in range(0, len(items), _BLOCK_SIZE):
+        chunk = items[start : start + _BLOCK_SIZE]
+        prefixes = []
+        suffixes = []
+        previous = ""
+        for item in chunk:
+            prefix = len(os.path.commonprefix([previous, item["url"]]))
+            prefixes.append(prefix)
+            suffixes.append(item["url"][prefix:])
+            previous = item["url"]
+        payload = (
+            _section(struct.pack(f"<{len(prefixes)}I", *prefixes))
+            + _section(_SEPARATOR.join(suffixes).encode())
+            + _encode_fields([tuple(item.get(name) for name in _FIELDS) for item in chunk])
+        )
+        header = _U32.pack(len(chunk)) + _U32.pack(len(payload))
+        chunks.append(compressor.compress(header + payload))
+    chunks.append(compressor.compress(_U32.pack(0)))
+    chunks.append(compressor.flush())
+    return b"".join(chunks)
+
+
+def upgrade() -> None:
+    # URL 字典表
+    op.create_table(
+        "monitor_urls",
+        sa.Column("id", sa.BigInteger(), primary_key=True, autoincrement=True),
+        sa.Column("monitor_task_id", sa.String(36), sa.ForeignKey("monitor_tasks.id", ondelete="CASCADE"), nullable=False),
+        sa.Column("url", sa.Text(), nullable=False),
+        sa.UniqueConstraint("monitor_task_id", "url", name="uq_monitor_urls_monitor_url"),
+    )
+    # 已有快照为旧格式（保存 URL 字符串），由 compact_snapshots 任务逐步改写
+    op.add_column(
+        "sitemap_snapshots",
+        sa.Column("storage_version", sa.Integer(), server_default="1", nullable=False),
+    )
+
+
+def _url_item(urls: dict[int, str], url_id: int, values) -> dict:
+    """把 URL 字典 ID 格式的条目还原为 URL 条目."""
+    return {"url": urls[url_id], **dict(zip(_FIELDS, values, strict=True))}
+
+
+def downgrade() -> None:
+    # 把 URL 字典 ID 格式的快照还原为保存 URL 字符串的格式
+    bind = op.get_bind()
+    monitor_ids = bind.execute(
+        sa.text("SELECT DISTINCT monitor_task_id FROM sitemap_snapshots WHERE storage_version = 2")
+    ).scalars().all()
+    for monitor_id in monitor_ids:
+        urls = dict(
+            bind.execute(
+                sa.text("SELECT id, url FROM monitor_urls WHERE monitor_task_id = :monitor_id"),
+                {"monitor_id": monitor_id},
+            ).tuples().all()
+        )
+
+        rows = bind.execute(
+            sa.text(
+                "SELECT id, urls_blob, delta FROM sitemap_snapshots "
+                "WHERE monitor_task_id = :monitor_id AND storage_version = 2"
+            ),
+            {"monitor_id": monitor_id},
+        ).tuples().all()
+        for snapshot_id, blob, delta in rows:
+            if blob is not None:
+                blob = _encode_urls(
+                    _url_item(urls, url_id, values) for url_id, values in _iter_entries(blob)
+                )
+            if delta is not None:
+                delta = json.dumps({
+                    "added": [
+                        _url_item(urls, url_id, values) for url_id, *values in delta["added"]
+                    ],
+                    "removed": [urls[url_id] for url_id in delta["removed"]],
+                    "modified": [
+                        _url_item(urls, url_id, values) for url_id, *values in delta["modified"]
+                    ],
+                })
+            bind.execute(
+                sa.text(
+                    "UPDATE sitemap_snapshots SET urls_blob = :blob, delta = CAST(:delta AS JSONB) "
+                    "WHERE id = :id"
+                ),
+                {"id": snapshot_id, "blob": blob, "delta": delta},
+            )
+    op.drop_column("sitemap_snapshots", "storage_version")
+    op.drop_table("monitor_urls")
@@ -0,0 +1,32 @@
+"""子 Sitemap URL 列表压缩二进制编码.
+
+Revision ID: 014
+Revises: 013
+Create Date: 2026-10-17 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision = "014"
+down_revision = "013"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("sitemap_documents", sa.Column("urls_blob", sa.LargeBinary(), nullable=True))
+    # 文档状态只是缓存：删除保存了 URL 列表的子 Sitemap 状态，
+    # 下一次检查完整获取这些子 Sitemap 并以新格式保存
+    op.execute("DELETE FROM sitemap_documents WHERE urls IS NOT NULL")
+    op.drop_column("sitemap_documents", "urls")
+
+
+def downgrade() -> None:
+    op.add_column(
+        "sitemap_documents",
+        sa.Column("urls", postgresql.JSONB(), nullable=True),
+    )
+    op.execute("DELETE FROM sitemap_documents WHERE urls_blob IS NOT NULL")
+    op.drop_column("sitemap_documents", "urls_blob")
@@ -13,7 +13,7 @@ fi
 # 创建临时的 Procfile
 cat > Procfile.dev <<EOF
 web: uvicorn sitemap_monitor.main:app --reload --port 8000
-worker: celery -A sitemap_monitor.tasks worker --loglevel=info
+worker: celery -A sitemap_monitor.tasks worker -Q checks_priority,checks,checks_heavy,celery --loglevel=info
 beat: celery -A sitemap_monitor.tasks beat --loglevel=info
 EOF
 
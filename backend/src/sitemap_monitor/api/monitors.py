@@ -6,12 +6,15 @@ from fastapi import APIRouter, Query
 from pydantic import BaseModel, HttpUrl, Field
 
 from sitemap_monitor.api.deps import CurrentUser, DbSession
+from sitemap_monitor.config import get_settings
+from sitemap_monitor.api.exceptions import ConflictError
 from sitemap_monitor.core.monitor_service import (
     create_monitor,
     delete_monitor,
     get_monitor_for_user,
     get_monitors,
     pause_monitor,
+    request_monitor_check,
     resume_monitor,
     update_monitor,
     count_monitors,
@@ -45,6 +48,9 @@ class CreateMonitorRequest(BaseModel):
     name: str = Field(..., min_length=1, max_length=255)
     sitemap_url: HttpUrl
     check_interval_minutes: int = Field(default=60, ge=1, le=1440)
+    adaptive_interval: bool = False
+    min_interval_minutes: int | None = Field(None, ge=1, le=1440)
+    max_interval_minutes: int | None = Field(None, ge=1, le=1440)
 
 
 class UpdateMonitorRequest(BaseModel):
@@ -53,6 +59,9 @@ class UpdateMonitorRequest(BaseModel):
     name: str | None = Field(None, min_length=1, max_length=255)
     sitemap_url: HttpUrl | None = None
     check_interval_minutes: int | None = Field(None, ge=1, le=1440)
+    adaptive_interval: bool | None = None
+    min_interval_minutes: int | None = Field(None, ge=1, le=1440)
+    max_interval_minutes: int | None = Field(None, ge=1, le=1440)
 
 
 class MonitorResponse(BaseModel):
@@ -62,8 +71,13 @@ class MonitorResponse(BaseModel):
     name: str
     sitemap_url: str
     check_interval_minutes: int
+    adaptive_interval: bool
+    min_interval_minutes: int | None
+    max_interval_minutes: int | None
+    effective_interval_minutes: int | None
     status: str
     last_check_at: datetime | None
+    next_check_at: datetime | None
     last_error: str | None
     error_count: int
     created_at: datetime
@@ -90,8 +104,13 @@ def _monitor_to_response(monitor) -> MonitorResponse:
         name=monitor.name,
         sitemap_url=monitor.sitemap_url,
         check_interval_minutes=monitor.check_interval_minutes,
+        adaptive_interval=monitor.adaptive_interval,
+        min_interval_minutes=monitor.min_interval_minutes,
+        max_interval_minutes=monitor.max_interval_minutes,
+        effective_interval_minutes=monitor.effective_interval_minutes,
         status=monitor.status,
         last_check_at=monitor.last_check_at,
+        next_check_at=monitor.next_check_at,
         last_error=monitor.last_error,
         error_count=monitor.error_count,
         created_at=monitor.created_at,
@@ -119,7 +138,7 @@ async def create_monitor_task(
     db: DbSession,
 ):
     """创建监控任务."""
-    from sitemap_monitor.tasks.scheduler import check_sitemap_task
+    from sitemap_monitor.tasks.scheduler import enqueue_priority_check
 
     monitor = await create_monitor(
         db=db,
@@ -127,11 +146,16 @@ async def create_monitor_task(
         name=request.name,
         sitemap_url=str(request.sitemap_url),
         check_interval_minutes=request.check_interval_minutes,
+        adaptive_interval=request.adaptive_interval,
+        min_interval_minutes=request.min_interval_minutes,
+        max_interval_minutes=request.max_interval_minutes,
     )
+    # 创建后立即触发首次检查
+    await request_monitor_check(db, monitor)
     await db.commit()
 
-    # 创建后立即触发首次检查
-    check_sitemap_task.delay(monitor.id)
+    if get_settings().check_worker_mode == "celery":
+        enqueue_priority_check(monitor.id)
 
     return _monitor_to_response(monitor)
 
@@ -180,6 +204,9 @@ async def update_monitor_task(
         name=request.name,
         sitemap_url=str(request.sitemap_url) if request.sitemap_url else None,
         check_interval_minutes=request.check_interval_minutes,
+        adaptive_interval=request.adaptive_interval,
+        min_interval_minutes=request.min_interval_minutes,
+        max_interval_minutes=request.max_interval_minutes,
     )
     return _monitor_to_response(monitor)
 
@@ -227,8 +254,12 @@ async def trigger_check(
     db: DbSession,
 ):
     """手动触发检查."""
-    from sitemap_monitor.tasks.scheduler import check_sitemap_task
+    from sitemap_monitor.tasks.scheduler import enqueue_priority_check
 
     monitor = await get_monitor_for_user(db, monitor_id, user.id)
-    check_sitemap_task.delay(monitor.id)
+    if not await request_monitor_check(db, monitor):
+        raise ConflictError("该监控任务正在检查中")
+    await db.commit()
+    if get_settings().check_worker_mode == "celery":
+        enqueue_priority_check(monitor.id)
     return MessageResponse(message="检查任务已提交")
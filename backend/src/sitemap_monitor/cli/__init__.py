@@ -1,9 +1,72 @@
 """CLI 管理命令模块."""
 
+import argparse
+import asyncio
 
-def main() -> None:
+
+def _build_parser() -> argparse.ArgumentParser:
+    """构建命令行参数解析器."""
+    parser = argparse.ArgumentParser(prog="sitemap-monitor", description="Sitemap Monitor CLI")
+    subparsers = parser.add_subparsers(dest="command")
+
+    worker = subparsers.add_parser(
+        "worker",
+        help="运行 asyncio 检查 worker（需配置 CHECK_WORKER_MODE=asyncio）",
+    )
+    worker.add_argument("--concurrency", type=int, default=None, help="全局并发检查数")
+    worker.add_argument(
+        "--poll-interval", type=float, default=None, help="没有到期任务时的轮询间隔（秒）"
+    )
+
+    drift = subparsers.add_parser("drift", help="按队列或 worker 统计调度延迟分位数")
+    drift.add_argument("--hours", type=int, default=24, help="统计最近多少小时的检查")
+    drift.add_argument(
+        "--by", choices=("queue", "worker"), default="queue", help="分组方式"
+    )
+    return parser
+
+
+def _format_seconds(value: float | None) -> str:
+    return "-" if value is None else f"{value:.1f}"
+
+
+async def _print_drift(hours: int, group_by: str) -> None:
+    """打印调度延迟统计."""
+    from sitemap_monitor.core.check_run_service import get_drift_stats
+    from sitemap_monitor.models import dispose_engine, get_session_factory
+
+    try:
+        async with get_session_factory()() as db:
+            stats = await get_drift_stats(db, hours=hours, group_by=group_by)
+    finally:
+        await dispose_engine()
+
+    header = f"{group_by:<32} {'count':>8}"
+    for label in ("drift", "wait", "duration"):
+        header += "".join(f" {label + '_' + p:>14}" for p in ("p50", "p95", "p99"))
+    print(header)
+    for row in stats:
+        line = f"{row.group or '-':<32} {row.count:>8}"
+        for values in (row.drift, row.queue_wait, row.duration):
+            line += "".join(f" {_format_seconds(v):>14}" for v in values)
+        print(line)
+
+
+def main(argv: list[str] | None = None) -> None:
     """CLI 入口点."""
-    print("Sitemap Monitor CLI")
+    parser = _build_parser()
+    args = parser.parse_args(argv)
+
+    if args.command == "worker":
+        from sitemap_monitor.logging import configure_logging
+        from sitemap_monitor.tasks.worker import run_worker
+
+        configure_logging()
+        asyncio.run(run_worker(args.concurrency, args.poll_interval))
+    elif args.command == "drift":
+        asyncio.run(_print_drift(args.hours, args.by))
+    else:
+        parser.print_help()
 
 
 if __name__ == "__main__":
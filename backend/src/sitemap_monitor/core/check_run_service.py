@@ -0,0 +1,111 @@
+"""检查执行记录服务."""
+
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from sitemap_monitor.models import CheckOutcome, CheckRun
+
+# 统计的分位数
+PERCENTILES = (0.5, 0.95, 0.99)
+
+
+@dataclass
+class CheckRunContext:
+    """检查任务的调度信息（由派发方和执行方提供）."""
+
+    queue: str | None = None
+    worker: str | None = None
+    # 检查的到期时间，未提供时使用监控任务的 next_check_at
+    due_at: datetime | None = None
+    enqueued_at: datetime | None = None
+    started_at: datetime = field(default_factory=lambda: datetime.now(timezone.utc))
+
+
+def record_check_run(
+    db: AsyncSession,
+    monitor_task_id: str,
+    context: CheckRunContext,
+    due_at: datetime,
+    outcome: CheckOutcome,
+) -> CheckRun:
+    """记录一次检查（随调用方的事务一起提交）."""
+    run = CheckRun(
+        monitor_task_id=monitor_task_id,
+        queue=context.queue,
+        worker=context.worker,
+        due_at=context.due_at or due_at,
+        enqueued_at=context.enqueued_at,
+        started_at=context.started_at,
+        finished_at=datetime.now(timezone.utc),
+        outcome=outcome.value,
+    )
+    db.add(run)
+    return run
+
+
+@dataclass
+class DriftStats:
+    """一组检查的调度延迟统计（秒）."""
+
+    group: str | None
+    count: int
+    # 调度延迟：开始时间 - 到期时间
+    drift: list[float | None]
+    # 排队时间：开始时间 - 可执行时间（入队时间和到期时间中较晚者，
+    # 提前派发的任务在到期前延时等待，不计入排队）
+    queue_wait: list[float | None]
+    # 执行时间：结束时间 - 开始时间
+    duration: list[float | None]
+
+
+async def get_drift_stats(
+    db: AsyncSession,
+    hours: int = 24,
+    group_by: str = "queue",
+) -> list[DriftStats]:
+    """
+    按队列或 worker 统计最近的调度延迟分位数（p50/p95/p99）.
+
+    Args:
+        hours: 统计最近多少小时的检查
+        group_by: 分组字段，queue 或 worker
+
+    Returns:
+        每组的统计结果
+    """
+    group_column = CheckRun.worker if group_by == "worker" else CheckRun.queue
+
+    def percentiles(start, end) -> list:
+        seconds = func.extract("epoch", end - start)
+        return [func.percentile_cont(p).within_group(seconds) for p in PERCENTILES]
+
+    since = datetime.now(timezone.utc) - timedelta(hours=hours)
+    result = await db.execute(
+        select(
+            group_column,
+            func.count(CheckRun.id),
+            *percentiles(CheckRun.due_at, CheckRun.started_at),
+            *percentiles(
+                func.greatest(CheckRun.enqueued_at, CheckRun.due_at), CheckRun.started_at
+            ),
+            *percentiles(CheckRun.started_at, CheckRun.finished_at),
+        )
+        .where(CheckRun.started_at >= since)
+        .group_by(group_column)
+        .order_by(group_column)
+    )
+
+    n = len(PERCENTILES)
+    return [
+        DriftStats(
+            group=row[0],
+            count=row[1],
+            drift=list(row[2 : 2 + n]),
+            queue_wait=list(row[2 + n : 2 + 2 * n]),
+            duration=list(row[2 + 2 * n : 2 + 3 * n]),
+        )
+        for row in result.all()
+    ]
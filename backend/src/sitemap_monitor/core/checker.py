@@ -1,98 +1,359 @@
 """Sitemap 检查器."""
 
+import asyncio
+import hashlib
+import tempfile
 import time
-from dataclasses import dataclass
+from collections.abc import Iterable
+from dataclasses import dataclass, field, replace
+from datetime import datetime, timezone
+from typing import Any
 
 import httpx
 
 from sitemap_monitor.config import get_settings
+from sitemap_monitor.core import document_cache
+from sitemap_monitor.core.http_client import get_http_client, host_slot
+from sitemap_monitor.core.rate_limiter import HostBlockedError, defer_host, parse_retry_after
+from sitemap_monitor.core.snapshot_codec import decode_snapshot_urls
+from sitemap_monitor.core.url_hash import combine_url_hashes, entry_hash, hash_url_items
 from sitemap_monitor.logging import get_logger
-from sitemap_monitor.parsers.sitemap import parse_sitemap, is_sitemap_index, parse_sitemap_index
+from sitemap_monitor.parsers.sitemap import (
+    SitemapIndexEntry,
+    SitemapStreamParser,
+    SitemapUrl,
+)
 
 logger = get_logger(__name__)
 
 
 @dataclass
-class FetchResult:
-    """获取结果."""
+class DocumentState:
+    """
+    单个 Sitemap 文档的缓存状态.
+
+    etag / last_modified 用于条件请求；
+    children 为 Sitemap Index 的子 Sitemap 列表，urls 为子 Sitemap 的 URL 列表，
+    收到 304 时据此复用上次的结果。
+    index_lastmod 为父 Index 中该子 Sitemap 的 lastmod，未变化时可直接复用 urls 而不请求。
+    content_hash 为原始响应内容的 SHA-256，内容未变化时跳过解析。
+    从数据库加载的 URL 列表保存在 urls_blob 中（snapshot_codec 编码），
+    只在实际复用时才解码。
+    failed_since 为子 Sitemap 连续临时失败的开始时间，期间沿用上次的 URL 列表。
+    """
+
+    etag: str | None = None
+    last_modified: str | None = None
+    children: list[dict[str, Any]] | None = None
+    urls: list[dict[str, Any]] | None = None
+    index_lastmod: str | None = None
+    content_hash: str | None = None
+    urls_blob: bytes | None = None
+    failed_since: datetime | None = None
+
+    @property
+    def has_validators(self) -> bool:
+        return bool(self.etag or self.last_modified)
+
+    @property
+    def has_urls(self) -> bool:
+        return self.urls is not None or self.urls_blob is not None
+
+    def load_urls(self) -> list[dict[str, Any]] | None:
+        """获取 URL 列表（必要时从 urls_blob 解码）."""
+        if self.urls is None and self.urls_blob is not None:
+            self.urls = decode_snapshot_urls(self.urls_blob)
+        return self.urls
+
+
+def _conditional_headers(validators: DocumentState | None) -> dict[str, str]:
+    """构建条件请求头."""
+    headers: dict[str, str] = {}
+    if validators is None:
+        return headers
+    if validators.etag:
+        headers["If-None-Match"] = validators.etag
+    if validators.last_modified:
+        headers["If-Modified-Since"] = validators.last_modified
+    return headers
+
+
+# 从临时文件回读解析时每次读取的字节数
+_SPOOL_READ_SIZE = 64 * 1024
+
+# 可重试的 HTTP 状态码（5xx 之外）
+_RETRYABLE_STATUS_CODES = frozenset({408, 425, 429})
+
+# 可能携带 Retry-After 的状态码
+_RETRY_AFTER_STATUS_CODES = frozenset({429, 503})
+
+
+def _defer_by_retry_after(url: str, response: httpx.Response) -> float | None:
+    """按 429/503 响应的 Retry-After 暂停请求该主机，返回暂停秒数."""
+    if response.status_code not in _RETRY_AFTER_STATUS_CODES:
+        return None
+    retry_after = parse_retry_after(response.headers.get("retry-after"))
+    if retry_after is None:
+        return None
+    return defer_host(url, retry_after)
+
+
+@dataclass
+class DocumentResult:
+    """单个 Sitemap 文档的获取与解析结果."""
 
     success: bool
-    content: bytes | None = None
+    not_modified: bool = False
+    is_index: bool = False
+    urls: list[dict[str, Any]] = field(default_factory=list)
+    # urls 的顺序无关指纹（见 url_hash），解析时逐条累加
+    url_hash: int = 0
+    children: list[dict[str, Any]] = field(default_factory=list)
+    etag: str | None = None
+    last_modified: str | None = None
+    content_hash: str | None = None
     error: str | None = None
-    duration_ms: int = 0
+    # 临时性失败（超时、连接错误、5xx、429 等），稍后重试可能成功
+    retryable: bool = False
+    # 服务器要求的最短重试等待秒数（Retry-After）
+    retry_after: float | None = None
+    fetch_duration_ms: int = 0
+    parse_duration_ms: int = 0
 
 
-async def fetch_sitemap(url: str, retries: int = 3) -> FetchResult:
+async def fetch_document(
+    url: str,
+    validators: DocumentState | None = None,
+    content_hash: str | None = None,
+) -> DocumentResult:
     """
-    获取 Sitemap 内容.
+    流式获取并解析单个 Sitemap 文档.
+
+    响应体不会整体缓存在内存中，而是边下载边解析，峰值内存与文档大小无关（不含解析出的 URL 列表）。
+    gzip 压缩的 Sitemap（如 sitemap-1.xml.gz）按文件头识别，边解压边解析。
+
+    传入上次的 content_hash 时，响应先写入临时文件（超过阈值落盘）并计算指纹，
+    指纹相同则不解析直接返回 not_modified，否则再从临时文件流式解析。
 
-    支持重试机制。
+    只请求一次，不在进程内等待重试；失败结果的 retryable 标记是否值得稍后重试，
+    由调用方通过任务队列重新调度。
 
     Args:
         url: Sitemap URL
-        retries: 重试次数
+        validators: 上次获取时记录的缓存验证器
+        content_hash: 上次获取时记录的内容指纹
 
     Returns:
-        FetchResult 获取结果
+        DocumentResult 获取与解析结果
     """
     settings = get_settings()
-    last_error = None
-
-    for attempt in range(retries):
-        start_time = time.time()
-        try:
-            async with httpx.AsyncClient(
-                timeout=settings.sitemap_request_timeout,
-                follow_redirects=True,
-                http2=True,
-            ) as client:
-                response = await client.get(url)
+    client = get_http_client()
+    headers = _conditional_headers(validators)
+
+    start_time = time.time()
+    parse_seconds = 0.0
+    spool = None
+    try:
+        async with host_slot(url):
+            async with client.stream("GET", url, headers=headers) as response:
+                if response.status_code == 304:
+                    return DocumentResult(
+                        success=True,
+                        not_modified=True,
+                        etag=validators.etag if validators else None,
+                        last_modified=validators.last_modified if validators else None,
+                        fetch_duration_ms=int((time.time() - start_time) * 1000),
+                    )
                 response.raise_for_status()
 
-                duration_ms = int((time.time() - start_time) * 1000)
-                return FetchResult(
+                result = DocumentResult(
                     success=True,
-                    content=response.content,
-                    duration_ms=duration_ms,
+                    etag=response.headers.get("etag"),
+                    last_modified=response.headers.get("last-modified"),
                 )
+                parser = SitemapStreamParser()
+                hasher = hashlib.sha256()
+                received = 0
+
+                if content_hash is None:
+                    # 没有历史指纹：边下载边解析
+                    async for chunk in response.aiter_bytes():
+                        received += len(chunk)
+                        hasher.update(chunk)
+                        parse_start = time.time()
+                        _collect_entries(parser.feed(chunk), result)
+                        parse_seconds += time.time() - parse_start
+                else:
+                    # 有历史指纹：先落到临时文件并计算指纹，变化时再解析
+                    spool = tempfile.SpooledTemporaryFile(
+                        max_size=settings.sitemap_spool_max_bytes
+                    )
+                    async for chunk in response.aiter_bytes():
+                        received += len(chunk)
+                        hasher.update(chunk)
+                        spool.write(chunk)
+
+                if received == 0:
+                    return DocumentResult(
+                        success=False,
+                        error="内容为空",
+                        fetch_duration_ms=int((time.time() - start_time) * 1000),
+                    )
+
+        result.content_hash = hasher.hexdigest()
+        if spool is not None:
+            if result.content_hash == content_hash:
+                result.not_modified = True
+                result.fetch_duration_ms = int((time.time() - start_time) * 1000)
+                return result
+
+            parse_start = time.time()
+            spool.seek(0)
+            while chunk := spool.read(_SPOOL_READ_SIZE):
+                _collect_entries(parser.feed(chunk), result)
+            parse_seconds += time.time() - parse_start
+
+        parse_start = time.time()
+        _collect_entries(parser.close(), result)
+        parse_seconds += time.time() - parse_start
+
+        result.is_index = bool(parser.is_index)
+        result.parse_duration_ms = int(parse_seconds * 1000)
+        result.fetch_duration_ms = int((time.time() - start_time) * 1000) - result.parse_duration_ms
+        return result
+
+    except httpx.TimeoutException:
+        logger.warning("Sitemap fetch timeout", url=url)
+        return _fetch_failure("请求超时", start_time, retryable=True)
+    except httpx.HTTPStatusError as e:
+        status_code = e.response.status_code
+        logger.warning("Sitemap fetch HTTP error", url=url, status_code=status_code)
+        result = _fetch_failure(
+            f"HTTP 错误: {status_code}",
+            start_time,
+            retryable=status_code in _RETRYABLE_STATUS_CODES or status_code >= 500,
+        )
+        result.retry_after = _defer_by_retry_after(url, e.response)
+        return result
+    except HostBlockedError as e:
+        # 主机仍在 Retry-After 暂停期内，不发送请求
+        logger.warning("Sitemap fetch deferred", url=url, retry_after=e.retry_after)
+        result = _fetch_failure(str(e), start_time, retryable=True)
+        result.retry_after = e.retry_after
+        return result
+    except httpx.RequestError as e:
+        logger.warning("Sitemap fetch request error", url=url, error=str(e))
+        return _fetch_failure(f"请求失败: {str(e)}", start_time, retryable=True)
+    except Exception as e:
+        # 解析错误重试也不会成功
+        logger.error("Sitemap parse error", url=url, error=str(e))
+        return DocumentResult(
+            success=False,
+            error=f"解析失败: {str(e)}",
+            fetch_duration_ms=int((time.time() - start_time) * 1000),
+            parse_duration_ms=int(parse_seconds * 1000),
+        )
+    finally:
+        if spool is not None:
+            spool.close()
+
+
+def _fetch_failure(error: str, start_time: float, retryable: bool) -> DocumentResult:
+    """构建请求失败结果."""
+    return DocumentResult(
+        success=False,
+        error=error,
+        retryable=retryable,
+        fetch_duration_ms=int((time.time() - start_time) * 1000),
+    )
+
+
+async def _fetch_document_shared(
+    url: str,
+    validators: DocumentState | None = None,
+    content_hash: str | None = None,
+) -> DocumentResult:
+    """
+    获取文档，与其他检查共享同一 URL 的获取结果.
 
-        except httpx.TimeoutException:
-            last_error = "请求超时"
-            logger.warning(
-                "Sitemap fetch timeout",
-                url=url,
-                attempt=attempt + 1,
-                max_retries=retries,
-            )
-        except httpx.HTTPStatusError as e:
-            last_error = f"HTTP 错误: {e.response.status_code}"
-            logger.warning(
-                "Sitemap fetch HTTP error",
-                url=url,
-                status_code=e.response.status_code,
-                attempt=attempt + 1,
-            )
-        except httpx.RequestError as e:
-            last_error = f"请求失败: {str(e)}"
-            logger.warning(
-                "Sitemap fetch request error",
-                url=url,
-                error=str(e),
-                attempt=attempt + 1,
+    先查共享缓存，再合并同一 URL 的并发请求；共享的结果按调用方自己的
+    缓存验证器和内容指纹转换（内容相同时视为未变化）。
+    共享结果无法判断是否变化时（其他调用方收到 304），自行请求。
+    """
+    key = document_cache.normalize_url(url)
+    shared = document_cache.get_cached(key)
+    if shared is not None:
+        document = _derive_shared_document(shared, validators, content_hash)
+        if document is not None:
+            return document
+
+    async def fetch() -> DocumentResult:
+        document = await fetch_document(url, validators=validators, content_hash=content_hash)
+        if document.not_modified and document.content_hash is None:
+            # 304：内容与本次请求携带的指纹相同
+            document.content_hash = content_hash
+        if document.success:
+            document_cache.put_cached(
+                key, document, size=len(document.urls) + len(document.children)
             )
-
-        # 重试前等待
-        if attempt < retries - 1:
-            await _async_sleep(settings.sitemap_retry_delay)
-
-    duration_ms = int((time.time() - start_time) * 1000)
-    return FetchResult(success=False, error=last_error, duration_ms=duration_ms)
-
-
-async def _async_sleep(seconds: int) -> None:
-    """异步等待."""
-    import asyncio
-    await asyncio.sleep(seconds)
+        return document
+
+    document, is_shared = await document_cache.coalesce(key, fetch)
+    if not is_shared:
+        return document
+    if document is not None:
+        derived = _derive_shared_document(document, validators, content_hash)
+        if derived is not None:
+            return derived
+    return await fetch_document(url, validators=validators, content_hash=content_hash)
+
+
+def _derive_shared_document(
+    shared: DocumentResult,
+    validators: DocumentState | None,
+    content_hash: str | None,
+) -> DocumentResult | None:
+    """把其他检查的获取结果转换为当前调用方的结果，无法判断时返回 None."""
+    if not shared.success:
+        return replace(shared)
+
+    unchanged = (content_hash is not None and content_hash == shared.content_hash) or (
+        validators is not None
+        and validators.etag is not None
+        and validators.etag == shared.etag
+    )
+    if unchanged:
+        return DocumentResult(
+            success=True,
+            not_modified=True,
+            etag=shared.etag,
+            last_modified=shared.last_modified,
+            content_hash=shared.content_hash,
+        )
+    if shared.not_modified:
+        return None
+    # 复用解析结果，不计入本次检查的获取和解析耗时
+    return replace(
+        shared,
+        urls=list(shared.urls),
+        children=list(shared.children),
+        fetch_duration_ms=0,
+        parse_duration_ms=0,
+    )
+
+
+def _collect_entries(
+    entries: Iterable[SitemapUrl | SitemapIndexEntry], result: DocumentResult
+) -> None:
+    """把解析出的条目追加到结果中，并累加 URL 指纹."""
+    hashes = [result.url_hash]
+    for entry in entries:
+        if isinstance(entry, SitemapIndexEntry):
+            result.children.append({"loc": entry.loc, "lastmod": entry.lastmod})
+        else:
+            result.urls.append(entry.to_dict())
+            hashes.append(entry_hash(entry.url, entry.lastmod, entry.changefreq, entry.priority))
+    result.url_hash = combine_url_hashes(hashes)
 
 
 @dataclass
@@ -102,85 +363,256 @@ class CheckResult:
     success: bool
     urls: list[dict] = None  # type: ignore
     url_count: int = 0
+    # urls 的顺序无关指纹（见 url_hash），用于快速判断 URL 列表是否变化
+    url_hash: int = 0
     fetch_duration_ms: int = 0
     parse_duration_ms: int = 0
     error: str | None = None
+    retryable: bool = False
+    retry_after: float | None = None
+    # 所有文档均未变化（304），无需解析、比较和写入快照
+    not_modified: bool = False
+    # 本次检查后各文档的缓存状态（URL -> 状态）
+    documents: dict[str, DocumentState] = field(default_factory=dict)
 
     def __post_init__(self):
         if self.urls is None:
             self.urls = []
 
 
-async def check_sitemap(url: str) -> CheckResult:
+@dataclass
+class _CheckContext:
+    """单次检查在递归过程中共享的状态."""
+
+    previous: dict[str, DocumentState]
+    states: dict[str, DocumentState]
+    # 单次检查的全局在途请求上限
+    in_flight: asyncio.Semaphore
+
+
+async def check_sitemap(
+    url: str,
+    documents: dict[str, DocumentState] | None = None,
+) -> CheckResult:
     """
     检查 Sitemap 并返回 URL 列表.
 
-    支持 Sitemap Index（递归获取所有子 Sitemap）。
+    支持 Sitemap Index（并发获取所有子 Sitemap，按 Index 中的顺序合并结果）。
+    每个文档都以流式方式边下载边解析，不会整体缓存响应内容。
+    同一 URL 的获取结果在短时间内与其他检查共享（见 document_cache）。
+    传入上次检查的文档状态时使用条件请求并比较内容指纹，
+    未变化（304 或内容完全相同）的子 Sitemap 不解析，直接复用上次的 URL 列表；
+    Index 中 lastmod 与上次相同的子 Sitemap 直接复用上次的 URL 列表，不发送请求；
+    全部文档均未变化时结果的 not_modified 为 True。
 
     Args:
         url: Sitemap URL
+        documents: 上次检查记录的文档状态
 
     Returns:
         CheckResult 检查结果
     """
-    # 获取内容
-    fetch_result = await fetch_sitemap(url)
-    if not fetch_result.success:
-        return CheckResult(
-            success=False,
-            error=fetch_result.error,
-            fetch_duration_ms=fetch_result.duration_ms,
-        )
+    settings = get_settings()
+    ctx = _CheckContext(
+        previous=documents or {},
+        states={},
+        in_flight=asyncio.Semaphore(settings.sitemap_check_max_in_flight),
+    )
+    result = await _check_document(url, ctx, is_root=True)
+    result.documents = ctx.states
+    return result
+
+
+def _reuse_document(url: str, state: DocumentState, ctx: _CheckContext) -> CheckResult:
+    """复用上次检查的子 Sitemap URL 列表."""
+    ctx.states[url] = state
+    urls = list(state.load_urls() or [])
+    return CheckResult(
+        success=True,
+        urls=urls,
+        url_count=len(urls),
+        url_hash=hash_url_items(urls),
+        not_modified=True,
+    )
+
+
+def _reuse_stale_document(
+    url: str,
+    prev_state: DocumentState,
+    ctx: _CheckContext,
+    document: DocumentResult,
+) -> CheckResult | None:
+    """
+    子 Sitemap 临时失败时沿用上次的 URL 列表，避免误报为删除.
 
-    content = fetch_result.content
-    if not content:
+    连续失败超过 sitemap_child_stale_max_seconds 后不再沿用，返回 None。
+    """
+    settings = get_settings()
+    now = datetime.now(timezone.utc)
+    failed_since = prev_state.failed_since or now
+    if (now - failed_since).total_seconds() > settings.sitemap_child_stale_max_seconds:
+        logger.warning(
+            "Child sitemap failing for too long, dropping previous URLs",
+            url=url,
+            error=document.error,
+            failed_since=failed_since.isoformat(),
+        )
+        return None
+
+    logger.warning(
+        "Child sitemap failed, reusing previous URLs",
+        url=url,
+        error=document.error,
+        failed_since=failed_since.isoformat(),
+    )
+    result = _reuse_document(url, replace(prev_state, failed_since=failed_since), ctx)
+    result.not_modified = False
+    result.fetch_duration_ms = document.fetch_duration_ms
+    return result
+
+
+async def _check_document(
+    url: str,
+    ctx: _CheckContext,
+    is_root: bool = False,
+    index_lastmod: str | None = None,
+) -> CheckResult:
+    """检查单个 Sitemap 文档，并把新的文档状态写入 ctx.states."""
+    prev_state = ctx.previous.get(url)
+    validators = prev_state if prev_state and prev_state.has_validators else None
+
+    # 获取并解析内容（只在请求期间占用在途名额，避免嵌套 Index 互相等待）
+    async with ctx.in_flight:
+        document = await _fetch_document_shared(
+            url,
+            validators=validators,
+            content_hash=prev_state.content_hash if prev_state else None,
+        )
+    if not document.success:
+        # 非临时性失败（404、解析失败等）的子 Sitemap 不保留状态，其 URL 视为已删除
+        if prev_state is not None and (is_root or document.retryable):
+            if not is_root and prev_state.has_urls:
+                stale = _reuse_stale_document(url, prev_state, ctx, document)
+                if stale is not None:
+                    return stale
+            else:
+                # 保留旧状态，下次仍可发送条件请求
+                ctx.states[url] = prev_state
         return CheckResult(
             success=False,
-            error="内容为空",
-            fetch_duration_ms=fetch_result.duration_ms,
+            error=document.error,
+            retryable=document.retryable,
+            retry_after=document.retry_after,
+            fetch_duration_ms=document.fetch_duration_ms,
+            parse_duration_ms=document.parse_duration_ms,
         )
 
-    # 解析内容
-    parse_start = time.time()
-    try:
-        if is_sitemap_index(content):
-            # Sitemap Index：递归获取所有子 Sitemap
-            all_urls = []
-            total_fetch_duration = fetch_result.duration_ms
-
-            for entry in parse_sitemap_index(content):
-                sub_result = await check_sitemap(entry.loc)
-                if sub_result.success:
-                    all_urls.extend(sub_result.urls)
-                    total_fetch_duration += sub_result.fetch_duration_ms
-
-            parse_duration_ms = int((time.time() - parse_start) * 1000)
-            return CheckResult(
-                success=True,
-                urls=all_urls,
-                url_count=len(all_urls),
-                fetch_duration_ms=total_fetch_duration,
-                parse_duration_ms=parse_duration_ms,
-            )
-        else:
-            # 普通 Sitemap
-            urls = [url_entry.to_dict() for url_entry in parse_sitemap(content)]
-            parse_duration_ms = int((time.time() - parse_start) * 1000)
-
+    if document.not_modified:
+        # 304 或内容指纹相同
+        if prev_state is None:
             return CheckResult(
-                success=True,
-                urls=urls,
-                url_count=len(urls),
-                fetch_duration_ms=fetch_result.duration_ms,
-                parse_duration_ms=parse_duration_ms,
+                success=False,
+                error="内容为空",
+                fetch_duration_ms=document.fetch_duration_ms,
             )
-
-    except Exception as e:
-        parse_duration_ms = int((time.time() - parse_start) * 1000)
-        logger.error("Sitemap parse error", url=url, error=str(e))
-        return CheckResult(
-            success=False,
-            error=f"解析失败: {str(e)}",
-            fetch_duration_ms=fetch_result.duration_ms,
-            parse_duration_ms=parse_duration_ms,
+        state = replace(
+            prev_state,
+            etag=document.etag,
+            last_modified=document.last_modified,
+            content_hash=document.content_hash or prev_state.content_hash,
+            index_lastmod=index_lastmod,
+            failed_since=None,
         )
+        if state.children is not None:
+            # Index 本身未变化，但子 Sitemap 仍需逐个检查
+            return await _check_index(url, state, ctx, document, index_modified=False)
+        result = _reuse_document(url, state, ctx)
+        result.fetch_duration_ms = document.fetch_duration_ms
+        return result
+
+    if document.is_index:
+        # Sitemap Index：获取所有子 Sitemap
+        state = DocumentState(
+            etag=document.etag,
+            last_modified=document.last_modified,
+            children=document.children,
+            content_hash=document.content_hash,
+            index_lastmod=index_lastmod,
+        )
+        return await _check_index(url, state, ctx, document, index_modified=True)
+
+    # 普通 Sitemap
+    ctx.states[url] = DocumentState(
+        etag=document.etag,
+        last_modified=document.last_modified,
+        # 根 Sitemap 的 URL 列表已保存在快照中
+        urls=None if is_root else document.urls,
+        index_lastmod=index_lastmod,
+        content_hash=document.content_hash,
+    )
+    return CheckResult(
+        success=True,
+        urls=document.urls,
+        url_count=len(document.urls),
+        url_hash=document.url_hash,
+        fetch_duration_ms=document.fetch_duration_ms,
+        parse_duration_ms=document.parse_duration_ms,
+    )
+
+
+async def _check_index(
+    url: str,
+    state: DocumentState,
+    ctx: _CheckContext,
+    document: DocumentResult,
+    index_modified: bool,
+) -> CheckResult:
+    """并发检查 Sitemap Index 的所有子 Sitemap，并按 Index 中的顺序合并结果."""
+    settings = get_settings()
+    ctx.states[url] = state
+    semaphore = asyncio.Semaphore(settings.sitemap_index_concurrency)
+
+    async def check_child(child: dict[str, Any]) -> CheckResult:
+        loc, lastmod = child["loc"], child.get("lastmod")
+        prev_state = ctx.previous.get(loc)
+        if (
+            settings.sitemap_trust_index_lastmod
+            and lastmod
+            and prev_state is not None
+            and prev_state.has_urls
+            and prev_state.failed_since is None
+            and prev_state.index_lastmod == lastmod
+        ):
+            # Index 中的 lastmod 未变化，跳过请求
+            return _reuse_document(loc, prev_state, ctx)
+        async with semaphore:
+            return await _check_document(loc, ctx, index_lastmod=lastmod)
+
+    # gather 按传入顺序返回结果，合并顺序与 Index 一致
+    sub_results = await asyncio.gather(
+        *(check_child(child) for child in state.children or [])
+    )
+
+    all_urls = []
+    url_hashes = []
+    total_fetch_duration = document.fetch_duration_ms
+    total_parse_duration = document.parse_duration_ms
+    not_modified = not index_modified
+
+    for sub_result in sub_results:
+        if sub_result.success:
+            all_urls.extend(sub_result.urls)
+            url_hashes.append(sub_result.url_hash)
+            total_fetch_duration += sub_result.fetch_duration_ms
+            total_parse_duration += sub_result.parse_duration_ms
+        not_modified = not_modified and sub_result.success and sub_result.not_modified
+
+    return CheckResult(
+        success=True,
+        urls=all_urls,
+        url_count=len(all_urls),
+        url_hash=combine_url_hashes(url_hashes),
+        fetch_duration_ms=total_fetch_duration,
+        parse_duration_ms=total_parse_duration,
+        not_modified=not_modified,
+    )
@@ -1,5 +1,6 @@
 """变更比对器."""
 
+from collections.abc import Callable, Mapping
 from dataclasses import dataclass, field
 from typing import Any
 
@@ -86,3 +87,54 @@ def compare_snapshots(
         removed=removed,
         modified=modified,
     )
+
+
+def compare_entries(
+    old_entries: Mapping[int, tuple],
+    new_entries: Mapping[int, tuple],
+    to_item: Callable[[int, tuple], dict[str, Any]],
+) -> ChangeResult:
+    """
+    比较两个快照的 URL ID -> 字段映射.
+
+    与 compare_snapshots 的判断标准和结果格式相同，
+    但按整数 ID 比较，只把变化的条目还原为 URL。
+
+    Args:
+        old_entries: 旧的 URL ID -> (lastmod, changefreq, priority)
+        new_entries: 新的 URL ID -> (lastmod, changefreq, priority)
+        to_item: 把 (URL ID, 字段) 还原为 URL 条目
+
+    Returns:
+        ChangeResult 变更结果
+    """
+    # 新增的 URL
+    added = [
+        to_item(url_id, new_entries[url_id])
+        for url_id in new_entries.keys() - old_entries.keys()
+    ]
+
+    # 删除的 URL
+    removed = [
+        to_item(url_id, old_entries[url_id])
+        for url_id in old_entries.keys() - new_entries.keys()
+    ]
+
+    # 修改的 URL（交集中 lastmod 不同的）
+    modified = []
+    for url_id in old_entries.keys() & new_entries.keys():
+        old_lastmod = old_entries[url_id][0]
+        new_lastmod = new_entries[url_id][0]
+        if old_lastmod != new_lastmod:
+            modified.append({
+                "url": to_item(url_id, new_entries[url_id])["url"],
+                "old_lastmod": old_lastmod,
+                "new_lastmod": new_lastmod,
+            })
+
+    return ChangeResult(
+        has_changes=bool(added or removed or modified),
+        added=added,
+        removed=removed,
+        modified=modified,
+    )
@@ -0,0 +1,141 @@
+"""Sitemap 文档共享缓存.
+
+不同监控任务经常监控同一个 Sitemap（或 Index 下相同的子 Sitemap）。
+本模块按规范化 URL 合并同时发生的请求（同一时刻只有一个请求在途，
+其余调用方等待并共享其结果），并把获取结果缓存一小段时间，
+供时间窗口内的其他检查直接复用。缓存保存在进程内，
+按缓存结果的 URL 条目总数限制内存占用，写入时清除过期结果。
+"""
+
+import asyncio
+import time
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable
+from typing import Any
+from urllib.parse import urlsplit, urlunsplit
+from weakref import WeakKeyDictionary
+
+from sitemap_monitor.config import get_settings
+
+_DEFAULT_PORTS = {"http": 80, "https": 443}
+
+# URL -> (写入时间, 大小, 结果)，按最近使用排序
+_cache: "OrderedDict[str, tuple[float, int, Any]]" = OrderedDict()
+# 缓存结果的大小之和
+_cache_size = 0
+# 在途请求按事件循环分别维护（Future 绑定在创建它的事件循环上）
+_inflight: "WeakKeyDictionary[asyncio.AbstractEventLoop, dict[str, asyncio.Future]]" = (
+    WeakKeyDictionary()
+)
+
+
+def normalize_url(url: str) -> str:
+    """
+    规范化 URL 作为缓存键.
+
+    协议和主机名转为小写，去掉默认端口和片段，空路径补为 /。
+    """
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    netloc = parts.netloc.lower()
+    if parts.port is not None and _DEFAULT_PORTS.get(scheme) == parts.port:
+        netloc = netloc.rsplit(":", 1)[0]
+    return urlunsplit((scheme, netloc, parts.path or "/", parts.query, ""))
+
+
+def get_cached(key: str) -> Any | None:
+    """获取未过期的缓存结果."""
+    entry = _cache.get(key)
+    if entry is None:
+        return None
+    stored_at, _, value = entry
+    if time.monotonic() - stored_at > get_settings().sitemap_shared_cache_ttl:
+        _evict(key)
+        return None
+    _cache.move_to_end(key)
+    return value
+
+
+def put_cached(key: str, value: Any, size: int) -> None:
+    """
+    写入缓存.
+
+    写入前清除所有过期结果；大小超过单个文档上限的结果不缓存
+    （仍会与并发请求共享），总大小超过上限时淘汰最久未使用的结果。
+
+    Args:
+        key: 规范化 URL
+        value: 获取结果
+        size: 结果大小（URL 条目数）
+    """
+    global _cache_size
+    settings = get_settings()
+    if settings.sitemap_shared_cache_ttl <= 0:
+        return
+    _purge_expired(settings.sitemap_shared_cache_ttl)
+    if key in _cache:
+        _evict(key)
+    if size > settings.sitemap_shared_cache_max_document_urls:
+        return
+
+    _cache[key] = (time.monotonic(), size, value)
+    _cache_size += size
+    while _cache_size > settings.sitemap_shared_cache_max_urls:
+        _evict(next(iter(_cache)))
+
+
+def _evict(key: str) -> None:
+    global _cache_size
+    _, size, _ = _cache.pop(key)
+    _cache_size -= size
+
+
+def _purge_expired(ttl: float) -> None:
+    now = time.monotonic()
+    expired = [key for key, (stored_at, _, _) in _cache.items() if now - stored_at > ttl]
+    for key in expired:
+        _evict(key)
+
+
+def clear_document_cache() -> None:
+    """清空缓存."""
+    global _cache_size
+    _cache.clear()
+    _cache_size = 0
+
+
+async def coalesce(key: str, fetch: Callable[[], Awaitable[Any]]) -> tuple[Any | None, bool]:
+    """
+    合并同一 URL 的并发请求.
+
+    没有在途请求时执行 fetch 并把结果分享给等待者；
+    已有在途请求时等待其结果。fetch 抛出的异常同样传给所有等待者；
+    在途请求被取消时等待者得到 None，需自行请求。
+
+    Returns:
+        (结果, 是否来自其他调用方的请求)
+    """
+    loop = asyncio.get_running_loop()
+    inflight = _inflight.setdefault(loop, {})
+    future = inflight.get(key)
+    if future is not None:
+        return await asyncio.shield(future), True
+
+    future = loop.create_future()
+    inflight[key] = future
+    value = None
+    error: Exception | None = None
+    try:
+        value = await fetch()
+        return value, False
+    except Exception as exc:
+        error = exc
+        raise
+    finally:
+        inflight.pop(key, None)
+        if error is not None:
+            future.set_exception(error)
+            # 标记为已读取，没有等待者时不产生未处理异常的告警
+            future.exception()
+        else:
+            future.set_result(value)
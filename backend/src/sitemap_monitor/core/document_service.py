@@ -0,0 +1,90 @@
+"""Sitemap 文档状态服务."""
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from sitemap_monitor.core.checker import DocumentState
+from sitemap_monitor.core.snapshot_codec import encode_snapshot_urls
+from sitemap_monitor.models import SitemapDocument, SitemapSnapshot
+
+
+async def load_document_states(
+    db: AsyncSession, monitor_task_id: str
+) -> dict[str, DocumentState]:
+    """
+    加载监控任务的文档状态.
+
+    监控任务还没有快照时返回空字典，强制完整获取一次，
+    避免根 Sitemap 返回 304 时没有可比较的基准。
+    """
+    result = await db.execute(
+        select(SitemapSnapshot.id)
+        .where(SitemapSnapshot.monitor_task_id == monitor_task_id)
+        .limit(1)
+    )
+    if result.scalar_one_or_none() is None:
+        return {}
+
+    result = await db.execute(
+        select(SitemapDocument).where(SitemapDocument.monitor_task_id == monitor_task_id)
+    )
+    return {
+        document.url: DocumentState(
+            etag=document.etag,
+            last_modified=document.last_modified,
+            children=document.children,
+            urls_blob=document.urls_blob,
+            index_lastmod=document.index_lastmod,
+            content_hash=document.content_hash,
+            failed_since=document.failed_since,
+        )
+        for document in result.scalars().all()
+    }
+
+
+async def save_document_states(
+    db: AsyncSession,
+    monitor_task_id: str,
+    states: dict[str, DocumentState],
+) -> None:
+    """
+    保存文档状态（新增、更新，并删除本次未出现的文档）.
+
+    只写入有变化的字段；复用的 URL 列表沿用加载时的编码，不重新编码。
+    """
+    result = await db.execute(
+        select(SitemapDocument).where(SitemapDocument.monitor_task_id == monitor_task_id)
+    )
+    existing = {document.url: document for document in result.scalars().all()}
+
+    for url, document in existing.items():
+        if url not in states:
+            await db.delete(document)
+
+    for url, state in states.items():
+        document = existing.get(url)
+        if document is None:
+            document = SitemapDocument(monitor_task_id=monitor_task_id, url=url)
+            db.add(document)
+        values = {
+            "etag": state.etag,
+            "last_modified": state.last_modified,
+            "children": state.children,
+            "urls_blob": _encode_urls(state),
+            "index_lastmod": state.index_lastmod,
+            "content_hash": state.content_hash,
+            "failed_since": state.failed_since,
+        }
+        for name, value in values.items():
+            if getattr(document, name) != value:
+                setattr(document, name, value)
+
+    await db.flush()
+
+
+def _encode_urls(state: DocumentState) -> bytes | None:
+    if state.urls_blob is not None:
+        return state.urls_blob
+    if state.urls is None:
+        return None
+    return encode_snapshot_urls(state.urls)
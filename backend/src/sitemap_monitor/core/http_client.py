@@ -0,0 +1,93 @@
+"""共享 HTTP 客户端.
+
+每个事件循环持有一个长连接的 httpx.AsyncClient，
+Sitemap 检查、URL 验证和 Webhook 通知复用同一个连接池，
+对同一主机的重复请求可以直接使用已建立的 keep-alive 连接。
+"""
+
+import asyncio
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from weakref import WeakKeyDictionary
+
+import httpx
+
+from sitemap_monitor.config import get_settings
+from sitemap_monitor.core.rate_limiter import get_host_limiter, reset_host_limiters
+from sitemap_monitor.logging import get_logger
+
+logger = get_logger(__name__)
+
+# httpx 的连接绑定在创建它的事件循环上，因此按事件循环分别维护
+_clients: "WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = WeakKeyDictionary()
+
+
+def _create_client() -> httpx.AsyncClient:
+    """创建新的 HTTP 客户端."""
+    settings = get_settings()
+    return httpx.AsyncClient(
+        timeout=settings.sitemap_request_timeout,
+        follow_redirects=True,
+        http2=True,
+        limits=httpx.Limits(
+            max_connections=settings.http_max_connections,
+            max_keepalive_connections=settings.http_max_keepalive_connections,
+            keepalive_expiry=settings.http_keepalive_expiry,
+        ),
+    )
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """
+    获取当前事件循环的共享 HTTP 客户端.
+
+    首次调用时创建，之后在同一事件循环内复用。
+
+    Returns:
+        httpx.AsyncClient 实例
+    """
+    loop = asyncio.get_running_loop()
+    client = _clients.get(loop)
+    if client is None or client.is_closed:
+        _drop_closed_loops()
+        client = _create_client()
+        _clients[loop] = client
+    return client
+
+
+def _drop_closed_loops() -> None:
+    """
+    丢弃已关闭事件循环的客户端.
+
+    客户端的连接会引用所属事件循环，弱引用字典无法自行回收这些条目；
+    事件循环已关闭时无法再 aclose，只能直接丢弃。
+    """
+    for loop in [loop for loop in list(_clients.keys()) if loop.is_closed()]:
+        _clients.pop(loop, None)
+        logger.debug("Dropped HTTP client of closed event loop")
+
+
+@asynccontextmanager
+async def host_slot(url: str) -> AsyncIterator[None]:
+    """
+    占用目标主机的一个请求名额.
+
+    限制同一主机的并发请求数和请求速率（见 rate_limiter），
+    避免大型 Sitemap Index 或同域名的大量监控任务压垮源站。
+    主机处于 Retry-After 暂停期时等待，剩余时间过长则抛出 HostBlockedError。
+
+    Args:
+        url: 请求 URL
+    """
+    async with get_host_limiter(url).slot():
+        yield
+
+
+async def close_http_client() -> None:
+    """关闭当前事件循环的共享 HTTP 客户端（关闭钩子）."""
+    loop = asyncio.get_running_loop()
+    reset_host_limiters()
+    client = _clients.pop(loop, None)
+    if client is not None and not client.is_closed:
+        await client.aclose()
+        logger.debug("Shared HTTP client closed")
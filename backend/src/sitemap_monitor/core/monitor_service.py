@@ -1,12 +1,261 @@
 """监控任务服务."""
 
-from datetime import datetime, timezone
+import hashlib
+import math
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
 
-from sqlalchemy import select
+from sqlalchemy import func, or_, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from sitemap_monitor.api.exceptions import ConflictError, NotFoundError, ForbiddenError
-from sitemap_monitor.models import MonitorTask, MonitorStatus
+from sitemap_monitor.api.exceptions import (
+    BadRequestError,
+    ConflictError,
+    NotFoundError,
+    ForbiddenError,
+)
+from sitemap_monitor.config import get_settings
+from sitemap_monitor.models import ChangeRecord, ChangeType, MonitorTask, MonitorStatus
+
+
+def check_phase_seconds(monitor_id: str, interval_seconds: int) -> int:
+    """
+    计算监控任务在检查周期内的固定相位（秒）.
+
+    由任务 ID 的哈希决定，同一任务始终相同，不同任务均匀分布在整个周期内。
+    """
+    digest = hashlib.blake2b(monitor_id.encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "big") % interval_seconds
+
+
+def schedule_next_check(monitor: MonitorTask) -> None:
+    """
+    根据上次检查时间和检查间隔更新下次检查时间.
+
+    下次检查时间对齐到任务自己的时间槽（epoch + 相位 + k * 间隔），
+    间隔相同、创建时间相近的任务因相位不同而错开，不会集中在同一时刻到期。
+    取距上次检查至少半个间隔之后的第一个时间槽，
+    因此按时间槽执行的任务检查间隔保持不变。
+    从未检查过的任务立即到期。
+    """
+    if monitor.last_check_at is None or monitor.id is None:
+        monitor.next_check_at = datetime.now(timezone.utc)
+        return
+
+    interval = monitor.current_interval_minutes * 60
+    phase = check_phase_seconds(monitor.id, interval)
+    earliest = monitor.last_check_at.timestamp() + interval / 2
+    slot = math.ceil((earliest - phase) / interval) * interval + phase
+    monitor.next_check_at = datetime.fromtimestamp(slot, timezone.utc)
+
+
+def _interval_bounds(monitor: MonitorTask) -> tuple[int, int]:
+    """自适应间隔的上下限（分钟）."""
+    settings = get_settings()
+    lower = monitor.min_interval_minutes or settings.adaptive_min_interval_minutes
+    upper = monitor.max_interval_minutes or settings.adaptive_max_interval_minutes
+    return lower, max(lower, upper)
+
+
+def _reset_effective_interval(monitor: MonitorTask) -> None:
+    """以设定的检查间隔（限制在上下限内）作为自适应的起点."""
+    if not monitor.adaptive_interval:
+        monitor.effective_interval_minutes = None
+        return
+    lower, upper = _interval_bounds(monitor)
+    monitor.effective_interval_minutes = min(max(monitor.check_interval_minutes, lower), upper)
+
+
+def _validate_interval_bounds(
+    min_interval_minutes: int | None, max_interval_minutes: int | None
+) -> None:
+    if (
+        min_interval_minutes is not None
+        and max_interval_minutes is not None
+        and min_interval_minutes > max_interval_minutes
+    ):
+        raise BadRequestError("最小检查间隔不能大于最大检查间隔")
+
+
+async def adapt_check_interval(
+    db: AsyncSession, monitor: MonitorTask, changed: bool
+) -> MonitorTask:
+    """
+    根据检查结果调整自适应检查间隔.
+
+    未变化时按 adaptive_backoff_factor 指数放大间隔；
+    有变化时间隔减半，且不超过最近几次变更之间间隔中位数的一半，
+    使检查频率跟上实际变更频率。结果限制在上下限之内。
+    未开启自适应的监控任务不做调整。
+    """
+    if not monitor.adaptive_interval:
+        return monitor
+
+    settings = get_settings()
+    current = monitor.current_interval_minutes
+    if changed:
+        target = current / 2
+        result = await db.execute(
+            select(ChangeRecord.created_at)
+            .where(
+                ChangeRecord.monitor_task_id == monitor.id,
+                ChangeRecord.change_type == ChangeType.CHANGED.value,
+            )
+            .order_by(ChangeRecord.created_at.desc())
+            .limit(settings.adaptive_history_size + 1)
+        )
+        times = result.scalars().all()
+        gaps = sorted(
+            (newer - older).total_seconds() / 60 for newer, older in zip(times, times[1:])
+        )
+        if gaps:
+            target = min(target, gaps[len(gaps) // 2] / 2)
+    else:
+        target = current * settings.adaptive_backoff_factor
+
+    lower, upper = _interval_bounds(monitor)
+    monitor.effective_interval_minutes = min(max(round(target), lower), upper)
+    return monitor
+
+
+@dataclass
+class DueMonitor:
+    """领取到的到期监控任务."""
+
+    id: str
+    next_check_at: datetime
+    last_url_count: int | None = None
+    last_check_duration_ms: int | None = None
+
+    @property
+    def is_heavy(self) -> bool:
+        """上次检查的 URL 数或耗时超过阈值（由 heavy 队列处理）."""
+        settings = get_settings()
+        return (self.last_url_count or 0) >= settings.heavy_check_url_threshold or (
+            self.last_check_duration_ms or 0
+        ) >= settings.heavy_check_duration_ms
+
+
+def _is_heavy():
+    """与 DueMonitor.is_heavy 相同的 SQL 条件."""
+    settings = get_settings()
+    return or_(
+        func.coalesce(MonitorTask.last_url_count, 0) >= settings.heavy_check_url_threshold,
+        func.coalesce(MonitorTask.last_check_duration_ms, 0) >= settings.heavy_check_duration_ms,
+    )
+
+
+def _lease_available(now: datetime):
+    """检查租约未被占用或已过期."""
+    return or_(MonitorTask.checking_until.is_(None), MonitorTask.checking_until < now)
+
+
+async def claim_due_monitors(
+    db: AsyncSession,
+    limit: int,
+    lookahead_seconds: float = 0,
+    heavy: bool | None = None,
+) -> list[DueMonitor]:
+    """
+    领取到期且未在检查中的监控任务.
+
+    在一条 UPDATE 中为到期任务加上检查租约并返回其 ID、下次检查时间和上次检查规模，
+    多个调度器并发执行时通过 SKIP LOCKED 互不重复领取。
+
+    Args:
+        limit: 最多领取数量
+        lookahead_seconds: 同时领取在此时间内即将到期的任务（由调用方延时派发）
+        heavy: True 只领取 heavy 任务，False 只领取普通任务，None 不区分
+
+    Returns:
+        DueMonitor 列表
+    """
+    now = datetime.now(timezone.utc)
+    conditions = [
+        MonitorTask.status == MonitorStatus.ACTIVE.value,
+        MonitorTask.next_check_at <= now + timedelta(seconds=lookahead_seconds),
+        _lease_available(now),
+    ]
+    if heavy is not None:
+        conditions.append(_is_heavy() if heavy else ~_is_heavy())
+    due = (
+        select(MonitorTask.id)
+        .where(*conditions)
+        .order_by(MonitorTask.next_check_at)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+    )
+    result = await db.execute(
+        update(MonitorTask)
+        .where(MonitorTask.id.in_(due))
+        .values(
+            checking_until=now
+            + timedelta(seconds=lookahead_seconds + get_settings().check_lease_seconds)
+        )
+        .returning(
+            MonitorTask.id,
+            MonitorTask.next_check_at,
+            MonitorTask.last_url_count,
+            MonitorTask.last_check_duration_ms,
+        )
+        .execution_options(synchronize_session=False)
+    )
+    return [
+        DueMonitor(
+            id=row.id,
+            next_check_at=row.next_check_at,
+            last_url_count=row.last_url_count,
+            last_check_duration_ms=row.last_check_duration_ms,
+        )
+        for row in result.all()
+    ]
+
+
+async def claim_monitor_check(db: AsyncSession, monitor: MonitorTask) -> bool:
+    """
+    为单个监控任务加检查租约（手动触发检查时使用）.
+
+    Returns:
+        True 如果领取成功；任务已在检查中时返回 False
+    """
+    now = datetime.now(timezone.utc)
+    checking_until = now + timedelta(seconds=get_settings().check_lease_seconds)
+    result = await db.execute(
+        update(MonitorTask)
+        .where(MonitorTask.id == monitor.id, _lease_available(now))
+        .values(checking_until=checking_until)
+        .returning(MonitorTask.id)
+        .execution_options(synchronize_session=False)
+    )
+    if result.scalar_one_or_none() is None:
+        return False
+    monitor.checking_until = checking_until
+    return True
+
+
+async def request_monitor_check(db: AsyncSession, monitor: MonitorTask) -> bool:
+    """
+    请求立即检查监控任务.
+
+    celery 模式下领取检查租约，由调用方随后派发 Celery 任务；
+    asyncio 模式下把下次检查时间提前到现在，由 sitemap-monitor worker 领取。
+
+    Returns:
+        True 如果请求成功；任务已在检查中时返回 False
+    """
+    if get_settings().check_worker_mode == "celery":
+        return await claim_monitor_check(db, monitor)
+
+    now = datetime.now(timezone.utc)
+    if monitor.checking_until is not None and monitor.checking_until > now:
+        return False
+    monitor.next_check_at = now
+    return True
+
+
+def release_monitor_check(monitor: MonitorTask) -> None:
+    """释放检查租约."""
+    monitor.checking_until = None
 
 
 async def create_monitor(
@@ -15,8 +264,12 @@ async def create_monitor(
     name: str,
     sitemap_url: str,
     check_interval_minutes: int = 60,
+    adaptive_interval: bool = False,
+    min_interval_minutes: int | None = None,
+    max_interval_minutes: int | None = None,
 ) -> MonitorTask:
     """创建监控任务."""
+    _validate_interval_bounds(min_interval_minutes, max_interval_minutes)
     # 检查是否已存在相同 URL 的监控
     result = await db.execute(
         select(MonitorTask).where(
@@ -32,8 +285,13 @@ async def create_monitor(
         name=name,
         sitemap_url=sitemap_url,
         check_interval_minutes=check_interval_minutes,
+        adaptive_interval=adaptive_interval,
+        min_interval_minutes=min_interval_minutes,
+        max_interval_minutes=max_interval_minutes,
         status=MonitorStatus.ACTIVE.value,
     )
+    _reset_effective_interval(monitor)
+    schedule_next_check(monitor)
     db.add(monitor)
     await db.flush()
     return monitor
@@ -86,8 +344,15 @@ async def update_monitor(
     name: str | None = None,
     sitemap_url: str | None = None,
     check_interval_minutes: int | None = None,
+    adaptive_interval: bool | None = None,
+    min_interval_minutes: int | None = None,
+    max_interval_minutes: int | None = None,
 ) -> MonitorTask:
     """更新监控任务."""
+    _validate_interval_bounds(
+        min_interval_minutes if min_interval_minutes is not None else monitor.min_interval_minutes,
+        max_interval_minutes if max_interval_minutes is not None else monitor.max_interval_minutes,
+    )
     if name is not None:
         monitor.name = name
     if sitemap_url is not None:
@@ -103,8 +368,22 @@ async def update_monitor(
             if result.scalar_one_or_none():
                 raise ConflictError("该 Sitemap URL 已在监控中")
         monitor.sitemap_url = sitemap_url
+    interval_changed = False
     if check_interval_minutes is not None:
         monitor.check_interval_minutes = check_interval_minutes
+        interval_changed = True
+    if adaptive_interval is not None:
+        interval_changed = interval_changed or adaptive_interval != monitor.adaptive_interval
+        monitor.adaptive_interval = adaptive_interval
+    if min_interval_minutes is not None:
+        monitor.min_interval_minutes = min_interval_minutes
+        interval_changed = True
+    if max_interval_minutes is not None:
+        monitor.max_interval_minutes = max_interval_minutes
+        interval_changed = True
+    if interval_changed:
+        _reset_effective_interval(monitor)
+        schedule_next_check(monitor)
 
     return monitor
 
@@ -125,6 +404,7 @@ async def resume_monitor(db: AsyncSession, monitor: MonitorTask) -> MonitorTask:
     monitor.status = MonitorStatus.ACTIVE.value
     monitor.error_count = 0
     monitor.last_error = None
+    schedule_next_check(monitor)
     return monitor
 
 
@@ -134,8 +414,10 @@ async def mark_monitor_checked(
     success: bool = True,
     error: str | None = None,
 ) -> MonitorTask:
-    """标记监控任务已检查."""
+    """标记监控任务已检查（并释放检查租约）."""
     monitor.last_check_at = datetime.now(timezone.utc)
+    schedule_next_check(monitor)
+    release_monitor_check(monitor)
 
     if success:
         monitor.error_count = 0
@@ -150,6 +432,38 @@ async def mark_monitor_checked(
     return monitor
 
 
+def record_check_size(monitor: MonitorTask, url_count: int, duration_ms: int) -> None:
+    """记录最近一次完整检查的规模（URL 数和获取+解析耗时）."""
+    monitor.last_url_count = url_count
+    monitor.last_check_duration_ms = duration_ms
+
+
+async def mark_monitor_retrying(
+    db: AsyncSession,
+    monitor: MonitorTask,
+    error: str | None = None,
+    retry_in: float = 0,
+) -> MonitorTask:
+    """
+    标记监控任务检查失败、等待重试.
+
+    记录错误信息并更新检查时间，把检查租约延长到重试执行之后，
+    避免调度器在重试排队期间重复派发；
+    不计入连续失败次数，最终结果由重试后的检查决定。
+
+    Args:
+        retry_in: 距离重试执行的秒数
+    """
+    now = datetime.now(timezone.utc)
+    monitor.last_check_at = now
+    monitor.last_error = error
+    schedule_next_check(monitor)
+    monitor.checking_until = now + timedelta(
+        seconds=retry_in + get_settings().check_lease_seconds
+    )
+    return monitor
+
+
 async def count_monitors(
     db: AsyncSession, user_id: str, status: MonitorStatus | None = None
 ) -> int:
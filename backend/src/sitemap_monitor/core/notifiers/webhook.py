@@ -2,7 +2,7 @@
 
 import httpx
 
-from sitemap_monitor.config import get_settings
+from sitemap_monitor.core.http_client import get_http_client
 from sitemap_monitor.logging import get_logger
 from sitemap_monitor.models import ChangeRecord, MonitorTask, NotificationChannel
 
@@ -25,7 +25,6 @@ async def send_webhook_notification(
     Returns:
         (是否成功, 错误信息, HTTP 状态码)
     """
-    settings = get_settings()
     config = channel.config
 
     webhook_url = config.get("url")
@@ -54,38 +53,40 @@ async def send_webhook_notification(
         "details": change_record.changes,
     }
 
+    client = get_http_client()
+    request_options = {"timeout": 30, "follow_redirects": False}
+
     try:
-        async with httpx.AsyncClient(timeout=30) as client:
-            if method == "POST":
-                response = await client.post(
-                    webhook_url, json=payload, headers=headers
-                )
-            elif method == "PUT":
-                response = await client.put(
-                    webhook_url, json=payload, headers=headers
-                )
-            else:
-                return False, f"不支持的 HTTP 方法: {method}", None
+        if method == "POST":
+            response = await client.post(
+                webhook_url, json=payload, headers=headers, **request_options
+            )
+        elif method == "PUT":
+            response = await client.put(
+                webhook_url, json=payload, headers=headers, **request_options
+            )
+        else:
+            return False, f"不支持的 HTTP 方法: {method}", None
 
-            status_code = response.status_code
+        status_code = response.status_code
 
-            if 200 <= status_code < 300:
-                logger.info(
-                    "Webhook notification sent",
-                    url=webhook_url,
-                    status_code=status_code,
-                    monitor_id=monitor.id,
-                )
-                return True, None, status_code
-            else:
-                error_msg = f"HTTP {status_code}: {response.text[:200]}"
-                logger.warning(
-                    "Webhook notification failed",
-                    url=webhook_url,
-                    status_code=status_code,
-                    error=error_msg,
-                )
-                return False, error_msg, status_code
+        if 200 <= status_code < 300:
+            logger.info(
+                "Webhook notification sent",
+                url=webhook_url,
+                status_code=status_code,
+                monitor_id=monitor.id,
+            )
+            return True, None, status_code
+        else:
+            error_msg = f"HTTP {status_code}: {response.text[:200]}"
+            logger.warning(
+                "Webhook notification failed",
+                url=webhook_url,
+                status_code=status_code,
+                error=error_msg,
+            )
+            return False, error_msg, status_code
 
     except httpx.TimeoutException:
         logger.error("Webhook notification timeout", url=webhook_url)
@@ -0,0 +1,223 @@
+"""按主机的出站请求限流.
+
+每个主机一个令牌桶（平均速率 + 突发量）和并发上限，
+并记录服务器通过 Retry-After 要求的暂停时间。
+限流状态保存在进程内，按事件循环分别维护（与共享 HTTP 客户端一致）；
+主机数量超过上限时按最近使用顺序淘汰空闲的限流器。
+"""
+
+import asyncio
+import time
+from collections import OrderedDict
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlparse
+from weakref import WeakKeyDictionary
+
+from sitemap_monitor.config import get_settings
+from sitemap_monitor.logging import get_logger
+
+logger = get_logger(__name__)
+
+_limiters: "WeakKeyDictionary[asyncio.AbstractEventLoop, OrderedDict[str, HostRateLimiter]]" = (
+    WeakKeyDictionary()
+)
+
+
+class HostBlockedError(Exception):
+    """主机处于 Retry-After 暂停期，且剩余时间超过允许的等待上限."""
+
+    def __init__(self, host: str, retry_after: float):
+        self.host = host
+        self.retry_after = retry_after
+        super().__init__(f"主机 {host} 暂停请求，{int(retry_after)} 秒后重试")
+
+
+class HostRateLimiter:
+    """
+    单个主机的限流器.
+
+    令牌按 rate（次/秒）匀速补充，最多积累 burst 个；
+    每个请求消耗一个令牌，同时占用一个并发名额。
+    rate <= 0 时只限制并发。
+    """
+
+    def __init__(
+        self,
+        host: str,
+        rate: float,
+        burst: int,
+        max_concurrency: int,
+        max_wait: float,
+    ):
+        self.host = host
+        self.rate = rate
+        self.burst = max(burst, 1)
+        self.max_wait = max_wait
+        # Retry-After 要求的暂停截止时间（monotonic）
+        self.blocked_until = 0.0
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        # 按到达顺序分配令牌
+        self._lock = asyncio.Lock()
+        # 正在排队或占用名额的请求数
+        self._active = 0
+
+    def defer(self, seconds: float) -> None:
+        """在接下来的 seconds 秒内暂停向该主机发送请求."""
+        until = time.monotonic() + seconds
+        if until > self.blocked_until:
+            self.blocked_until = until
+            logger.warning("Host rate limited", host=self.host, retry_after=seconds)
+
+    def is_idle(self, now: float) -> bool:
+        """
+        是否可以丢弃而不改变限流行为.
+
+        没有进行中的请求、不在暂停期且令牌已补满时，
+        丢弃后重新创建的限流器与原来的状态完全相同。
+        """
+        if self._active or self.blocked_until > now:
+            return False
+        if self.rate <= 0:
+            return True
+        return self._tokens + (now - self._updated) * self.rate >= self.burst
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def _acquire_token(self) -> None:
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                blocked = self.blocked_until - now
+                if blocked > 0:
+                    if blocked > self.max_wait:
+                        raise HostBlockedError(self.host, blocked)
+                    await asyncio.sleep(blocked)
+                    continue
+                if self.rate <= 0:
+                    return
+                self._refill(now)
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        """占用一个并发名额和一个令牌."""
+        self._active += 1
+        try:
+            async with self._semaphore:
+                await self._acquire_token()
+                yield
+        finally:
+            self._active -= 1
+
+
+def get_host_limiter(url: str) -> HostRateLimiter:
+    """
+    获取 URL 所属主机的限流器.
+
+    Args:
+        url: 请求 URL
+
+    Returns:
+        当前事件循环中该主机的 HostRateLimiter
+    """
+    loop = asyncio.get_running_loop()
+    limiters = _limiters.get(loop)
+    if limiters is None:
+        _drop_closed_loops()
+        limiters = _limiters[loop] = OrderedDict()
+    host = urlparse(url).netloc.lower()
+    limiter = limiters.get(host)
+    if limiter is not None:
+        limiters.move_to_end(host)
+        return limiter
+
+    settings = get_settings()
+    _evict_idle(limiters, settings.http_host_limiter_max_hosts - 1)
+    limiter = HostRateLimiter(
+        host,
+        rate=settings.http_host_rate_limit,
+        burst=settings.http_host_burst,
+        max_concurrency=settings.http_max_connections_per_host,
+        max_wait=settings.http_host_max_wait,
+    )
+    limiters[host] = limiter
+    return limiter
+
+
+def _evict_idle(limiters: "OrderedDict[str, HostRateLimiter]", max_hosts: int) -> None:
+    """从最久未用的一端淘汰空闲限流器，直到数量不超过 max_hosts."""
+    if len(limiters) <= max_hosts:
+        return
+    now = time.monotonic()
+    for host in [host for host, limiter in limiters.items() if limiter.is_idle(now)]:
+        if len(limiters) <= max_hosts:
+            break
+        del limiters[host]
+
+
+def _drop_closed_loops() -> None:
+    """
+    丢弃已关闭事件循环的限流器.
+
+    限流器内的 Semaphore/Lock 会引用所属事件循环，
+    弱引用字典无法自行回收这些条目（asyncio.run 每次都会创建新的事件循环）。
+    """
+    for loop in [loop for loop in list(_limiters.keys()) if loop.is_closed()]:
+        _limiters.pop(loop, None)
+
+
+def defer_host(url: str, retry_after: float) -> float:
+    """
+    按 Retry-After 暂停向 URL 所属主机发送请求.
+
+    Args:
+        url: 请求 URL
+        retry_after: 暂停秒数
+
+    Returns:
+        实际生效的暂停秒数（不超过 http_retry_after_max 配置）
+    """
+    seconds = min(retry_after, get_settings().http_retry_after_max)
+    get_host_limiter(url).defer(seconds)
+    return seconds
+
+
+def reset_host_limiters() -> None:
+    """清除当前事件循环的所有限流器."""
+    _limiters.pop(asyncio.get_running_loop(), None)
+
+
+def parse_retry_after(value: str | None) -> float | None:
+    """
+    解析 Retry-After 响应头.
+
+    支持秒数和 HTTP 日期两种格式。
+
+    Args:
+        value: 响应头的值
+
+    Returns:
+        需要等待的秒数，无法解析时返回 None
+    """
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max((retry_at - datetime.now(timezone.utc)).total_seconds(), 0.0)
@@ -0,0 +1,345 @@
+"""快照 URL 列表的压缩二进制编码.
+
+JSONB 中每个条目都重复保存 url/lastmod/changefreq/priority 四个键名，
+读取时还要整体解析。本模块把 URL 列表排序后分块编码为列式结构：
+
+- 键列：URL 字典 ID 按升序记录与上一个 ID 的差值（SMB2）；
+  旧格式（SMB1）直接保存 URL，使用前缀压缩（公共前缀长度 + 剩余后缀）
+- lastmod / changefreq / priority 列使用块内字典（不同取值表 + 序号数组）
+
+整个数据流再用 zlib 压缩。各块独立解码，解码器逐块解压并逐条产出条目，
+内存占用与块大小有关，而与 URL 总数无关。
+
+格式::
+
+    MAGIC
+    zlib(
+        块*: <条目数 n: u32> <块长度: u32> 块内容
+        结束: <0: u32>
+    )
+
+    块内容（SMB2）:
+        ID 差值列    section(n 个 u64)
+        字段列
+    块内容（SMB1）:
+        前缀长度列   section(n 个 u32)
+        后缀列       section(以 \\0 连接的 UTF-8 后缀)
+        字段列
+
+    字段列（lastmod / changefreq / priority 依次）:
+        <取值数 k: u32> section(以 \\0 连接的取值) section(n 个 u32 序号，0 表示 None)
+
+    section: <字节数: u32> 数据
+
+XML 文本中不会出现 \\0，可以安全地作为分隔符。
+"""
+
+import struct
+import sys
+import zlib
+from array import array
+from collections.abc import Iterable, Iterator, Mapping
+from typing import Any
+
+# URL 字典 ID 编码
+MAGIC = b"SMB2"
+# URL 字符串编码（旧格式）
+MAGIC_URLS = b"SMB1"
+# 每块的条目数
+BLOCK_SIZE = 4096
+# 流式解压时每次输入的压缩数据字节数
+_READ_CHUNK_SIZE = 64 * 1024
+_FIELDS = ("lastmod", "changefreq", "priority")
+_SEPARATOR = "\0"
+_U32 = struct.Struct("<I")
+_BLOCK_HEADER = struct.Struct("<II")
+
+# 条目字段：(lastmod, changefreq, priority)
+Entry = tuple[str | None, str | None, str | None]
+
+
+class SnapshotCodecError(ValueError):
+    """编码数据无效（格式未知、不完整或损坏）."""
+
+
+def _pack_array(typecode: str, values: Iterable[int]) -> bytes:
+    data = array(typecode, values)
+    if sys.byteorder != "little":
+        data.byteswap()
+    return data.tobytes()
+
+
+def _unpack_array(typecode: str, data: bytes) -> array:
+    values = array(typecode)
+    values.frombytes(data)
+    if sys.byteorder != "little":
+        values.byteswap()
+    return values
+
+
+def _common_prefix_length(a: str, b: str) -> int:
+    """公共前缀长度（二分查找，每次比较在 C 层完成）."""
+    low, high = 0, min(len(a), len(b))
+    while low < high:
+        mid = (low + high + 1) // 2
+        if a[:mid] == b[:mid]:
+            low = mid
+        else:
+            high = mid - 1
+    return low
+
+
+def _section(data: bytes) -> bytes:
+    return _U32.pack(len(data)) + data
+
+
+def _encode_fields(rows: list[Entry]) -> list[bytes]:
+    parts = []
+    for column in range(len(_FIELDS)):
+        table: dict[str, int] = {}
+        indices = [
+            0 if (value := row[column]) is None else table.setdefault(value, len(table) + 1)
+            for row in rows
+        ]
+        parts.append(_U32.pack(len(table)))
+        parts.append(_section(_SEPARATOR.join(table).encode()))
+        parts.append(_section(_pack_array("I", indices)))
+    return parts
+
+
+def _block(count: int, parts: list[bytes]) -> bytes:
+    payload = b"".join(parts)
+    return _BLOCK_HEADER.pack(count, len(payload)) + payload
+
+
+def _compress(magic: bytes, blocks: Iterable[bytes], level: int) -> bytes:
+    compressor = zlib.compressobj(level)
+    chunks = [magic]
+    for block in blocks:
+        chunks.append(compressor.compress(block))
+    chunks.append(compressor.compress(_U32.pack(0)))
+    chunks.append(compressor.flush())
+    return b"".join(chunks)
+
+
+def encode_snapshot_entries(entries: Mapping[int, Entry], level: int = 6) -> bytes:
+    """
+    把 URL ID -> 字段的映射编码为压缩二进制.
+
+    Args:
+        entries: URL 字典 ID -> (lastmod, changefreq, priority)
+        level: zlib 压缩级别
+
+    Returns:
+        编码后的数据
+    """
+    ids = sorted(entries)
+
+    def blocks() -> Iterator[bytes]:
+        previous = 0
+        for start in range(0, len(ids), BLOCK_SIZE):
+            chunk = ids[start : start + BLOCK_SIZE]
+            gaps = []
+            for url_id in chunk:
+                gaps.append(url_id - previous)
+                previous = url_id
+            rows = [entries[url_id] for url_id in chunk]
+            yield _block(len(chunk), [_section(_pack_array("Q", gaps)), *_encode_fields(rows)])
+
+    return _compress(MAGIC, blocks(), level)
+
+
+def encode_snapshot_urls(urls: Iterable[dict[str, Any]], level: int = 6) -> bytes:
+    """
+    把 URL 列表编码为旧格式（保存 URL 字符串）的压缩二进制.
+
+    条目按 URL 排序后编码，解码得到的顺序与输入顺序无关。
+    """
+    items = sorted(urls, key=lambda item: item["url"])
+
+    def blocks() -> Iterator[bytes]:
+        for start in range(0, len(items), BLOCK_SIZE):
+            chunk = items[start : start + BLOCK_SIZE]
+            prefixes = []
+            suffixes = []
+            previous = ""
+            for item in chunk:
+                url = item["url"]
+                prefix = _common_prefix_length(previous, url)
+                prefixes.append(prefix)
+                suffixes.append(url[prefix:])
+                previous = url
+            rows = [tuple(item.get(name) for name in _FIELDS) for item in chunk]
+            yield _block(
+                len(chunk),
+                [
+                    _section(_pack_array("I", prefixes)),
+                    _section(_SEPARATOR.join(suffixes).encode()),
+                    *_encode_fields(rows),
+                ],
+            )
+
+    return _compress(MAGIC_URLS, blocks(), level)
+
+
+class _Reader:
+    """从压缩数据中按需解压出指定长度的字节."""
+
+    def __init__(self, data: bytes | memoryview):
+        self._data = memoryview(data)
+        self._offset = 0
+        self._decompressor = zlib.decompressobj()
+        self._buffer = bytearray()
+
+    def read(self, size: int) -> bytes:
+        while len(self._buffer) < size:
+            try:
+                if self._offset < len(self._data):
+                    chunk = self._data[self._offset : self._offset + _READ_CHUNK_SIZE]
+                    self._offset += len(chunk)
+                    self._buffer += self._decompressor.decompress(chunk)
+                elif not self._decompressor.eof:
+                    self._buffer += self._decompressor.flush()
+                    if len(self._buffer) < size:
+                        raise SnapshotCodecError("快照数据不完整")
+                else:
+                    raise SnapshotCodecError("快照数据不完整")
+            except zlib.error as e:
+                raise SnapshotCodecError(f"快照数据解压失败: {e}") from e
+        data = bytes(self._buffer[:size])
+        del self._buffer[:size]
+        return data
+
+    def finish(self) -> None:
+        """读到结束标记后确认压缩数据完整（校验 zlib 尾部的校验和）."""
+        try:
+            self._decompressor.decompress(self._data[self._offset :])
+            self._offset = len(self._data)
+        except zlib.error as e:
+            raise SnapshotCodecError(f"快照数据解压失败: {e}") from e
+        if not self._decompressor.eof:
+            raise SnapshotCodecError("快照数据不完整")
+
+
+class _Block:
+    """按顺序读取块内的各个 section，长度或取值不一致时抛出 SnapshotCodecError."""
+
+    def __init__(self, payload: bytes, count: int):
+        self.payload = payload
+        self.count = count
+        self._offset = 0
+
+    def _take(self, size: int) -> bytes:
+        if self._offset + size > len(self.payload):
+            raise SnapshotCodecError("快照数据块损坏")
+        self._offset += size
+        return self.payload[self._offset - size : self._offset]
+
+    def u32(self) -> int:
+        (value,) = _U32.unpack(self._take(_U32.size))
+        return value
+
+    def section(self) -> bytes:
+        return self._take(self.u32())
+
+    def numbers(self, typecode: str) -> array:
+        """读取 count 个整数组成的 section."""
+        data = self.section()
+        if len(data) != self.count * array(typecode).itemsize:
+            raise SnapshotCodecError("快照数据块损坏")
+        return _unpack_array(typecode, data)
+
+    def strings(self, count: int) -> list[str]:
+        """读取以分隔符连接的 count 个字符串."""
+        data = self.section()
+        if not count:
+            if data:
+                raise SnapshotCodecError("快照数据块损坏")
+            return []
+        try:
+            values = data.decode().split(_SEPARATOR)
+        except UnicodeDecodeError as e:
+            raise SnapshotCodecError("快照数据块损坏") from e
+        if len(values) != count:
+            raise SnapshotCodecError("快照数据块损坏")
+        return values
+
+    def fields(self) -> Iterator[Entry]:
+        columns = []
+        for _ in _FIELDS:
+            table = [None, *self.strings(self.u32())]
+            indices = self.numbers("I")
+            if indices and max(indices) >= len(table):
+                raise SnapshotCodecError("快照数据块损坏")
+            columns.append((table, indices))
+        (lastmods, lastmod_ids), (freqs, freq_ids), (priorities, priority_ids) = columns
+        for i in range(self.count):
+            yield lastmods[lastmod_ids[i]], freqs[freq_ids[i]], priorities[priority_ids[i]]
+
+
+def _iter_blocks(data: bytes | memoryview, magic: bytes) -> Iterator[_Block]:
+    if bytes(data[: len(magic)]) != magic:
+        raise SnapshotCodecError("未知的快照数据格式")
+    reader = _Reader(memoryview(data)[len(magic) :])
+    while True:
+        (count,) = _U32.unpack(reader.read(_U32.size))
+        if count == 0:
+            reader.finish()
+            return
+        (size,) = _U32.unpack(reader.read(_U32.size))
+        yield _Block(reader.read(size), count)
+
+
+def is_url_encoded(data: bytes | memoryview) -> bool:
+    """是否为旧格式（保存 URL 字符串）的编码."""
+    return bytes(data[: len(MAGIC_URLS)]) == MAGIC_URLS
+
+
+def iter_snapshot_entries(data: bytes | memoryview) -> Iterator[tuple[int, Entry]]:
+    """
+    流式解码 URL ID 编码的数据.
+
+    逐块解压和解码，按 ID 升序产出 (URL ID, 字段)。
+
+    Raises:
+        SnapshotCodecError: 数据格式无效
+    """
+    previous = 0
+    for block in _iter_blocks(data, MAGIC):
+        gaps = block.numbers("Q")
+        for gap, fields in zip(gaps, block.fields(), strict=True):
+            previous += gap
+            yield previous, fields
+
+
+def iter_snapshot_urls(data: bytes | memoryview) -> Iterator[dict[str, Any]]:
+    """
+    流式解码旧格式（保存 URL 字符串）的数据.
+
+    逐块解压和解码，按 URL 顺序产出条目。
+
+    Raises:
+        SnapshotCodecError: 数据格式无效
+    """
+    for block in _iter_blocks(data, MAGIC_URLS):
+        prefixes = block.numbers("I")
+        suffixes = block.strings(block.count)
+        previous = ""
+        for prefix, suffix, (lastmod, changefreq, priority) in zip(
+            prefixes, suffixes, block.fields(), strict=True
+        ):
+            if prefix > len(previous):
+                raise SnapshotCodecError("快照数据块损坏")
+            url = previous[:prefix] + suffix
+            previous = url
+            yield {
+                "url": url,
+                "lastmod": lastmod,
+                "changefreq": changefreq,
+                "priority": priority,
+            }
+
+
+def decode_snapshot_urls(data: bytes | memoryview) -> list[dict[str, Any]]:
+    """解码旧格式的完整 URL 列表."""
+    return list(iter_snapshot_urls(data))
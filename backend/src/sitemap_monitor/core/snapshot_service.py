@@ -1,47 +1,248 @@
 """快照服务."""
 
-import hashlib
-import json
+from datetime import datetime
 from typing import Any
 
-from sqlalchemy import select
+from sqlalchemy import and_, delete, func, or_, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from sitemap_monitor.models import SitemapSnapshot, ChangeRecord, ChangeType
-from sitemap_monitor.core.differ import compare_snapshots, ChangeResult
+from sitemap_monitor.config import get_settings
+from sitemap_monitor.models import (
+    SitemapSnapshot,
+    ChangeRecord,
+    ChangeType,
+    MonitorTask,
+    MonitorUrl,
+)
+from sitemap_monitor.core.differ import compare_entries, ChangeResult
+from sitemap_monitor.core.snapshot_codec import (
+    Entry,
+    encode_snapshot_entries,
+    is_url_encoded,
+    iter_snapshot_entries,
+    iter_snapshot_urls,
+)
+from sitemap_monitor.core.url_dictionary import UrlDictionary
 
+# 当前快照存储格式（保存 URL 字典 ID）
+STORAGE_VERSION = 2
 
-def compute_url_hash(urls: list[dict[str, Any]]) -> str:
-    """计算 URL 列表的哈希值."""
-    # 只用 URL 字符串排序后计算哈希
-    url_list = sorted([item["url"] for item in urls])
-    content = json.dumps(url_list, sort_keys=True)
-    return hashlib.sha256(content.encode()).hexdigest()
+# URL 字典 ID -> (lastmod, changefreq, priority)
+SnapshotEntries = dict[int, Entry]
+
+# 清理 URL 字典时每条 DELETE 语句删除的条目数
+_PRUNE_BATCH_SIZE = 1000
+
+
+class SnapshotChainError(ValueError):
+    """快照链不完整（关键帧或链上的增量缺失）."""
+
+
+async def lock_snapshot_chain(db: AsyncSession, monitor_task_id: str) -> None:
+    """
+    锁定监控任务的快照链，直到当前事务结束.
+
+    写入新快照（基于最新快照的 keyframe_id / chain_index 追加增量）、
+    清理过期快照（提升关键帧）和压缩都会读取并改写同一条链，
+    三者都先对 monitor_tasks 行加 FOR UPDATE 行锁，在锁内读取和写入。
+    还原快照（可能写入 URL 字典）和清理 URL 字典也在锁内执行。
+    """
+    await db.execute(
+        select(MonitorTask.id).where(MonitorTask.id == monitor_task_id).with_for_update()
+    )
+
+
+def compute_snapshot_delta(
+    old_entries: SnapshotEntries, new_entries: SnapshotEntries
+) -> dict[str, Any]:
+    """
+    计算两个快照之间的增量.
+
+    与 compare_entries 不同，任何字段变化的条目都记为修改，
+    保证应用增量后能准确还原新快照。
+
+    Returns:
+        {"added": [[URL ID, lastmod, changefreq, priority]], "removed": [URL ID],
+        "modified": [[URL ID, lastmod, changefreq, priority]]}
+    """
+    added = []
+    modified = []
+    for url_id, fields in new_entries.items():
+        old_fields = old_entries.get(url_id)
+        if old_fields is None:
+            added.append([url_id, *fields])
+        elif old_fields != fields:
+            modified.append([url_id, *fields])
+    removed = [url_id for url_id in old_entries if url_id not in new_entries]
+    return {"added": added, "removed": removed, "modified": modified}
+
+
+def apply_snapshot_delta(entries: SnapshotEntries, delta: dict[str, Any]) -> None:
+    """把增量应用到 URL ID -> 字段映射上（原地修改）."""
+    for url_id in delta["removed"]:
+        entries.pop(url_id, None)
+    for url_id, *fields in delta["added"]:
+        entries[url_id] = tuple(fields)
+    for url_id, *fields in delta["modified"]:
+        entries[url_id] = tuple(fields)
+
+
+async def _convert_legacy_delta(
+    db: AsyncSession, delta: dict[str, Any], dictionary: UrlDictionary
+) -> dict[str, Any]:
+    """把旧格式（保存 URL 字符串）的增量转换为 URL ID 格式."""
+    added = await dictionary.to_entries(db, delta["added"])
+    modified = await dictionary.to_entries(db, delta["modified"])
+    await dictionary.add(db, delta["removed"])
+    return {
+        "added": [[url_id, *fields] for url_id, fields in added.items()],
+        "removed": [dictionary.id_for(url) for url in delta["removed"]],
+        "modified": [[url_id, *fields] for url_id, fields in modified.items()],
+    }
+
+
+async def _keyframe_entries(
+    db: AsyncSession,
+    urls: list[dict[str, Any]] | None,
+    urls_blob: bytes | None,
+    dictionary: UrlDictionary,
+) -> SnapshotEntries:
+    """解码关键帧（兼容旧格式的 JSONB 列表和 URL 字符串编码）."""
+    if urls_blob is not None and not is_url_encoded(urls_blob):
+        return dict(iter_snapshot_entries(urls_blob))
+    items = iter_snapshot_urls(urls_blob) if urls_blob is not None else urls or []
+    return await dictionary.to_entries(db, items)
 
 
 async def create_snapshot(
     db: AsyncSession,
     monitor_task_id: str,
-    urls: list[dict[str, Any]],
+    entries: SnapshotEntries,
+    url_count: int,
+    url_hash: str,
     fetch_duration_ms: int,
     parse_duration_ms: int,
+    previous: SitemapSnapshot | None = None,
+    previous_entries: SnapshotEntries | None = None,
 ) -> SitemapSnapshot:
-    """创建快照."""
-    url_hash = compute_url_hash(urls)
+    """
+    创建快照.
 
+    提供上一个快照及其内容时，按关键帧间隔写入增量快照，
+    写入量只与变化的 URL 数量有关；否则写入关键帧。
+    调用方应已持有快照链锁（见 lock_snapshot_chain）。
+
+    Args:
+        entries: 本次检查的 URL ID -> 字段映射（见 UrlDictionary.to_entries）
+        url_count: 本次检查的 URL 数
+        previous: 上一个（当前最新的）快照
+        previous_entries: 上一个快照还原后的内容
+    """
     snapshot = SitemapSnapshot(
         monitor_task_id=monitor_task_id,
-        url_count=len(urls),
+        url_count=url_count,
         url_hash=url_hash,
-        urls=urls,
         fetch_duration_ms=fetch_duration_ms,
         parse_duration_ms=parse_duration_ms,
+        storage_version=STORAGE_VERSION,
+        # 快照链按 created_at 排序：取写入时（已持有链锁）的时间，而不是事务开始时间，
+        # 否则并发检查中先开始、后拿到锁的事务写入的快照会排在前一个快照之前
+        created_at=func.clock_timestamp(),
     )
+    # 没有上一个快照或链长度达到关键帧间隔时写入关键帧
+    if (
+        previous is None
+        or previous_entries is None
+        or previous.chain_index + 1 >= get_settings().snapshot_keyframe_interval
+    ):
+        snapshot.urls_blob = encode_snapshot_entries(entries)
+        snapshot.chain_index = 0
+    else:
+        snapshot.delta = compute_snapshot_delta(previous_entries, entries)
+        snapshot.keyframe_id = previous.keyframe_id or previous.id
+        snapshot.chain_index = previous.chain_index + 1
     db.add(snapshot)
     await db.flush()
     return snapshot
 
 
+async def load_snapshot_entries(
+    db: AsyncSession, snapshot: SitemapSnapshot, dictionary: UrlDictionary
+) -> SnapshotEntries:
+    """
+    还原快照的 URL ID -> 字段映射.
+
+    关键帧直接解码；增量快照从所属关键帧开始依次应用链上的增量。
+    关键帧和增量在同一条语句中读取，看到的是同一时刻的链。
+    旧格式的数据按 URL 字典转换（新出现的 URL 写入字典），
+    因此调用方必须持有快照链锁（见 lock_snapshot_chain），与清理字典互斥。
+
+    Raises:
+        SnapshotChainError: 链不完整（snapshot 的链位置已被清理或压缩改写）
+    """
+    if snapshot.is_keyframe:
+        if snapshot.urls is None and snapshot.urls_blob is None:
+            raise SnapshotChainError(f"快照 {snapshot.id} 不是关键帧")
+        return await _keyframe_entries(db, snapshot.urls, snapshot.urls_blob, dictionary)
+
+    # 关键帧的 chain_index 为 0，排在增量之前
+    result = await db.execute(
+        select(
+            SitemapSnapshot.keyframe_id,
+            SitemapSnapshot.urls,
+            SitemapSnapshot.urls_blob,
+            SitemapSnapshot.delta,
+            SitemapSnapshot.storage_version,
+        )
+        .where(
+            or_(
+                SitemapSnapshot.id == snapshot.keyframe_id,
+                and_(
+                    SitemapSnapshot.keyframe_id == snapshot.keyframe_id,
+                    SitemapSnapshot.chain_index <= snapshot.chain_index,
+                ),
+            )
+        )
+        .order_by(SitemapSnapshot.chain_index)
+    )
+    rows = result.tuples().all()
+    if (
+        len(rows) != snapshot.chain_index + 1
+        or rows[0][0] is not None
+        or (rows[0][1] is None and rows[0][2] is None)
+    ):
+        raise SnapshotChainError(f"快照 {snapshot.id} 的增量链不完整")
+
+    _, urls, urls_blob, _, _ = rows[0]
+    entries = await _keyframe_entries(db, urls, urls_blob, dictionary)
+    for _, _, _, delta, storage_version in rows[1:]:
+        if storage_version < STORAGE_VERSION:
+            delta = await _convert_legacy_delta(db, delta, dictionary)
+        apply_snapshot_delta(entries, delta)
+    return entries
+
+
+async def compare_snapshot_entries(
+    db: AsyncSession,
+    old_entries: SnapshotEntries,
+    new_entries: SnapshotEntries,
+    dictionary: UrlDictionary,
+) -> ChangeResult:
+    """
+    比较两个快照的内容（见 compare_entries）.
+
+    只查询新增、删除和 lastmod 变化的条目的 URL。
+    """
+    changed = old_entries.keys() ^ new_entries.keys()
+    changed.update(
+        url_id
+        for url_id in old_entries.keys() & new_entries.keys()
+        if old_entries[url_id][0] != new_entries[url_id][0]
+    )
+    await dictionary.resolve(db, changed)
+    return compare_entries(old_entries, new_entries, dictionary.to_url_item)
+
+
 async def get_latest_snapshot(
     db: AsyncSession, monitor_task_id: str
 ) -> SitemapSnapshot | None:
@@ -55,40 +256,43 @@ async def get_latest_snapshot(
     return result.scalar_one_or_none()
 
 
-async def compare_with_previous(
+async def touch_latest_snapshot(
     db: AsyncSession,
     monitor_task_id: str,
-    new_snapshot: SitemapSnapshot,
-) -> tuple[ChangeResult, SitemapSnapshot | None]:
+    url_hash: str | None = None,
+) -> bool:
     """
-    与上一个快照比较.
+    记录一次结果未变化的检查.
+
+    不复制 URL 列表，只更新最新快照的 last_seen_at 和 check_count。
+
+    Args:
+        url_hash: 本次检查的 URL 哈希，与最新快照不同时不更新；
+            None 表示已确认未变化（如所有文档返回 304）
 
     Returns:
-        (变更结果, 旧快照)
+        True 如果已更新最新快照；False 表示没有快照或哈希不同，需要创建新快照
     """
-    # 获取上一个快照（不包括当前快照）
-    result = await db.execute(
-        select(SitemapSnapshot)
-        .where(
-            SitemapSnapshot.monitor_task_id == monitor_task_id,
-            SitemapSnapshot.id != new_snapshot.id,
-        )
+    latest_id = (
+        select(SitemapSnapshot.id)
+        .where(SitemapSnapshot.monitor_task_id == monitor_task_id)
         .order_by(SitemapSnapshot.created_at.desc())
         .limit(1)
+        .scalar_subquery()
     )
-    old_snapshot = result.scalar_one_or_none()
-
-    if old_snapshot is None:
-        # 首次快照，无需比较
-        return ChangeResult(has_changes=False), None
-
-    # 快速比较哈希
-    if old_snapshot.url_hash == new_snapshot.url_hash:
-        return ChangeResult(has_changes=False), old_snapshot
-
-    # 详细比较
-    change_result = compare_snapshots(old_snapshot.urls, new_snapshot.urls)
-    return change_result, old_snapshot
+    stmt = (
+        update(SitemapSnapshot)
+        .where(SitemapSnapshot.id == latest_id)
+        .values(
+            last_seen_at=func.now(),
+            check_count=SitemapSnapshot.check_count + 1,
+        )
+        .execution_options(synchronize_session=False)
+    )
+    if url_hash is not None:
+        stmt = stmt.where(SitemapSnapshot.url_hash == url_hash)
+    result = await db.execute(stmt)
+    return result.rowcount > 0
 
 
 async def create_change_record(
@@ -120,3 +324,249 @@ async def create_change_record(
     db.add(record)
     await db.flush()
     return record
+
+
+async def get_expired_snapshot_monitor_ids(db: AsyncSession, cutoff: datetime) -> list[str]:
+    """查找有快照最后确认时间早于 cutoff 的监控任务（不计各自的最新快照）."""
+    latest_snapshots = (
+        select(SitemapSnapshot.id)
+        .distinct(SitemapSnapshot.monitor_task_id)
+        .order_by(SitemapSnapshot.monitor_task_id, SitemapSnapshot.created_at.desc())
+    )
+    result = await db.execute(
+        select(SitemapSnapshot.monitor_task_id)
+        .where(
+            SitemapSnapshot.last_seen_at < cutoff,
+            SitemapSnapshot.id.not_in(latest_snapshots),
+        )
+        .distinct()
+    )
+    return list(result.scalars().all())
+
+
+async def delete_expired_snapshots(
+    db: AsyncSession, monitor_task_id: str, cutoff: datetime
+) -> int:
+    """
+    删除监控任务中最后确认时间早于 cutoff 的快照.
+
+    在快照链锁内执行（见 lock_snapshot_chain），始终保留最新快照作为比较基准。
+    过期快照按时间先于同一链上的保留快照，删除关键帧前
+    先把链上第一个保留的增量快照还原为关键帧，并把之后的增量改挂到它上面。
+
+    Returns:
+        删除的快照数
+    """
+    await lock_snapshot_chain(db, monitor_task_id)
+    latest_snapshot = (
+        select(SitemapSnapshot.id)
+        .where(SitemapSnapshot.monitor_task_id == monitor_task_id)
+        .order_by(SitemapSnapshot.created_at.desc())
+        .limit(1)
+        .scalar_subquery()
+    )
+    expired = select(SitemapSnapshot.id).where(
+        SitemapSnapshot.monitor_task_id == monitor_task_id,
+        SitemapSnapshot.last_seen_at < cutoff,
+        SitemapSnapshot.id != latest_snapshot,
+    )
+
+    # 每条关键帧已过期的链上第一个保留的增量快照
+    result = await db.execute(
+        select(SitemapSnapshot)
+        .where(
+            SitemapSnapshot.keyframe_id.in_(expired),
+            SitemapSnapshot.id.not_in(expired),
+        )
+        .distinct(SitemapSnapshot.keyframe_id)
+        .order_by(SitemapSnapshot.keyframe_id, SitemapSnapshot.chain_index)
+    )
+    for snapshot in result.scalars().all():
+        await _promote_to_keyframe(db, snapshot)
+
+    result = await db.execute(
+        delete(SitemapSnapshot)
+        .where(SitemapSnapshot.id.in_(expired))
+        .execution_options(synchronize_session=False)
+    )
+    return result.rowcount
+
+
+async def _promote_to_keyframe(db: AsyncSession, snapshot: SitemapSnapshot) -> None:
+    """把增量快照还原为关键帧，链上之后的增量改挂到它上面."""
+    keyframe_id = snapshot.keyframe_id
+    offset = snapshot.chain_index
+    dictionary = UrlDictionary(snapshot.monitor_task_id)
+    snapshot.urls_blob = encode_snapshot_entries(
+        await load_snapshot_entries(db, snapshot, dictionary)
+    )
+    snapshot.urls = None
+    snapshot.storage_version = STORAGE_VERSION
+    snapshot.delta = None
+    snapshot.keyframe_id = None
+    snapshot.chain_index = 0
+    await db.flush()
+    await db.execute(
+        update(SitemapSnapshot)
+        .where(
+            SitemapSnapshot.keyframe_id == keyframe_id,
+            SitemapSnapshot.chain_index > offset,
+        )
+        .values(
+            keyframe_id=snapshot.id,
+            chain_index=SitemapSnapshot.chain_index - offset,
+        )
+        .execution_options(synchronize_session=False)
+    )
+
+
+async def get_uncompacted_monitor_ids(db: AsyncSession, limit: int) -> list[str]:
+    """
+    查找关键帧多于链间隔所需数量的监控任务.
+
+    包括升级前写入的完整快照，以及关键帧间隔调大后的旧链。
+    清理过期快照时提升的关键帧会使首条链变短，允许多出一个关键帧。
+    仍有旧格式（保存 URL 字符串）快照的监控任务也需要压缩。
+    """
+    interval = get_settings().snapshot_keyframe_interval
+    keyframes = func.count(SitemapSnapshot.id).filter(SitemapSnapshot.keyframe_id.is_(None))
+    legacy = func.count(SitemapSnapshot.id).filter(
+        SitemapSnapshot.storage_version < STORAGE_VERSION
+    )
+    total = func.count(SitemapSnapshot.id)
+    result = await db.execute(
+        select(SitemapSnapshot.monitor_task_id)
+        .group_by(SitemapSnapshot.monitor_task_id)
+        .having(or_(keyframes > (total + interval - 1) // interval + 1, legacy > 0))
+        .limit(limit)
+    )
+    return list(result.scalars().all())
+
+
+async def compact_monitor_snapshots(db: AsyncSession, monitor_task_id: str) -> int:
+    """
+    按关键帧间隔重新编码监控任务的快照链.
+
+    按时间顺序逐个还原快照，关键帧位置以外的完整快照改写为增量，
+    过长的链按间隔插入关键帧，旧格式的快照改写为 URL 字典 ID 格式。
+    快照 ID 和内容不变，变更记录的引用仍然有效。
+    在快照链锁内执行（见 lock_snapshot_chain）。
+
+    Returns:
+        改写的快照数
+    """
+    interval = get_settings().snapshot_keyframe_interval
+    await lock_snapshot_chain(db, monitor_task_id)
+    result = await db.execute(
+        select(SitemapSnapshot.id)
+        .where(SitemapSnapshot.monitor_task_id == monitor_task_id)
+        .order_by(SitemapSnapshot.created_at)
+    )
+    snapshot_ids = list(result.scalars().all())
+
+    dictionary = UrlDictionary(monitor_task_id)
+    rewritten = 0
+    keyframe_id: str | None = None
+    chain_index = 0
+    entries: SnapshotEntries = {}
+    for snapshot_id in snapshot_ids:
+        snapshot = await db.get(SitemapSnapshot, snapshot_id)
+        previous_entries = entries
+        legacy = snapshot.storage_version < STORAGE_VERSION
+        if snapshot.is_keyframe:
+            entries = await _keyframe_entries(
+                db, snapshot.urls, snapshot.urls_blob, dictionary
+            )
+        else:
+            # 增量相对于时间上的上一个快照
+            delta = snapshot.delta
+            if legacy:
+                delta = await _convert_legacy_delta(db, delta, dictionary)
+            entries = dict(entries)
+            apply_snapshot_delta(entries, delta)
+
+        if keyframe_id is None or chain_index + 1 >= interval:
+            keyframe_id, chain_index = None, 0
+        else:
+            chain_index += 1
+
+        # 只修改需要变化的列，未变化的快照不产生写入
+        changed = False
+        if keyframe_id is None:
+            if not snapshot.is_keyframe or legacy:
+                snapshot.urls_blob = encode_snapshot_entries(entries)
+                snapshot.urls, snapshot.delta, snapshot.keyframe_id = None, None, None
+                changed = True
+            keyframe_id = snapshot.id
+        else:
+            if snapshot.is_keyframe or legacy:
+                snapshot.delta = compute_snapshot_delta(previous_entries, entries)
+                snapshot.urls, snapshot.urls_blob = None, None
+                changed = True
+            if snapshot.keyframe_id != keyframe_id:
+                snapshot.keyframe_id = keyframe_id
+                changed = True
+        if snapshot.chain_index != chain_index:
+            snapshot.chain_index = chain_index
+            changed = True
+        snapshot.storage_version = STORAGE_VERSION
+        rewritten += changed
+
+        await db.flush()
+        # 只保留当前还原结果，释放已处理快照占用的内存
+        db.expunge(snapshot)
+    return rewritten
+
+
+async def prune_url_dictionary(db: AsyncSession, monitor_task_id: str) -> int:
+    """
+    删除监控任务的快照不再引用的 URL 字典条目.
+
+    在快照链锁内执行（见 lock_snapshot_chain），与写入新快照互斥。
+    引用包括关键帧中的 ID 和增量中新增、删除、修改的 ID；
+    旧格式的快照保存 URL 字符串，还原时按需重新写入字典，不需要保留 ID。
+
+    Returns:
+        删除的字典条目数
+    """
+    await lock_snapshot_chain(db, monitor_task_id)
+    result = await db.execute(
+        select(MonitorUrl.id).where(MonitorUrl.monitor_task_id == monitor_task_id)
+    )
+    unreferenced = set(result.scalars().all())
+    if not unreferenced:
+        return 0
+
+    result = await db.execute(
+        select(SitemapSnapshot.id).where(
+            SitemapSnapshot.monitor_task_id == monitor_task_id,
+            SitemapSnapshot.storage_version == STORAGE_VERSION,
+        )
+    )
+    for snapshot_id in result.scalars().all():
+        # 逐个读取，内存占用只与单个快照有关
+        row = await db.execute(
+            select(SitemapSnapshot.urls_blob, SitemapSnapshot.delta).where(
+                SitemapSnapshot.id == snapshot_id
+            )
+        )
+        urls_blob, delta = row.one()
+        if urls_blob is not None:
+            unreferenced.difference_update(
+                url_id for url_id, _ in iter_snapshot_entries(urls_blob)
+            )
+        if delta is not None:
+            unreferenced.difference_update(url_id for url_id, *_ in delta["added"])
+            unreferenced.difference_update(delta["removed"])
+            unreferenced.difference_update(url_id for url_id, *_ in delta["modified"])
+        if not unreferenced:
+            return 0
+
+    url_ids = list(unreferenced)
+    for start in range(0, len(url_ids), _PRUNE_BATCH_SIZE):
+        await db.execute(
+            delete(MonitorUrl)
+            .where(MonitorUrl.id.in_(url_ids[start : start + _PRUNE_BATCH_SIZE]))
+            .execution_options(synchronize_session=False)
+        )
+    return len(url_ids)
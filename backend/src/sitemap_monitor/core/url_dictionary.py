@@ -0,0 +1,136 @@
+"""监控任务的 URL 字典服务.
+
+每个监控任务出现过的 URL 映射为整数 ID（monitor_urls 表），
+快照和增量只保存 ID，比较时按整数比较，只在输出变更时把 ID 还原为 URL。
+
+字典按需加载：只查询本次检查用到的 URL 的 ID 和需要输出的 ID 的 URL，
+不加载监控任务出现过的全部 URL。
+"""
+
+from collections.abc import Iterable
+from typing import Any
+
+from sqlalchemy import BigInteger, Text, any_, bindparam, select
+from sqlalchemy.dialects.postgresql import ARRAY, insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from sitemap_monitor.core.snapshot_codec import Entry
+from sitemap_monitor.models import MonitorUrl
+
+# 每条 INSERT 语句写入的 URL 数（受数据库参数个数限制）
+_INSERT_BATCH_SIZE = 1000
+# 每条查询语句（= ANY(数组参数)）查询的 URL 或 ID 数
+_SELECT_BATCH_SIZE = 10_000
+
+_FIELDS = ("lastmod", "changefreq", "priority")
+
+
+class UrlDictionary:
+    """单个监控任务的 URL <-> ID 映射（只包含已查询过的 URL）."""
+
+    def __init__(self, monitor_task_id: str):
+        self.monitor_task_id = monitor_task_id
+        self._ids: dict[str, int] = {}
+        self._urls: dict[int, str] = {}
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def id_for(self, url: str) -> int:
+        """获取 URL 的 ID（URL 必须已通过 add 查询）."""
+        return self._ids[url]
+
+    def url_for(self, url_id: int) -> str:
+        """获取 ID 对应的 URL（ID 必须已通过 add 或 resolve 查询）."""
+        return self._urls[url_id]
+
+    def _remember(self, pairs: Iterable[tuple[str, int]]) -> None:
+        for url, url_id in pairs:
+            self._ids[url] = url_id
+            self._urls[url_id] = url
+
+    async def add(self, db: AsyncSession, urls: Iterable[str]) -> None:
+        """
+        查询 URL 的 ID，字典中没有的 URL 批量写入数据库.
+
+        先按 URL 查询已有的 ID，再对新 URL 使用 INSERT ... ON CONFLICT DO NOTHING，
+        其他事务同时写入的 URL 再查询一次获取 ID。
+        """
+        missing = list(dict.fromkeys(url for url in urls if url not in self._ids))
+        if not missing:
+            return
+        await self._select_urls(db, missing)
+
+        new_urls = [url for url in missing if url not in self._ids]
+        for start in range(0, len(new_urls), _INSERT_BATCH_SIZE):
+            batch = new_urls[start : start + _INSERT_BATCH_SIZE]
+            result = await db.execute(
+                insert(MonitorUrl)
+                .values([{"monitor_task_id": self.monitor_task_id, "url": url} for url in batch])
+                .on_conflict_do_nothing(index_elements=["monitor_task_id", "url"])
+                .returning(MonitorUrl.url, MonitorUrl.id)
+            )
+            self._remember(result.tuples().all())
+
+        conflicted = [url for url in new_urls if url not in self._ids]
+        if conflicted:
+            await self._select_urls(db, conflicted)
+
+    async def _select_urls(self, db: AsyncSession, urls: list[str]) -> None:
+        for start in range(0, len(urls), _SELECT_BATCH_SIZE):
+            result = await db.execute(
+                select(MonitorUrl.url, MonitorUrl.id).where(
+                    MonitorUrl.monitor_task_id == self.monitor_task_id,
+                    MonitorUrl.url
+                    == any_(
+                        bindparam(
+                            "urls", urls[start : start + _SELECT_BATCH_SIZE], type_=ARRAY(Text)
+                        )
+                    ),
+                )
+            )
+            self._remember(result.tuples().all())
+
+    async def resolve(self, db: AsyncSession, url_ids: Iterable[int]) -> None:
+        """查询字典中还没有的 ID 对应的 URL."""
+        missing = list({url_id for url_id in url_ids if url_id not in self._urls})
+        for start in range(0, len(missing), _SELECT_BATCH_SIZE):
+            result = await db.execute(
+                select(MonitorUrl.url, MonitorUrl.id).where(
+                    MonitorUrl.monitor_task_id == self.monitor_task_id,
+                    MonitorUrl.id
+                    == any_(
+                        bindparam(
+                            "ids",
+                            missing[start : start + _SELECT_BATCH_SIZE],
+                            type_=ARRAY(BigInteger),
+                        )
+                    ),
+                )
+            )
+            self._remember(result.tuples().all())
+
+    async def to_entries(
+        self, db: AsyncSession, urls: Iterable[dict[str, Any]]
+    ) -> dict[int, Entry]:
+        """
+        把 URL 条目列表转换为 ID -> 字段映射.
+
+        新出现的 URL 先写入字典；重复的 URL 以最后一个为准。
+        """
+        urls = list(urls)
+        await self.add(db, (item["url"] for item in urls))
+        return {
+            self._ids[item["url"]]: tuple(item.get(name) for name in _FIELDS)
+            for item in urls
+        }
+
+    def to_urls(self, entries: dict[int, Entry]) -> list[dict[str, Any]]:
+        """把 ID -> 字段映射还原为 URL 条目列表（ID 必须已通过 resolve 查询）."""
+        return [self.to_url_item(url_id, fields) for url_id, fields in entries.items()]
+
+    def to_url_item(self, url_id: int, fields: Entry) -> dict[str, Any]:
+        """把单个条目还原为 URL 条目."""
+        item: dict[str, Any] = {"url": self.url_for(url_id)}
+        item.update(zip(_FIELDS, fields, strict=True))
+        return item
@@ -0,0 +1,55 @@
+"""URL 列表的顺序无关指纹.
+
+每个条目（URL 及 lastmod / changefreq / priority）计算 128 位哈希，
+整个列表的指纹为所有条目哈希之和（模 2^128）：
+
+- 与条目顺序无关，无需排序，解析时逐条累加即可，内存占用恒定
+- 可以合并：Sitemap Index 的指纹等于各子 Sitemap 指纹之和
+- 覆盖所有字段，只有 lastmod 等字段变化时指纹也会变化
+
+使用加法而不是异或，重复出现的条目不会互相抵消。
+"""
+
+import hashlib
+from collections.abc import Iterable
+from typing import Any
+
+_MASK = (1 << 128) - 1
+_FIELDS = ("url", "lastmod", "changefreq", "priority")
+# 字段之间的分隔符与 None 的占位符（XML 文本中不会出现）
+_SEPARATOR = "\0"
+_NONE = "\1"
+
+
+def entry_hash(
+    url: str,
+    lastmod: str | None = None,
+    changefreq: str | None = None,
+    priority: str | None = None,
+) -> int:
+    """计算单个条目的 128 位哈希."""
+    content = _SEPARATOR.join(
+        _NONE if value is None else value for value in (url, lastmod, changefreq, priority)
+    )
+    digest = hashlib.blake2b(content.encode(), digest_size=16).digest()
+    return int.from_bytes(digest, "little")
+
+
+def item_hash(item: dict[str, Any]) -> int:
+    """计算 URL 条目（SitemapUrl.to_dict() 格式）的 128 位哈希."""
+    return entry_hash(*(item.get(name) for name in _FIELDS))
+
+
+def combine_url_hashes(hashes: Iterable[int]) -> int:
+    """合并多个条目或列表的哈希."""
+    return sum(hashes) & _MASK
+
+
+def hash_url_items(items: Iterable[dict[str, Any]]) -> int:
+    """计算 URL 条目列表的指纹."""
+    return combine_url_hashes(item_hash(item) for item in items)
+
+
+def format_url_hash(value: int) -> str:
+    """把指纹格式化为 32 位十六进制字符串（保存在快照的 url_hash 中）."""
+    return format(value & _MASK, "032x")
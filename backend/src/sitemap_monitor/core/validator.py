@@ -5,8 +5,14 @@ from urllib.parse import urlparse
 
 import httpx
 
-from sitemap_monitor.config import get_settings
-from sitemap_monitor.parsers.sitemap import is_sitemap_index, parse_sitemap, parse_sitemap_index
+from sitemap_monitor.core.http_client import get_http_client, host_slot
+from sitemap_monitor.core.rate_limiter import HostBlockedError
+from sitemap_monitor.parsers.sitemap import (
+    is_gzip_content,
+    is_sitemap_index,
+    parse_sitemap,
+    parse_sitemap_index,
+)
 
 
 @dataclass
@@ -42,42 +48,38 @@ async def validate_sitemap_url(url: str) -> ValidationResult:
     except Exception:
         return ValidationResult(valid=False, error="无效的 URL 格式")
 
-    settings = get_settings()
+    client = get_http_client()
 
     try:
-        async with httpx.AsyncClient(
-            timeout=settings.sitemap_request_timeout,
-            follow_redirects=True,
-            http2=True,
-        ) as client:
+        async with host_slot(url):
             response = await client.get(url)
-            response.raise_for_status()
-
-            content = response.content
-
-            # 检查内容类型
-            content_type = response.headers.get("content-type", "").lower()
-            if not any(
-                t in content_type
-                for t in ("xml", "text/plain", "application/octet-stream")
-            ):
-                # 有些服务器可能返回错误的 content-type，尝试解析内容
-                if not content.strip().startswith(b"<?xml") and not content.strip().startswith(b"<"):
-                    return ValidationResult(
-                        valid=False, error=f"无效的内容类型: {content_type}"
-                    )
-
-            # 判断是否为 Sitemap Index
-            if is_sitemap_index(content):
-                # 统计子 Sitemap 数量
-                child_count = sum(1 for _ in parse_sitemap_index(content))
+        response.raise_for_status()
+
+        content = response.content
+
+        # 检查内容类型
+        content_type = response.headers.get("content-type", "").lower()
+        if not any(
+            t in content_type
+            for t in ("xml", "text/plain", "application/octet-stream", "gzip")
+        ):
+            # 有些服务器可能返回错误的 content-type，尝试解析内容
+            if not is_gzip_content(content) and not content.strip().startswith(b"<"):
                 return ValidationResult(
-                    valid=True, is_index=True, child_sitemaps=child_count
+                    valid=False, error=f"无效的内容类型: {content_type}"
                 )
-            else:
-                # 统计 URL 数量（流式处理，不加载全部到内存）
-                url_count = sum(1 for _ in parse_sitemap(content))
-                return ValidationResult(valid=True, is_index=False, url_count=url_count)
+
+        # 判断是否为 Sitemap Index
+        if is_sitemap_index(content):
+            # 统计子 Sitemap 数量
+            child_count = sum(1 for _ in parse_sitemap_index(content))
+            return ValidationResult(
+                valid=True, is_index=True, child_sitemaps=child_count
+            )
+        else:
+            # 统计 URL 数量（流式处理，不加载全部到内存）
+            url_count = sum(1 for _ in parse_sitemap(content))
+            return ValidationResult(valid=True, is_index=False, url_count=url_count)
 
     except httpx.TimeoutException:
         return ValidationResult(valid=False, error="请求超时")
@@ -85,5 +87,7 @@ async def validate_sitemap_url(url: str) -> ValidationResult:
         return ValidationResult(valid=False, error=f"HTTP 错误: {e.response.status_code}")
     except httpx.RequestError as e:
         return ValidationResult(valid=False, error=f"请求失败: {str(e)}")
+    except HostBlockedError as e:
+        return ValidationResult(valid=False, error=str(e))
     except Exception as e:
         return ValidationResult(valid=False, error=f"解析失败: {str(e)}")
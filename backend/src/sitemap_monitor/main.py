@@ -7,7 +7,9 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from sitemap_monitor.config import get_settings
+from sitemap_monitor.core.http_client import close_http_client
 from sitemap_monitor.logging import configure_logging, get_logger
+from sitemap_monitor.models import dispose_engine
 from sitemap_monitor.api import auth, monitors, changes, notifications, users, health, dashboard
 
 logger = get_logger(__name__)
@@ -22,6 +24,8 @@ async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
     yield
     # 关闭时
     logger.info("Sitemap Monitor shutting down...")
+    await close_http_client()
+    await dispose_engine()
 
 
 def create_app() -> FastAPI:
@@ -44,15 +44,26 @@ class UUIDMixin:
 
 
 # 数据库引擎工厂函数
-def create_engine():
-    """创建新的数据库引擎（每次调用创建新实例，适用于 Celery 任务）."""
+def create_engine(max_connections: int | None = None):
+    """
+    创建新的数据库引擎（每次调用创建新实例）.
+
+    Args:
+        max_connections: 连接数上限，超出 database_pool_size 的部分为用完即关闭的临时连接；
+            默认为 database_pool_size + database_max_overflow
+    """
     settings = get_settings()
+    pool_size = settings.database_pool_size
+    max_overflow = settings.database_max_overflow
+    if max_connections is not None:
+        pool_size = min(pool_size, max_connections)
+        max_overflow = max_connections - pool_size
     return create_async_engine(
         str(settings.database_url),
         echo=settings.debug,
         pool_pre_ping=True,
-        pool_size=5,
-        max_overflow=10,
+        pool_size=pool_size,
+        max_overflow=max_overflow,
     )
 
 
@@ -67,27 +78,48 @@ def create_session_factory(engine=None) -> async_sessionmaker[AsyncSession]:
     )
 
 
-# FastAPI 使用的单例（在主进程中复用）
+# 进程内单例（FastAPI 进程和每个 Celery worker 进程各自复用一个连接池）
 _api_engine = None
 _api_session_factory = None
 
 
 def get_engine():
-    """获取 API 使用的数据库引擎（单例，仅用于 FastAPI）."""
+    """获取进程内共享的数据库引擎（单例）."""
     global _api_engine
     if _api_engine is None:
         _api_engine = create_engine()
     return _api_engine
 
 
+def configure_engine(max_connections: int) -> None:
+    """
+    按连接数上限创建进程内共享的引擎.
+
+    asyncio 检查 worker 启动时按并发数调用，必须在首次使用共享引擎之前。
+    """
+    global _api_engine
+    if _api_engine is not None:
+        raise RuntimeError("共享数据库引擎已创建")
+    _api_engine = create_engine(max_connections=max_connections)
+
+
 def get_session_factory() -> async_sessionmaker[AsyncSession]:
-    """获取 API 使用的会话工厂（单例，仅用于 FastAPI）."""
+    """获取进程内共享的会话工厂（单例）."""
     global _api_session_factory
     if _api_session_factory is None:
         _api_session_factory = create_session_factory(get_engine())
     return _api_session_factory
 
 
+async def dispose_engine() -> None:
+    """释放共享数据库引擎的连接池（关闭钩子）."""
+    global _api_engine, _api_session_factory
+    if _api_engine is not None:
+        await _api_engine.dispose()
+    _api_engine = None
+    _api_session_factory = None
+
+
 async def get_db() -> AsyncGenerator[AsyncSession, None]:
     """获取数据库会话（用于依赖注入）."""
     session_factory = get_session_factory()
@@ -104,6 +136,9 @@ async def get_db() -> AsyncGenerator[AsyncSession, None]:
 from sitemap_monitor.models.user import User
 from sitemap_monitor.models.monitor import MonitorTask, MonitorStatus
 from sitemap_monitor.models.snapshot import SitemapSnapshot, ChangeRecord, ChangeType
+from sitemap_monitor.models.document import SitemapDocument
+from sitemap_monitor.models.url import MonitorUrl
+from sitemap_monitor.models.check_run import CheckRun, CheckOutcome
 from sitemap_monitor.models.notification import (
     NotificationChannel,
     ChannelType,
@@ -118,7 +153,9 @@ __all__ = [
     "UUIDMixin",
     "get_db",
     "get_engine",
+    "configure_engine",
     "get_session_factory",
+    "dispose_engine",
     "create_engine",
     "create_session_factory",
     "User",
@@ -127,6 +164,10 @@ __all__ = [
     "SitemapSnapshot",
     "ChangeRecord",
     "ChangeType",
+    "SitemapDocument",
+    "MonitorUrl",
+    "CheckRun",
+    "CheckOutcome",
     "NotificationChannel",
     "ChannelType",
     "MonitorTaskChannel",
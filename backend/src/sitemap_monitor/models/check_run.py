@@ -0,0 +1,51 @@
+"""检查执行记录模型."""
+
+from datetime import datetime
+from enum import Enum
+
+from sqlalchemy import DateTime, ForeignKey, Index, String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from sitemap_monitor.models import Base, UUIDMixin
+
+
+class CheckOutcome(str, Enum):
+    """检查结果."""
+
+    CHANGED = "changed"
+    UNCHANGED = "unchanged"
+    NOT_MODIFIED = "not_modified"
+    RETRY = "retry"
+    FAILED = "failed"
+    ERROR = "error"
+
+
+class CheckRun(Base, UUIDMixin):
+    """
+    检查执行记录模型.
+
+    记录每次检查的到期、入队、开始和结束时间，
+    用于统计调度延迟（开始时间 - 到期时间）和排队时间（开始时间 - 入队时间）。
+    """
+
+    __tablename__ = "check_runs"
+    __table_args__ = (Index("ix_check_runs_started_at", "started_at"),)
+
+    monitor_task_id: Mapped[str] = mapped_column(
+        String(36),
+        ForeignKey("monitor_tasks.id", ondelete="CASCADE"),
+        nullable=False,
+        index=True,
+    )
+    # 任务队列（asyncio worker 为 "asyncio"）
+    queue: Mapped[str | None] = mapped_column(String(64), nullable=True)
+    # 执行检查的 worker
+    worker: Mapped[str | None] = mapped_column(String(255), nullable=True)
+    due_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+    enqueued_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    started_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+    finished_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+    outcome: Mapped[CheckOutcome] = mapped_column(String(20), nullable=False)
+
+    def __repr__(self) -> str:
+        return f"<CheckRun {self.monitor_task_id} ({self.outcome})>"
@@ -0,0 +1,62 @@
+"""Sitemap 文档缓存模型."""
+
+from datetime import datetime
+from typing import TYPE_CHECKING, Any
+
+from sqlalchemy import DateTime, ForeignKey, LargeBinary, String, UniqueConstraint, func
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.orm import Mapped, mapped_column, relationship
+
+from sitemap_monitor.models import Base, UUIDMixin
+
+if TYPE_CHECKING:
+    from sitemap_monitor.models.monitor import MonitorTask
+
+
+class SitemapDocument(Base, UUIDMixin):
+    """
+    Sitemap 文档状态模型.
+
+    记录监控任务涉及的每个 Sitemap 文档（根 Sitemap 及 Index 子 Sitemap）
+    的 HTTP 缓存验证器和上次的解析结果，用于条件请求和跳过未变化的子 Sitemap。
+    """
+
+    __tablename__ = "sitemap_documents"
+    __table_args__ = (
+        UniqueConstraint("monitor_task_id", "url", name="uq_sitemap_documents_monitor_url"),
+    )
+
+    monitor_task_id: Mapped[str] = mapped_column(
+        String(36),
+        ForeignKey("monitor_tasks.id", ondelete="CASCADE"),
+        nullable=False,
+        index=True,
+    )
+    url: Mapped[str] = mapped_column(String(2048), nullable=False)
+    etag: Mapped[str | None] = mapped_column(String(512), nullable=True)
+    last_modified: Mapped[str | None] = mapped_column(String(64), nullable=True)
+    # Sitemap Index 的子 Sitemap 列表
+    children: Mapped[list[dict[str, Any]] | None] = mapped_column(JSONB, nullable=True)
+    # 子 Sitemap 的 URL 列表，使用 snapshot_codec 的 URL 字符串格式编码
+    # （根 Sitemap 的 URL 保存在快照中）
+    urls_blob: Mapped[bytes | None] = mapped_column(LargeBinary, nullable=True)
+    # 父 Index 中该子 Sitemap 的 lastmod
+    index_lastmod: Mapped[str | None] = mapped_column(String(64), nullable=True)
+    # 原始响应内容的 SHA-256
+    content_hash: Mapped[str | None] = mapped_column(String(64), nullable=True)
+    # 子 Sitemap 连续临时失败的开始时间（期间沿用上次的 URL 列表）
+    failed_since: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+        onupdate=func.now(),
+        nullable=False,
+    )
+
+    # 关系
+    monitor_task: Mapped["MonitorTask"] = relationship(
+        "MonitorTask", back_populates="documents"
+    )
+
+    def __repr__(self) -> str:
+        return f"<SitemapDocument {self.url}>"
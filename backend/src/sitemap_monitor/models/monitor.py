@@ -4,7 +4,7 @@ from datetime import datetime
 from enum import Enum
 from typing import TYPE_CHECKING
 
-from sqlalchemy import DateTime, ForeignKey, Integer, String, Text
+from sqlalchemy import Boolean, DateTime, ForeignKey, Index, Integer, String, Text, func
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from sitemap_monitor.models import Base, TimestampMixin, UUIDMixin
@@ -12,6 +12,7 @@ from sitemap_monitor.models import Base, TimestampMixin, UUIDMixin
 if TYPE_CHECKING:
     from sitemap_monitor.models.user import User
     from sitemap_monitor.models.snapshot import SitemapSnapshot, ChangeRecord
+    from sitemap_monitor.models.document import SitemapDocument
     from sitemap_monitor.models.notification import MonitorTaskChannel
 
 
@@ -27,6 +28,10 @@ class MonitorTask(Base, UUIDMixin, TimestampMixin):
     """监控任务模型."""
 
     __tablename__ = "monitor_tasks"
+    __table_args__ = (
+        # 调度器按状态和下次检查时间做范围查询
+        Index("ix_monitor_tasks_status_next_check_at", "status", "next_check_at"),
+    )
 
     user_id: Mapped[str] = mapped_column(
         String(36),
@@ -39,12 +44,31 @@ class MonitorTask(Base, UUIDMixin, TimestampMixin):
     check_interval_minutes: Mapped[int] = mapped_column(
         Integer, default=60, nullable=False
     )
+    # 自适应检查间隔：根据变更频率在上下限之间调整实际间隔
+    adaptive_interval: Mapped[bool] = mapped_column(
+        Boolean, default=False, server_default="false", nullable=False
+    )
+    min_interval_minutes: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    max_interval_minutes: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    effective_interval_minutes: Mapped[int | None] = mapped_column(Integer, nullable=True)
     status: Mapped[MonitorStatus] = mapped_column(
         String(20), default=MonitorStatus.ACTIVE.value, nullable=False, index=True
     )
     last_check_at: Mapped[datetime | None] = mapped_column(
         DateTime(timezone=True), nullable=True
     )
+    # 下次检查时间（last_check_at + 检查间隔），由 monitor_service 维护
+    next_check_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now(), nullable=False
+    )
+    # 检查租约到期时间：派发后到检查完成前不会被重复派发，
+    # worker 崩溃时租约过期后自动释放
+    checking_until: Mapped[datetime | None] = mapped_column(
+        DateTime(timezone=True), nullable=True
+    )
+    # 最近一次完整检查的规模（URL 数和获取+解析耗时），用于选择任务队列
+    last_url_count: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    last_check_duration_ms: Mapped[int | None] = mapped_column(Integer, nullable=True)
     last_error: Mapped[str | None] = mapped_column(Text, nullable=True)
     error_count: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
 
@@ -59,6 +83,16 @@ class MonitorTask(Base, UUIDMixin, TimestampMixin):
     task_channels: Mapped[list["MonitorTaskChannel"]] = relationship(
         "MonitorTaskChannel", back_populates="monitor_task", cascade="all, delete-orphan"
     )
+    documents: Mapped[list["SitemapDocument"]] = relationship(
+        "SitemapDocument", back_populates="monitor_task", cascade="all, delete-orphan"
+    )
+
+    @property
+    def current_interval_minutes(self) -> int:
+        """当前生效的检查间隔（分钟）."""
+        if self.adaptive_interval and self.effective_interval_minutes:
+            return self.effective_interval_minutes
+        return self.check_interval_minutes
 
     def __repr__(self) -> str:
         return f"<MonitorTask {self.name}>"
@@ -4,7 +4,7 @@ from datetime import datetime
 from enum import Enum
 from typing import TYPE_CHECKING, Any
 
-from sqlalchemy import DateTime, ForeignKey, Integer, String, func
+from sqlalchemy import DateTime, ForeignKey, Integer, LargeBinary, String, func
 from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
@@ -24,7 +24,17 @@ class ChangeType(str, Enum):
 
 
 class SitemapSnapshot(Base, UUIDMixin):
-    """Sitemap 快照模型."""
+    """
+    Sitemap 快照模型.
+
+    只在 URL 列表变化（或首次检查）时写入新快照；
+    之后结果相同的检查只更新 last_seen_at 和 check_count。
+
+    快照按链存储：关键帧在 urls_blob 中保存完整的 URL 列表
+    （压缩二进制编码，见 snapshot_codec），
+    之后的增量快照只在 delta 中保存相对上一个快照的新增、删除和修改，
+    还原时从关键帧依次应用链上的增量（见 snapshot_service.load_snapshot_entries）。
+    """
 
     __tablename__ = "sitemap_snapshots"
 
@@ -36,7 +46,28 @@ class SitemapSnapshot(Base, UUIDMixin):
     )
     url_count: Mapped[int] = mapped_column(Integer, nullable=False)
     url_hash: Mapped[str] = mapped_column(String(64), nullable=False)
-    urls: Mapped[list[dict[str, Any]]] = mapped_column(JSONB, nullable=False)
+    # 完整 URL 列表（仅关键帧），压缩二进制编码，保存 URL 字典 ID
+    urls_blob: Mapped[bytes | None] = mapped_column(LargeBinary, nullable=True)
+    # 旧格式的完整 URL 列表，压缩任务会将其改写为 urls_blob
+    urls: Mapped[list[dict[str, Any]] | None] = mapped_column(JSONB, nullable=True)
+    # 增量快照所属的关键帧，关键帧为 None
+    keyframe_id: Mapped[str | None] = mapped_column(
+        String(36),
+        ForeignKey("sitemap_snapshots.id", ondelete="CASCADE"),
+        nullable=True,
+        index=True,
+    )
+    # 在链中的位置，关键帧为 0
+    chain_index: Mapped[int] = mapped_column(
+        Integer, default=0, server_default="0", nullable=False
+    )
+    # 相对上一个快照的变化（仅增量快照）：
+    # {"added": [[URL ID, lastmod, changefreq, priority]], "removed": [URL ID], "modified": [...]}
+    delta: Mapped[dict[str, Any] | None] = mapped_column(JSONB, nullable=True)
+    # 存储格式：1 = 保存 URL 字符串（旧格式），2 = 保存 URL 字典 ID
+    storage_version: Mapped[int] = mapped_column(
+        Integer, default=2, server_default="1", nullable=False
+    )
     fetch_duration_ms: Mapped[int] = mapped_column(Integer, nullable=False)
     parse_duration_ms: Mapped[int] = mapped_column(Integer, nullable=False)
     created_at: Mapped[datetime] = mapped_column(
@@ -45,12 +76,27 @@ class SitemapSnapshot(Base, UUIDMixin):
         nullable=False,
         index=True,
     )
+    # 最后一次确认结果与本快照相同的时间
+    last_seen_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+        nullable=False,
+    )
+    # 结果与本快照相同的检查次数（包括创建快照的检查）
+    check_count: Mapped[int] = mapped_column(
+        Integer, default=1, server_default="1", nullable=False
+    )
 
     # 关系
     monitor_task: Mapped["MonitorTask"] = relationship(
         "MonitorTask", back_populates="snapshots"
     )
 
+    @property
+    def is_keyframe(self) -> bool:
+        """是否为关键帧."""
+        return self.keyframe_id is None
+
     def __repr__(self) -> str:
         return f"<SitemapSnapshot {self.id} ({self.url_count} URLs)>"
 
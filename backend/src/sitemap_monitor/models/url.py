@@ -0,0 +1,32 @@
+"""URL 字典模型."""
+
+from sqlalchemy import BigInteger, ForeignKey, String, Text, UniqueConstraint
+from sqlalchemy.orm import Mapped, mapped_column
+
+from sitemap_monitor.models import Base
+
+
+class MonitorUrl(Base):
+    """
+    监控任务的 URL 字典模型.
+
+    把监控任务出现过的每个 URL 映射为整数 ID，
+    快照和增量只保存 ID，不再重复保存 URL 字符串。
+    快照不再引用的条目由清理任务删除（见 prune_url_dictionary）。
+    """
+
+    __tablename__ = "monitor_urls"
+    __table_args__ = (
+        UniqueConstraint("monitor_task_id", "url", name="uq_monitor_urls_monitor_url"),
+    )
+
+    id: Mapped[int] = mapped_column(BigInteger, primary_key=True, autoincrement=True)
+    monitor_task_id: Mapped[str] = mapped_column(
+        String(36),
+        ForeignKey("monitor_tasks.id", ondelete="CASCADE"),
+        nullable=False,
+    )
+    url: Mapped[str] = mapped_column(Text, nullable=False)
+
+    def __repr__(self) -> str:
+        return f"<MonitorUrl {self.id} {self.url}>"
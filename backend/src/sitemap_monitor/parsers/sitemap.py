@@ -1,8 +1,10 @@
 """Sitemap 解析器."""
 
+import gzip
 import io
+import zlib
 from dataclasses import dataclass
-from typing import Iterator
+from typing import IO, Iterator
 
 from lxml import etree
 
@@ -10,6 +12,11 @@ from lxml import etree
 SITEMAP_NS = "http://www.sitemaps.org/schemas/sitemap/0.9"
 SITEMAP_INDEX_NS = "http://www.sitemaps.org/schemas/sitemap/0.9"
 
+# gzip 文件头
+GZIP_MAGIC = b"\x1f\x8b"
+# 流式解压时每次最多解压出的字节数
+_INFLATE_CHUNK_SIZE = 64 * 1024
+
 
 @dataclass
 class SitemapUrl:
@@ -46,13 +53,13 @@ def parse_sitemap(content: bytes) -> Iterator[SitemapUrl]:
     适合处理包含 10 万+ URL 的大型 Sitemap。
 
     Args:
-        content: Sitemap XML 内容
+        content: Sitemap XML 内容（支持 gzip 压缩）
 
     Yields:
         SitemapUrl 对象
     """
     context = etree.iterparse(
-        io.BytesIO(content),
+        _open_content(content),
         events=("end",),
         tag=f"{{{SITEMAP_NS}}}url",
     )
@@ -78,13 +85,13 @@ def parse_sitemap_index(content: bytes) -> Iterator[SitemapIndexEntry]:
     解析 Sitemap Index XML.
 
     Args:
-        content: Sitemap Index XML 内容
+        content: Sitemap Index XML 内容（支持 gzip 压缩）
 
     Yields:
         SitemapIndexEntry 对象
     """
     context = etree.iterparse(
-        io.BytesIO(content),
+        _open_content(content),
         events=("end",),
         tag=f"{{{SITEMAP_INDEX_NS}}}sitemap",
     )
@@ -101,12 +108,134 @@ def parse_sitemap_index(content: bytes) -> Iterator[SitemapIndexEntry]:
             del elem.getparent()[0]
 
 
+class SitemapStreamParser:
+    """
+    增量 Sitemap 解析器.
+
+    基于 lxml XMLPullParser，按块喂入字节，边接收边产出条目，
+    不需要先把完整文档读入内存。自动识别 urlset 和 sitemapindex，
+    并根据文件头自动识别 gzip 压缩内容（.xml.gz），边解压边解析。
+
+    用法::
+
+        parser = SitemapStreamParser()
+        for chunk in chunks:
+            for entry in parser.feed(chunk):
+                ...
+        for entry in parser.close():
+            ...
+    """
+
+    def __init__(self) -> None:
+        # 只订阅条目元素的 end 事件，减少事件回调开销
+        self._parser = etree.XMLPullParser(
+            events=("end",),
+            tag=(f"{{{SITEMAP_NS}}}url", f"{{{SITEMAP_INDEX_NS}}}sitemap"),
+        )
+        # 根元素为 sitemapindex 时为 True，尚未确定时为 None
+        self.is_index: bool | None = None
+        # 内容为 gzip 压缩时为 True，读到文件头之前为 None
+        self.is_gzip: bool | None = None
+        self._head = b""
+        self._decompressor: "zlib._Decompress | None" = None
+
+    def feed(self, data: bytes) -> list[SitemapUrl | SitemapIndexEntry]:
+        """喂入一块数据，返回其中已完整解析的条目."""
+        if self.is_gzip is None:
+            # 凑够文件头再判断是否为 gzip
+            self._head += data
+            if len(self._head) < len(GZIP_MAGIC):
+                return []
+            data, self._head = self._head, b""
+            self.is_gzip = data.startswith(GZIP_MAGIC)
+            if self.is_gzip:
+                self._decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+
+        if self._decompressor is None:
+            self._parser.feed(data)
+            return list(self._read_events())
+
+        # 分段解压，每段解压后立即解析并释放，避免整体膨胀
+        entries: list[SitemapUrl | SitemapIndexEntry] = []
+        while data:
+            piece = self._decompressor.decompress(data, _INFLATE_CHUNK_SIZE)
+            data = self._decompressor.unconsumed_tail
+            if self._decompressor.eof:
+                # 多成员 gzip：剩余数据属于下一个成员
+                data = self._decompressor.unused_data
+                if data:
+                    self._decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+            if piece:
+                self._parser.feed(piece)
+                entries.extend(self._read_events())
+        return entries
+
+    def close(self) -> list[SitemapUrl | SitemapIndexEntry]:
+        """结束解析，返回剩余条目."""
+        entries: list[SitemapUrl | SitemapIndexEntry] = []
+        if self._head:
+            # 内容不足以构成文件头，按普通 XML 处理
+            self.is_gzip = False
+            self._parser.feed(self._head)
+            self._head = b""
+        if self._decompressor is not None:
+            piece = self._decompressor.flush()
+            if piece:
+                self._parser.feed(piece)
+            if not self._decompressor.eof:
+                raise EOFError("gzip 内容不完整")
+
+        root = self._parser.close()
+        if root is not None:
+            self.is_index = root.tag == f"{{{SITEMAP_INDEX_NS}}}sitemapindex"
+        entries.extend(self._read_events())
+        return entries
+
+    def _read_events(self) -> Iterator[SitemapUrl | SitemapIndexEntry]:
+        for _, elem in self._parser.read_events():
+            if elem.tag == f"{{{SITEMAP_NS}}}url":
+                self.is_index = False
+                url = elem.findtext(f"{{{SITEMAP_NS}}}loc")
+                if url:
+                    yield SitemapUrl(
+                        url=url.strip(),
+                        lastmod=_get_text(elem, "lastmod"),
+                        changefreq=_get_text(elem, "changefreq"),
+                        priority=_get_text(elem, "priority"),
+                    )
+            else:
+                self.is_index = True
+                loc = elem.findtext(f"{{{SITEMAP_INDEX_NS}}}loc")
+                if loc:
+                    yield SitemapIndexEntry(
+                        loc=loc.strip(),
+                        lastmod=_get_text(elem, "lastmod", ns=SITEMAP_INDEX_NS),
+                    )
+
+            # 释放已处理的条目
+            elem.clear()
+            while elem.getprevious() is not None:
+                del elem.getparent()[0]
+
+
+def is_gzip_content(content: bytes) -> bool:
+    """检测内容是否为 gzip 压缩."""
+    return content.startswith(GZIP_MAGIC)
+
+
+def _open_content(content: bytes) -> IO[bytes]:
+    """打开内容供 iterparse 读取，gzip 内容在读取时流式解压."""
+    if is_gzip_content(content):
+        return gzip.GzipFile(fileobj=io.BytesIO(content))
+    return io.BytesIO(content)
+
+
 def is_sitemap_index(content: bytes) -> bool:
     """
     检测内容是否为 Sitemap Index.
 
     Args:
-        content: XML 内容
+        content: XML 内容（支持 gzip 压缩）
 
     Returns:
         True 如果是 Sitemap Index
@@ -114,7 +243,7 @@ def is_sitemap_index(content: bytes) -> bool:
     try:
         # 只解析前几个元素来判断类型
         context = etree.iterparse(
-            io.BytesIO(content),
+            _open_content(content),
             events=("start",),
         )
         for _, elem in context:
@@ -125,7 +254,7 @@ def is_sitemap_index(content: bytes) -> bool:
                 return False
             # 只检查根元素
             break
-    except etree.XMLSyntaxError:
+    except (etree.XMLSyntaxError, OSError, EOFError):
         pass
     return False
 
@@ -1,10 +1,26 @@
 """Celery 任务模块."""
 
+import asyncio
+from collections.abc import Coroutine
+from typing import Any, TypeVar
+
 from celery import Celery
+from celery.signals import worker_process_init, worker_process_shutdown, worker_shutdown
 
 from sitemap_monitor.config import get_settings
+from sitemap_monitor.core.http_client import close_http_client
+from sitemap_monitor.logging import get_logger
+from sitemap_monitor.models import dispose_engine
+
+T = TypeVar("T")
 
 settings = get_settings()
+logger = get_logger(__name__)
+
+# 检查任务队列：普通、规模较大（耗时长）和手动触发（高优先级）
+CHECK_QUEUE = "checks"
+HEAVY_CHECK_QUEUE = "checks_heavy"
+PRIORITY_CHECK_QUEUE = "checks_priority"
 
 # 创建 Celery 应用
 celery_app = Celery(
@@ -27,6 +43,11 @@ celery_app.conf.update(
     task_acks_late=True,
     task_reject_on_worker_lost=True,
     imports=["sitemap_monitor.tasks.scheduler", "sitemap_monitor.tasks.cleanup"],
+    # 检查任务默认进入普通队列，调度器按规模改投 heavy 队列；
+    # 调度和清理任务使用默认队列
+    task_routes={
+        "sitemap_monitor.tasks.scheduler.check_sitemap_task": {"queue": CHECK_QUEUE},
+    },
 )
 
 # Celery Beat 定时任务配置
@@ -39,4 +60,85 @@ celery_app.conf.beat_schedule = {
         "task": "sitemap_monitor.tasks.cleanup.cleanup_old_data",
         "schedule": 86400.0,  # 每天执行
     },
+    "compact-snapshots-daily": {
+        "task": "sitemap_monitor.tasks.cleanup.compact_snapshots",
+        "schedule": 86400.0,  # 每天执行
+    },
 }
+
+
+# 当前 worker 进程的持久事件循环
+_worker_loop: asyncio.AbstractEventLoop | None = None
+
+
+def _get_worker_loop() -> asyncio.AbstractEventLoop:
+    """获取（必要时创建）当前进程的持久事件循环."""
+    global _worker_loop
+    if _worker_loop is None or _worker_loop.is_closed():
+        _worker_loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(_worker_loop)
+    return _worker_loop
+
+
+@worker_process_init.connect
+def init_worker_process(**kwargs: Any) -> None:
+    """
+    worker 子进程启动.
+
+    为进程创建持久事件循环；数据库引擎和 HTTP 客户端在首次使用时
+    绑定到该事件循环，并在进程内的所有任务间复用。
+    """
+    _get_worker_loop()
+    logger.info("Worker process initialized")
+
+
+@worker_process_shutdown.connect
+@worker_shutdown.connect
+def shutdown_worker_process(**kwargs: Any) -> None:
+    """worker 进程退出，关闭共享 HTTP 客户端和数据库连接池."""
+    global _worker_loop
+    loop = _worker_loop
+    if loop is None or loop.is_closed():
+        return
+
+    async def _close() -> None:
+        await close_http_client()
+        await dispose_engine()
+
+    try:
+        loop.run_until_complete(_close())
+    finally:
+        loop.close()
+        _worker_loop = None
+    logger.info("Worker process resources released")
+
+
+def run_async(coro: Coroutine[Any, Any, T]) -> T:
+    """
+    在 Celery 任务中运行协程.
+
+    使用 worker 进程的持久事件循环运行，事件循环上的数据库连接池
+    和共享 HTTP 客户端（keep-alive 连接、主机限流状态）跨任务复用，
+    不再为每个任务重新建立连接；进程退出时统一释放。
+    需要 prefork 或 solo 进程池（同一进程内任务串行执行）。
+
+    协程异常退出（包括软超时 SoftTimeLimitExceeded）时，取消并等待事件循环上
+    剩余的任务，避免它们在下一个任务中继续运行并占用数据库连接。
+    """
+    loop = _get_worker_loop()
+    try:
+        return loop.run_until_complete(coro)
+    except BaseException:
+        _cancel_pending_tasks(loop)
+        raise
+
+
+def _cancel_pending_tasks(loop: asyncio.AbstractEventLoop) -> None:
+    """取消事件循环上所有未完成的任务，并等待它们结束."""
+    pending = asyncio.all_tasks(loop)
+    if not pending:
+        return
+    for task in pending:
+        task.cancel()
+    loop.run_until_complete(asyncio.gather(*pending, return_exceptions=True))
+    logger.warning("Cancelled pending tasks after task failure", count=len(pending))
@@ -1,17 +1,23 @@
 """数据清理任务."""
 
-import asyncio
 from datetime import datetime, timedelta, timezone
 
 from sqlalchemy import delete
 
-from sitemap_monitor.tasks import celery_app
+from sitemap_monitor.tasks import celery_app, run_async
 from sitemap_monitor.logging import get_logger
 from sitemap_monitor.config import get_settings
+from sitemap_monitor.core.snapshot_service import (
+    compact_monitor_snapshots,
+    delete_expired_snapshots,
+    get_expired_snapshot_monitor_ids,
+    get_uncompacted_monitor_ids,
+    prune_url_dictionary,
+)
 from sitemap_monitor.models import (
-    SitemapSnapshot,
     ChangeRecord,
     NotificationLog,
+    CheckRun,
     get_session_factory,
 )
 
@@ -25,24 +31,37 @@ def cleanup_old_data() -> dict:
 
     每天执行，删除超过保留期限的快照和变更记录。
     """
-    return asyncio.run(_cleanup_old_data_async())
+    return run_async(_cleanup_old_data_async())
 
 
 async def _cleanup_old_data_async() -> dict:
     """异步清理过期数据."""
     settings = get_settings()
     session_factory = get_session_factory()
+    now = datetime.now(timezone.utc)
 
+    # 清理快照（最后确认时间超过 90 天），始终保留每个监控任务的最新快照作为比较基准，
+    # 并删除剩余快照不再引用的 URL 字典条目；
+    # 每个监控任务在快照链锁内单独提交，只短暂阻塞该任务的检查
+    snapshot_cutoff = now - timedelta(days=settings.snapshot_retention_days)
     async with session_factory() as db:
-        now = datetime.now(timezone.utc)
-
-        # 清理快照（90 天）
-        snapshot_cutoff = now - timedelta(days=settings.snapshot_retention_days)
-        result = await db.execute(
-            delete(SitemapSnapshot).where(SitemapSnapshot.created_at < snapshot_cutoff)
-        )
-        deleted_snapshots = result.rowcount
+        monitor_ids = await get_expired_snapshot_monitor_ids(db, snapshot_cutoff)
+
+    deleted_snapshots = 0
+    pruned_urls = 0
+    for monitor_id in monitor_ids:
+        async with session_factory() as db:
+            try:
+                deleted_snapshots += await delete_expired_snapshots(
+                    db, monitor_id, snapshot_cutoff
+                )
+                pruned_urls += await prune_url_dictionary(db, monitor_id)
+                await db.commit()
+            except Exception as e:
+                await db.rollback()
+                logger.error("Snapshot cleanup failed", monitor_id=monitor_id, error=str(e))
 
+    async with session_factory() as db:
         # 清理变更记录（90 天）
         change_cutoff = now - timedelta(days=settings.snapshot_retention_days)
         result = await db.execute(
@@ -57,17 +76,66 @@ async def _cleanup_old_data_async() -> dict:
         )
         deleted_logs = result.rowcount
 
+        # 清理检查执行记录（14 天）
+        run_cutoff = now - timedelta(days=settings.check_run_retention_days)
+        result = await db.execute(
+            delete(CheckRun).where(CheckRun.started_at < run_cutoff)
+        )
+        deleted_runs = result.rowcount
+
         await db.commit()
 
         logger.info(
             "Data cleanup completed",
             deleted_snapshots=deleted_snapshots,
+            pruned_urls=pruned_urls,
             deleted_changes=deleted_changes,
             deleted_logs=deleted_logs,
+            deleted_runs=deleted_runs,
         )
 
         return {
             "deleted_snapshots": deleted_snapshots,
+            "pruned_urls": pruned_urls,
             "deleted_changes": deleted_changes,
             "deleted_logs": deleted_logs,
+            "deleted_runs": deleted_runs,
         }
+
+
+@celery_app.task
+def compact_snapshots() -> dict:
+    """
+    压缩快照存储.
+
+    每天执行，把完整快照按关键帧间隔改写为增量链（包括升级前写入的完整快照）。
+    """
+    return run_async(_compact_snapshots_async())
+
+
+async def _compact_snapshots_async() -> dict:
+    """异步压缩快照存储，每个监控任务单独提交."""
+    settings = get_settings()
+    session_factory = get_session_factory()
+
+    async with session_factory() as db:
+        monitor_ids = await get_uncompacted_monitor_ids(
+            db, settings.snapshot_compaction_batch_size
+        )
+
+    rewritten = 0
+    for monitor_id in monitor_ids:
+        async with session_factory() as db:
+            try:
+                rewritten += await compact_monitor_snapshots(db, monitor_id)
+                await db.commit()
+            except Exception as e:
+                await db.rollback()
+                logger.error("Snapshot compaction failed", monitor_id=monitor_id, error=str(e))
+
+    logger.info(
+        "Snapshot compaction completed",
+        monitors=len(monitor_ids),
+        rewritten_snapshots=rewritten,
+    )
+    return {"monitors": len(monitor_ids), "rewritten_snapshots": rewritten}
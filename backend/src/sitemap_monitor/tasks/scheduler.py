@@ -1,48 +1,144 @@
 """定时任务调度器."""
 
-import asyncio
-from datetime import datetime, timedelta, timezone
+import json
+import random
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
 
-from celery import shared_task
 from sqlalchemy import select
 
-from sitemap_monitor.tasks import celery_app
+from sitemap_monitor.config import get_settings
+from sitemap_monitor.tasks import (
+    CHECK_QUEUE,
+    HEAVY_CHECK_QUEUE,
+    PRIORITY_CHECK_QUEUE,
+    celery_app,
+    run_async,
+)
 from sitemap_monitor.logging import get_logger
 from sitemap_monitor.models import (
     MonitorTask,
     MonitorStatus,
-    ChangeType,
-    create_session_factory,
+    CheckOutcome,
+    get_session_factory,
 )
 from sitemap_monitor.core.checker import check_sitemap
+from sitemap_monitor.core.check_run_service import CheckRunContext, record_check_run
+from sitemap_monitor.core.document_service import (
+    load_document_states,
+    save_document_states,
+)
+from sitemap_monitor.core.differ import ChangeResult
 from sitemap_monitor.core.snapshot_service import (
+    compare_snapshot_entries,
     create_snapshot,
-    compare_with_previous,
     create_change_record,
+    get_latest_snapshot,
+    load_snapshot_entries,
+    lock_snapshot_chain,
+    touch_latest_snapshot,
+)
+from sitemap_monitor.core.url_dictionary import UrlDictionary
+from sitemap_monitor.core.url_hash import format_url_hash
+from sitemap_monitor.core.monitor_service import (
+    DueMonitor,
+    adapt_check_interval,
+    claim_due_monitors,
+    mark_monitor_checked,
+    mark_monitor_retrying,
+    record_check_size,
+    release_monitor_check,
 )
-from sitemap_monitor.core.monitor_service import mark_monitor_checked
 from sitemap_monitor.core.notifier import notify_change
 
 logger = get_logger(__name__)
+settings = get_settings()
+
+
+def compute_retry_countdown(retries: int) -> float:
+    """
+    计算第 retries 次重试前的等待秒数.
+
+    指数退避（sitemap_retry_delay * 2^retries，上限 sitemap_retry_max_delay），
+    并在 [delay/2, delay] 区间内随机抖动，避免同一主机的重试同时到达。
+    """
+    delay = min(
+        settings.sitemap_retry_max_delay,
+        settings.sitemap_retry_delay * (2 ** retries),
+    )
+    return random.uniform(delay / 2, delay)
+
 
+def _header_time(value: float | None) -> datetime | None:
+    """把消息头中的时间戳转换为 datetime."""
+    if value is None:
+        return None
+    return datetime.fromtimestamp(value, tz=timezone.utc)
 
-@celery_app.task(bind=True, max_retries=3, default_retry_delay=60)
+
+@celery_app.task(
+    bind=True,
+    max_retries=settings.sitemap_max_retries,
+    default_retry_delay=settings.sitemap_retry_delay,
+)
 def check_sitemap_task(self, monitor_id: str) -> dict:
     """
     检查单个 Sitemap 任务.
 
+    临时性失败不在 worker 内等待，而是通过 Celery countdown 重新排队，
+    立即释放 worker。
+
     Args:
         monitor_id: 监控任务 ID
 
     Returns:
         检查结果
     """
-    return asyncio.run(_check_sitemap_async(monitor_id))
+    run = CheckRunContext(
+        queue=(self.request.delivery_info or {}).get("routing_key"),
+        worker=self.request.hostname,
+        due_at=_header_time(self.request.get("due_at")),
+        enqueued_at=_header_time(self.request.get("enqueued_at")),
+    )
+    result = run_async(run_sitemap_check(monitor_id, retries=self.request.retries, run=run))
+    if result.get("retry"):
+        countdown = result["countdown"]
+        logger.info(
+            "Sitemap check retry scheduled",
+            monitor_id=monitor_id,
+            retries=self.request.retries + 1,
+            countdown=round(countdown, 1),
+        )
+        now = time.time()
+        raise self.retry(
+            countdown=countdown,
+            headers={"enqueued_at": now, "due_at": now + countdown},
+        )
+    return result
 
 
-async def _check_sitemap_async(monitor_id: str) -> dict:
-    """异步检查 Sitemap."""
-    session_factory = create_session_factory()
+async def run_sitemap_check(
+    monitor_id: str,
+    retries: int = 0,
+    run: CheckRunContext | None = None,
+) -> dict:
+    """
+    执行一次 Sitemap 检查（Celery 检查任务和 asyncio worker 共用）.
+
+    调用方负责重试：结果包含 retry=True 时按 countdown 秒后重新执行。
+
+    Args:
+        monitor_id: 监控任务 ID
+        retries: 已重试次数
+        run: 调度信息，用于记录检查执行记录
+
+    Returns:
+        检查结果；临时性失败且未超过重试上限时包含 retry=True
+    """
+    session_factory = get_session_factory()
+    run = run or CheckRunContext()
+    due_at = run.due_at
 
     async with session_factory() as db:
         try:
@@ -56,51 +152,151 @@ async def _check_sitemap_async(monitor_id: str) -> dict:
                 logger.warning("Monitor not found", monitor_id=monitor_id)
                 return {"success": False, "error": "监控任务不存在"}
 
+            # 未提供到期时间时以领取前的下次检查时间为准
+            due_at = due_at or monitor.next_check_at
+
             if monitor.status != MonitorStatus.ACTIVE.value:
+                release_monitor_check(monitor)
+                await db.commit()
                 logger.info("Monitor not active", monitor_id=monitor_id, status=monitor.status)
                 return {"success": False, "error": "监控任务未激活"}
 
             # 检查 Sitemap
             logger.info("Checking sitemap", monitor_id=monitor_id, url=monitor.sitemap_url)
-            check_result = await check_sitemap(monitor.sitemap_url)
+            documents = await load_document_states(db, monitor.id)
+            # 结束只读事务，网络请求期间不占用数据库连接
+            await db.commit()
+            check_result = await check_sitemap(monitor.sitemap_url, documents)
 
             if not check_result.success:
-                # 标记检查失败
-                await mark_monitor_checked(db, monitor, success=False, error=check_result.error)
+                will_retry = (
+                    check_result.retryable and retries < settings.sitemap_max_retries
+                )
+                countdown = None
+                if will_retry:
+                    # 不早于服务器通过 Retry-After 要求的时间
+                    countdown = max(
+                        compute_retry_countdown(retries), check_result.retry_after or 0
+                    )
+                    # 保存失败状态，检查租约延长到重试之后
+                    await mark_monitor_retrying(
+                        db, monitor, error=check_result.error, retry_in=countdown
+                    )
+                else:
+                    # 标记检查失败
+                    await mark_monitor_checked(
+                        db, monitor, success=False, error=check_result.error
+                    )
+                record_check_run(
+                    db,
+                    monitor.id,
+                    run,
+                    due_at,
+                    CheckOutcome.RETRY if will_retry else CheckOutcome.FAILED,
+                )
                 await db.commit()
                 logger.warning(
                     "Sitemap check failed",
                     monitor_id=monitor_id,
                     error=check_result.error,
+                    will_retry=will_retry,
                 )
-                return {"success": False, "error": check_result.error}
+                return {
+                    "success": False,
+                    "error": check_result.error,
+                    "retry": will_retry,
+                    "countdown": countdown,
+                }
+
+            await save_document_states(db, monitor.id, check_result.documents)
+
+            # 所有文档均未变化（304 或内容指纹相同）：跳过比较和快照写入
+            if check_result.not_modified:
+                await touch_latest_snapshot(db, monitor.id)
+                await adapt_check_interval(db, monitor, changed=False)
+                await mark_monitor_checked(db, monitor, success=True)
+                record_check_run(db, monitor.id, run, due_at, CheckOutcome.NOT_MODIFIED)
+                await db.commit()
+                logger.info("Sitemap not modified", monitor_id=monitor_id)
+                return {
+                    "success": True,
+                    "not_modified": True,
+                    "has_changes": False,
+                }
+
+            record_check_size(
+                monitor,
+                url_count=check_result.url_count,
+                duration_ms=check_result.fetch_duration_ms + check_result.parse_duration_ms,
+            )
+
+            # URL 列表（含 lastmod 等字段）与最新快照相同：只更新最新快照的确认时间，
+            # 不写入新快照和无变化的变更记录；指纹已在解析时累加，无需再遍历 URL 列表
+            url_hash = format_url_hash(check_result.url_hash)
+            if await touch_latest_snapshot(db, monitor.id, url_hash):
+                await adapt_check_interval(db, monitor, changed=False)
+                await mark_monitor_checked(db, monitor, success=True)
+                record_check_run(db, monitor.id, run, due_at, CheckOutcome.UNCHANGED)
+                await db.commit()
+                logger.info("Sitemap unchanged", monitor_id=monitor_id)
+                return {
+                    "success": True,
+                    "url_count": check_result.url_count,
+                    "has_changes": False,
+                    "added_count": 0,
+                    "removed_count": 0,
+                    "modified_count": 0,
+                }
+
+            # 锁定快照链直到提交，避免与清理、压缩任务同时改写链；
+            # 在写入 URL 字典之前加锁，与清理、压缩的加锁顺序一致
+            await lock_snapshot_chain(db, monitor.id)
+
+            # 把 URL 映射为字典 ID（新 URL 批量写入字典），并还原上一个快照
+            dictionary = UrlDictionary(monitor.id)
+            entries = await dictionary.to_entries(db, check_result.urls)
+            old_snapshot = await get_latest_snapshot(db, monitor.id)
+            old_entries = (
+                await load_snapshot_entries(db, old_snapshot, dictionary)
+                if old_snapshot
+                else None
+            )
 
-            # 创建快照
+            # 创建快照（相对上一个快照只写入增量，按间隔写入关键帧）
             snapshot = await create_snapshot(
                 db=db,
                 monitor_task_id=monitor.id,
-                urls=check_result.urls,
+                entries=entries,
+                url_count=len(check_result.urls),
+                url_hash=url_hash,
                 fetch_duration_ms=check_result.fetch_duration_ms,
                 parse_duration_ms=check_result.parse_duration_ms,
+                previous=old_snapshot,
+                previous_entries=old_entries,
             )
 
-            # 与上一个快照比较
-            change_result, old_snapshot = await compare_with_previous(
-                db, monitor.id, snapshot
-            )
+            # 与上一个快照比较（按字典 ID 比较，只查询变化条目的 URL）
+            if old_entries is None:
+                change_result = ChangeResult(has_changes=False)
+            else:
+                change_result = await compare_snapshot_entries(
+                    db, old_entries, entries, dictionary
+                )
 
-            # 创建变更记录
+            # 创建变更记录（只有 changefreq / priority 变化时只写入快照）
             is_initial = old_snapshot is None
-            change_record = await create_change_record(
-                db=db,
-                monitor_task_id=monitor.id,
-                old_snapshot=old_snapshot,
-                new_snapshot=snapshot,
-                change_result=change_result,
-                is_initial=is_initial,
-            )
+            if change_result.has_changes or is_initial:
+                change_record = await create_change_record(
+                    db=db,
+                    monitor_task_id=monitor.id,
+                    old_snapshot=old_snapshot,
+                    new_snapshot=snapshot,
+                    change_result=change_result,
+                    is_initial=is_initial,
+                )
 
-            # 标记检查成功
+            # 标记检查成功（按本次是否变化调整自适应间隔）
+            await adapt_check_interval(db, monitor, changed=change_result.has_changes)
             await mark_monitor_checked(db, monitor, success=True)
 
             # 如果有变更，发送通知
@@ -114,6 +310,13 @@ async def _check_sitemap_async(monitor_id: str) -> dict:
                     modified=change_result.modified_count,
                 )
 
+            record_check_run(
+                db,
+                monitor.id,
+                run,
+                due_at,
+                CheckOutcome.CHANGED if change_result.has_changes else CheckOutcome.UNCHANGED,
+            )
             await db.commit()
 
             return {
@@ -128,6 +331,12 @@ async def _check_sitemap_async(monitor_id: str) -> dict:
         except Exception as e:
             await db.rollback()
             logger.error("Sitemap check error", monitor_id=monitor_id, error=str(e))
+            if due_at is not None:
+                try:
+                    record_check_run(db, monitor_id, run, due_at, CheckOutcome.ERROR)
+                    await db.commit()
+                except Exception:
+                    await db.rollback()
             raise
 
 
@@ -138,43 +347,228 @@ def dispatch_pending_checks() -> dict:
 
     每分钟执行，检查哪些任务需要执行检查。
     """
-    return asyncio.run(_dispatch_pending_checks_async())
+    return run_async(_dispatch_pending_checks_async())
 
 
 async def _dispatch_pending_checks_async() -> dict:
-    """异步调度待检查任务."""
-    session_factory = create_session_factory()
+    """
+    异步调度待检查任务.
 
-    async with session_factory() as db:
-        now = datetime.now(timezone.utc)
+    领取已到期和即将在下一个调度周期内到期的任务，
+    按各自的下次检查时间延时派发，使检查均匀分布在整个周期内。
+    """
+    if settings.check_worker_mode == "asyncio":
+        # 由 sitemap-monitor worker 直接领取到期任务
+        return {"dispatched": 0, "skipped": True}
+
+    # 背压：worker 处理不过来时减少或暂停派发，未派发的任务保持到期状态，
+    # 下一轮继续领取，不会在队列中堆积重复任务。
+    # 普通队列和 heavy 队列由不同的 worker 处理，按各自的积压分别限制
+    batch_size = settings.dispatch_batch_size
+    limits = {CHECK_QUEUE: batch_size, HEAVY_CHECK_QUEUE: batch_size}
+    stats = measure_check_queues()
+    if stats is not None:
+        logger.info(
+            "Check queue stats",
+            depths=stats.depths,
+            reserved=stats.reserved,
+            lags={queue: round(lag, 1) for queue, lag in stats.lags.items()},
+        )
+        for queue, max_depth in (
+            (CHECK_QUEUE, settings.dispatch_max_queue_depth),
+            (HEAVY_CHECK_QUEUE, settings.dispatch_max_heavy_queue_depth),
+        ):
+            if stats.lag_seconds(queue) > settings.dispatch_max_queue_lag_seconds:
+                limits[queue] = 0
+            else:
+                limits[queue] = max(min(batch_size, max_depth - stats.depth(queue)), 0)
+            if limits[queue] == 0:
+                logger.warning(
+                    "Dispatch throttled, check queue backed up",
+                    queue=queue,
+                    depth=stats.depth(queue),
+                    lag_seconds=round(stats.lag_seconds(queue), 1),
+                )
+
+    queue_stats = (
+        {
+            "queue_depth": {queue: stats.depth(queue) for queue in limits},
+            "queue_lag_seconds": {queue: stats.lag_seconds(queue) for queue in limits},
+        }
+        if stats is not None
+        else {}
+    )
+    throttled = any(limit < batch_size for limit in limits.values())
+    if not any(limits.values()):
+        return {"dispatched": 0, "throttled": True, **queue_stats}
 
-        # 查找需要检查的监控任务
-        # 条件：状态为 active，且（从未检查过 或 上次检查时间 + 间隔 <= 当前时间）
-        result = await db.execute(
-            select(MonitorTask).where(
-                MonitorTask.status == MonitorStatus.ACTIVE.value,
+    session_factory = get_session_factory()
+
+    async with session_factory() as db:
+        # 领取到期且未在检查中的监控任务（走 status + next_check_at 索引），
+        # 加上检查租约后再派发，检查完成前不会被重复派发。
+        # heavy 队列积压时不领取 heavy 任务；两类任务合计不超过 dispatch_batch_size
+        due_monitors: list[DueMonitor] = []
+        if limits[HEAVY_CHECK_QUEUE]:
+            due_monitors += await claim_due_monitors(
+                db,
+                limits[HEAVY_CHECK_QUEUE],
+                lookahead_seconds=settings.dispatch_lookahead_seconds,
+                heavy=True,
             )
+        normal_limit = min(limits[CHECK_QUEUE], batch_size - len(due_monitors))
+        if normal_limit > 0:
+            due_monitors += await claim_due_monitors(
+                db,
+                normal_limit,
+                lookahead_seconds=settings.dispatch_lookahead_seconds,
+                heavy=False,
+            )
+        await db.commit()
+
+    batch_sizes = _enqueue_checks(due_monitors)
+    return {
+        "dispatched": len(due_monitors),
+        "batch_sizes": batch_sizes,
+        # 达到单次上限，剩余的到期任务在下一轮派发
+        "limit_reached": len(due_monitors) >= batch_size,
+        "throttled": throttled,
+        **queue_stats,
+    }
+
+
+def check_queue_for(due: DueMonitor) -> str:
+    """
+    按上次检查的规模选择任务队列.
+
+    URL 数或耗时超过阈值的任务进入 heavy 队列，由独立的 worker 处理，
+    避免大型 Sitemap 长时间占用 worker 导致小任务排队。
+    """
+    if due.is_heavy:
+        return HEAVY_CHECK_QUEUE
+    return CHECK_QUEUE
+
+
+def enqueue_priority_check(monitor_id: str) -> None:
+    """派发手动触发的检查（高优先级队列）."""
+    now = time.time()
+    check_sitemap_task.apply_async(
+        (monitor_id,),
+        queue=PRIORITY_CHECK_QUEUE,
+        headers={"enqueued_at": now, "due_at": now},
+    )
+
+
+# 派发目标队列 -> 共用同一组 worker、一起参与背压判断的队列
+# （手动检查与普通检查共用 worker；heavy 队列由独立的 worker 处理）
+_BACKPRESSURE_QUEUES = {
+    CHECK_QUEUE: (PRIORITY_CHECK_QUEUE, CHECK_QUEUE),
+    HEAVY_CHECK_QUEUE: (HEAVY_CHECK_QUEUE,),
+}
+
+
+@dataclass
+class QueueStats:
+    """检查队列积压情况."""
+
+    # 各队列中等待的任务数
+    depths: dict[str, int]
+    # 各队列中最早的等待任务已等待的秒数
+    lags: dict[str, float]
+    # 各队列已被 worker 预取但尚未确认的任务数（包括等待 ETA 的延时任务和重试）
+    reserved: dict[str, int] = field(default_factory=dict)
+
+    def depth(self, queue: str) -> int:
+        """派发到 queue 的任务的积压总数（共用 worker 的队列中等待和已预取的任务）."""
+        return sum(
+            self.depths.get(name, 0) + self.reserved.get(name, 0)
+            for name in _BACKPRESSURE_QUEUES[queue]
         )
-        monitors = result.scalars().all()
 
-        dispatched = 0
-        for monitor in monitors:
-            should_check = False
+    def lag_seconds(self, queue: str) -> float:
+        """派发到 queue 的任务的最大等待时间（共用 worker 的队列中最早的任务）."""
+        return max(self.lags.get(name, 0.0) for name in _BACKPRESSURE_QUEUES[queue])
 
-            if monitor.last_check_at is None:
-                # 从未检查过
-                should_check = True
-            else:
-                # 检查是否到达间隔时间
-                next_check = monitor.last_check_at + timedelta(
-                    minutes=monitor.check_interval_minutes
-                )
-                if now >= next_check:
-                    should_check = True
 
-            if should_check:
-                check_sitemap_task.delay(monitor.id)
-                dispatched += 1
-                logger.info("Dispatched sitemap check", monitor_id=monitor.id)
+def measure_check_queues() -> QueueStats | None:
+    """
+    读取 broker（Redis）中检查队列的长度和最早任务的等待时间.
+
+    Redis 队列从左侧写入、右侧取出，最右侧的消息即最早的任务；
+    等待时间由派发时写入的 enqueued_at 消息头计算。
 
-        return {"dispatched": dispatched, "total": len(monitors)}
+    带 ETA / countdown 的任务（延时派发的检查和 self.retry 重试）会被 worker
+    立即预取并在进程内等待，不在队列列表中；这些任务和正在执行的任务一起
+    保存在 broker 的 unacked 哈希中（值为 [消息, exchange, routing_key]），
+    按 routing_key 计入各队列的 reserved。
+    无法读取时返回 None。
+    """
+    queues = (PRIORITY_CHECK_QUEUE, CHECK_QUEUE, HEAVY_CHECK_QUEUE)
+    stats = QueueStats(depths={}, lags={}, reserved=dict.fromkeys(queues, 0))
+    now = time.time()
+    try:
+        with celery_app.connection_for_read() as connection:
+            channel = connection.default_channel
+            client = channel.client
+            for queue in queues:
+                stats.depths[queue] = client.llen(queue)
+                stats.lags[queue] = 0.0
+                if not stats.depths[queue]:
+                    continue
+                raw = client.lindex(queue, -1)
+                enqueued_at = json.loads(raw).get("headers", {}).get("enqueued_at") if raw else None
+                if enqueued_at is not None:
+                    stats.lags[queue] = max(now - enqueued_at, 0.0)
+            for _, raw in client.hscan_iter(channel.unacked_key, count=1000):
+                _, _, routing_key = json.loads(raw)
+                if routing_key in stats.reserved:
+                    stats.reserved[routing_key] += 1
+    except Exception as e:
+        logger.warning("Check queue stats unavailable", error=str(e))
+        return None
+    return stats
+
+
+def _enqueue_checks(due_monitors: list[DueMonitor]) -> list[int]:
+    """
+    批量派发检查任务.
+
+    按 dispatch_chunk_size 分批，每批从连接池取出一个 producer 连续发布，
+    不再为每个任务单独获取连接和声明队列。每个任务按规模投递到对应队列。
+
+    Returns:
+        各批次的任务数
+    """
+    start_time = time.time()
+    now = datetime.now(timezone.utc)
+    chunk_size = max(settings.dispatch_chunk_size, 1)
+    batch_sizes = []
+    queue_counts: dict[str, int] = {}
+
+    for i in range(0, len(due_monitors), chunk_size):
+        chunk = due_monitors[i : i + chunk_size]
+        with celery_app.producer_or_acquire() as producer:
+            for due in chunk:
+                queue = check_queue_for(due)
+                check_sitemap_task.apply_async(
+                    (due.id,),
+                    countdown=max((due.next_check_at - now).total_seconds(), 0),
+                    queue=queue,
+                    producer=producer,
+                    headers={
+                        "enqueued_at": time.time(),
+                        "due_at": due.next_check_at.timestamp(),
+                    },
+                )
+                queue_counts[queue] = queue_counts.get(queue, 0) + 1
+        batch_sizes.append(len(chunk))
+
+    if due_monitors:
+        logger.info(
+            "Dispatched sitemap checks",
+            dispatched=len(due_monitors),
+            batch_sizes=batch_sizes,
+            queues=queue_counts,
+            duration_ms=int((time.time() - start_time) * 1000),
+        )
+    return batch_sizes
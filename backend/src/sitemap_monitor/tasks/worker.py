@@ -0,0 +1,220 @@
+"""asyncio 检查 worker.
+
+Celery prefork 模式下每个进程同一时间只执行一个检查，而检查几乎全部时间
+都在等待网络。本模块在单个事件循环中并发执行大量检查：
+直接从数据库领取到期的监控任务（与调度器相同的检查租约），
+在全局并发上限内运行检查流程，共享同一个 HTTP 连接池和数据库连接池。
+每个检查与 Celery 任务使用相同的时间限制，超时后取消，不会超出检查租约；
+数据库连接数上限按并发数设置，检查不会因等待连接池而超时。
+
+通过 ``sitemap-monitor worker`` 启动，需配置 check_worker_mode=asyncio，
+此时 Celery 调度器不再派发检查任务。
+"""
+
+import asyncio
+import os
+import signal
+import socket
+from datetime import datetime, timedelta, timezone
+
+from sitemap_monitor.config import get_settings
+from sitemap_monitor.core.check_run_service import CheckRunContext
+from sitemap_monitor.core.http_client import close_http_client
+from sitemap_monitor.core.monitor_service import claim_due_monitors
+from sitemap_monitor.logging import get_logger
+from sitemap_monitor.models import configure_engine, dispose_engine, get_session_factory
+from sitemap_monitor.tasks import celery_app
+from sitemap_monitor.tasks.scheduler import run_sitemap_check
+
+logger = get_logger(__name__)
+
+
+class CheckWorker:
+    """
+    asyncio 检查 worker.
+
+    空闲名额足够时按名额数领取到期任务；领取满额说明可能还有积压，
+    有名额空出时立即继续领取，否则按轮询间隔等待。
+    临时性失败的检查在进程内延时重试（检查租约已延长到重试之后）。
+    """
+
+    def __init__(self, concurrency: int, poll_interval: float, time_limit: float):
+        self.concurrency = concurrency
+        self.poll_interval = poll_interval
+        # 单次检查的时间限制（秒）
+        self.time_limit = time_limit
+        self._semaphore = asyncio.Semaphore(concurrency)
+        # 正在执行或等待名额的检查数
+        self._active = 0
+        self._tasks: set[asyncio.Task] = set()
+        self._stopping = asyncio.Event()
+        self._slot_freed = asyncio.Event()
+        # 检查执行记录中的 worker 名称
+        self.name = f"{socket.gethostname()}:{os.getpid()}"
+
+    def stop(self) -> None:
+        """停止领取新任务，等待进行中的检查完成后退出."""
+        if not self._stopping.is_set():
+            logger.info("Check worker stopping", active=self._active)
+            self._stopping.set()
+
+    async def run(self) -> None:
+        """运行 worker 直到收到停止信号."""
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(sig, self.stop)
+
+        logger.info(
+            "Check worker started",
+            concurrency=self.concurrency,
+            poll_interval=self.poll_interval,
+            time_limit=self.time_limit,
+        )
+        try:
+            while not self._stopping.is_set():
+                free = self.concurrency - self._active
+                claimed = await self._claim(free) if free > 0 else 0
+                # 领取满额时等待名额空出，否则等待下一次轮询
+                await self._wait(saturated=free == 0 or claimed == free)
+        finally:
+            if self._tasks:
+                await asyncio.gather(*self._tasks, return_exceptions=True)
+            await close_http_client()
+            await dispose_engine()
+            logger.info("Check worker stopped")
+
+    async def _claim(self, limit: int) -> int:
+        """领取到期任务并开始检查，返回领取数量."""
+        try:
+            async with get_session_factory()() as db:
+                due_monitors = await claim_due_monitors(db, limit)
+                await db.commit()
+        except Exception as e:
+            logger.error("Check worker claim failed", error=str(e))
+            return 0
+
+        claimed_at = datetime.now(timezone.utc)
+        for due in due_monitors:
+            self._start(due.id, retries=0, due_at=due.next_check_at, enqueued_at=claimed_at)
+        if due_monitors:
+            logger.info("Check worker claimed monitors", claimed=len(due_monitors))
+        return len(due_monitors)
+
+    async def _wait(self, saturated: bool) -> None:
+        """等待停止信号、名额空出（满额时）或轮询间隔."""
+        self._slot_freed.clear()
+        waiters = [asyncio.ensure_future(self._stopping.wait())]
+        if saturated:
+            waiters.append(asyncio.ensure_future(self._slot_freed.wait()))
+        try:
+            await asyncio.wait(
+                waiters, timeout=self.poll_interval, return_when=asyncio.FIRST_COMPLETED
+            )
+        finally:
+            for waiter in waiters:
+                waiter.cancel()
+
+    def _start(
+        self,
+        monitor_id: str,
+        retries: int,
+        due_at: datetime,
+        enqueued_at: datetime,
+        delay: float = 0,
+    ) -> None:
+        task = asyncio.create_task(
+            self._run_check(monitor_id, retries, due_at, enqueued_at, delay)
+        )
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run_check(
+        self,
+        monitor_id: str,
+        retries: int,
+        due_at: datetime,
+        enqueued_at: datetime,
+        delay: float,
+    ) -> None:
+        if delay > 0:
+            # 等待重试期间不占用名额；worker 停止时放弃重试，
+            # 检查租约过期后会被重新领取
+            try:
+                await asyncio.wait_for(self._stopping.wait(), timeout=delay)
+                return
+            except asyncio.TimeoutError:
+                pass
+
+        self._active += 1
+        try:
+            async with self._semaphore:
+                run = CheckRunContext(
+                    queue="asyncio",
+                    worker=self.name,
+                    due_at=due_at,
+                    enqueued_at=enqueued_at,
+                )
+                result = await asyncio.wait_for(
+                    run_sitemap_check(monitor_id, retries=retries, run=run),
+                    timeout=self.time_limit,
+                )
+        except asyncio.TimeoutError:
+            # 检查已取消（未提交的写入已回滚），检查租约过期后会被重新领取
+            logger.error(
+                "Check worker check timed out", monitor_id=monitor_id, time_limit=self.time_limit
+            )
+            return
+        except Exception as e:
+            # 检查租约过期后会被重新领取
+            logger.error("Check worker check failed", monitor_id=monitor_id, error=str(e))
+            return
+        finally:
+            self._active -= 1
+            self._slot_freed.set()
+
+        if result.get("retry") and not self._stopping.is_set():
+            logger.info(
+                "Sitemap check retry scheduled",
+                monitor_id=monitor_id,
+                retries=retries + 1,
+                countdown=round(result["countdown"], 1),
+            )
+            now = datetime.now(timezone.utc)
+            self._start(
+                monitor_id,
+                retries + 1,
+                due_at=now + timedelta(seconds=result["countdown"]),
+                enqueued_at=now,
+                delay=result["countdown"],
+            )
+
+
+async def run_worker(
+    concurrency: int | None = None,
+    poll_interval: float | None = None,
+) -> None:
+    """
+    运行 asyncio 检查 worker.
+
+    每个检查同一时间最多占用一个数据库连接，连接数上限设为并发数 + 1（领取任务）；
+    检查的时间限制与 Celery 任务相同（task_time_limit），必须小于检查租约时长。
+
+    Args:
+        concurrency: 全局并发检查数，默认使用 worker_concurrency 配置
+        poll_interval: 轮询间隔（秒），默认使用 worker_poll_interval 配置
+    """
+    settings = get_settings()
+    concurrency = concurrency or settings.worker_concurrency
+    time_limit = celery_app.conf.task_time_limit
+    if time_limit >= settings.check_lease_seconds:
+        raise ValueError(
+            f"检查时间限制（{time_limit} 秒）必须小于检查租约时长"
+            f"（check_lease_seconds={settings.check_lease_seconds}）"
+        )
+    configure_engine(max_connections=concurrency + 1)
+    worker = CheckWorker(
+        concurrency=concurrency,
+        poll_interval=poll_interval or settings.worker_poll_interval,
+        time_limit=time_limit,
+    )
+    await worker.run()
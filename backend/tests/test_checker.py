@@ -0,0 +1,155 @@
+"""Sitemap 检查器测试：子 Sitemap 失败时的处理."""
+
+import gzip
+from datetime import datetime, timedelta, timezone
+
+import httpx
+import pytest
+
+from sitemap_monitor.config import get_settings
+from sitemap_monitor.core import checker
+from sitemap_monitor.core.checker import DocumentResult, DocumentState, check_sitemap
+from sitemap_monitor.core.url_hash import hash_url_items
+
+INDEX = "https://example.com/sitemap.xml"
+CHILD = "https://example.com/sitemap-1.xml"
+OLD_URLS = [{"url": "https://example.com/a", "lastmod": None, "changefreq": None, "priority": None}]
+
+
+@pytest.fixture
+def fetch(monkeypatch):
+    """按 URL 返回预设的获取结果."""
+    responses: dict[str, DocumentResult] = {}
+
+    async def fake_fetch(url, validators=None, content_hash=None):
+        return responses[url]
+
+    monkeypatch.setattr(checker, "_fetch_document_shared", fake_fetch)
+    return responses
+
+
+def _previous(failed_since: datetime | None = None) -> dict[str, DocumentState]:
+    return {
+        INDEX: DocumentState(etag="index", children=[{"loc": CHILD, "lastmod": None}]),
+        CHILD: DocumentState(
+            etag="child", urls=list(OLD_URLS), content_hash="c", failed_since=failed_since
+        ),
+    }
+
+
+def _index() -> DocumentResult:
+    return DocumentResult(success=True, not_modified=True, etag="index")
+
+
+async def test_retryable_child_failure_reuses_previous_urls(fetch):
+    fetch[INDEX] = _index()
+    fetch[CHILD] = DocumentResult(success=False, error="HTTP 错误: 503", retryable=True)
+
+    result = await check_sitemap(INDEX, _previous())
+
+    assert result.success and not result.not_modified
+    assert result.urls == OLD_URLS
+    assert result.documents[CHILD].failed_since is not None
+
+
+async def test_permanent_child_failure_drops_previous_urls(fetch):
+    fetch[INDEX] = _index()
+    fetch[CHILD] = DocumentResult(success=False, error="HTTP 错误: 404")
+
+    result = await check_sitemap(INDEX, _previous())
+
+    assert result.success
+    assert result.urls == []
+    assert CHILD not in result.documents
+
+
+async def test_stale_urls_expire(fetch, monkeypatch):
+    monkeypatch.setattr(get_settings(), "sitemap_child_stale_max_seconds", 3600)
+    fetch[INDEX] = _index()
+    fetch[CHILD] = DocumentResult(success=False, error="请求超时", retryable=True)
+    failed_since = datetime.now(timezone.utc) - timedelta(hours=2)
+
+    result = await check_sitemap(INDEX, _previous(failed_since))
+
+    assert result.urls == []
+    assert CHILD not in result.documents
+
+
+async def test_failing_child_is_not_skipped_by_index_lastmod(fetch):
+    previous = _previous(datetime.now(timezone.utc))
+    previous[INDEX].children = [{"loc": CHILD, "lastmod": "2026-01-01"}]
+    previous[CHILD].index_lastmod = "2026-01-01"
+    fetch[INDEX] = _index()
+    fetch[CHILD] = DocumentResult(success=True, not_modified=True, etag="child", content_hash="c")
+
+    result = await check_sitemap(INDEX, previous)
+
+    # 重新请求成功后清除失败时间
+    assert result.urls == OLD_URLS
+    assert result.documents[CHILD].failed_since is None
+
+
+async def test_index_hash_matches_merged_urls(fetch):
+    other = "https://example.com/sitemap-2.xml"
+    new_urls = [
+        {"url": f"https://example.com/new/{i}", "lastmod": "2026-02-01", "changefreq": None,
+         "priority": None}
+        for i in range(3)
+    ]
+    previous = _previous()
+    previous[INDEX].children.append({"loc": other, "lastmod": None})
+    fetch[INDEX] = _index()
+    # 一个子 Sitemap 未变化（复用上次的 URL），另一个重新解析
+    fetch[CHILD] = DocumentResult(success=True, not_modified=True, etag="child", content_hash="c")
+    fetch[other] = DocumentResult(
+        success=True, urls=new_urls, url_hash=hash_url_items(new_urls), content_hash="o"
+    )
+
+    result = await check_sitemap(INDEX, previous)
+
+    assert result.urls == OLD_URLS + new_urls
+    assert result.url_hash == hash_url_items(result.urls)
+
+
+SITEMAP_XML = (
+    b'<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">'
+    b"<url><loc>https://example.com/a</loc></url></urlset>"
+)
+
+
+@pytest.mark.parametrize(
+    ("body", "headers"),
+    [
+        # gzip 文件，没有 Content-Encoding，Content-Type 写成 XML
+        (gzip.compress(SITEMAP_XML), {"content-type": "text/xml"}),
+        # 普通 XML，Content-Type 却声称是 gzip
+        (SITEMAP_XML, {"content-type": "application/x-gzip"}),
+        # .xml.gz 文件又按 Content-Encoding: gzip 传输（httpx 解开一层）
+        (
+            gzip.compress(gzip.compress(SITEMAP_XML)),
+            {"content-type": "application/octet-stream", "content-encoding": "gzip"},
+        ),
+    ],
+    ids=["gzip-without-header", "plain-with-gzip-type", "double-gzip"],
+)
+async def test_fetch_detects_gzip_by_content(monkeypatch, body, headers):
+    transport = httpx.MockTransport(
+        lambda request: httpx.Response(200, content=body, headers=headers)
+    )
+    async with httpx.AsyncClient(transport=transport) as client:
+        monkeypatch.setattr(checker, "get_http_client", lambda: client)
+        document = await checker.fetch_document("https://example.com/sitemap.xml.gz")
+
+    assert document.success, document.error
+    assert [item["url"] for item in document.urls] == ["https://example.com/a"]
+
+
+async def test_fetch_reports_truncated_gzip(monkeypatch):
+    body = gzip.compress(SITEMAP_XML * 50)[:-10]
+    transport = httpx.MockTransport(lambda request: httpx.Response(200, content=body))
+    async with httpx.AsyncClient(transport=transport) as client:
+        monkeypatch.setattr(checker, "get_http_client", lambda: client)
+        document = await checker.fetch_document("https://example.com/sitemap.xml.gz")
+
+    assert not document.success
+    assert not document.retryable
@@ -0,0 +1,84 @@
+"""检查派发测试：按队列分别背压."""
+
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import update
+
+from sitemap_monitor.config import get_settings
+from sitemap_monitor.models import MonitorTask
+from sitemap_monitor.tasks import CHECK_QUEUE, HEAVY_CHECK_QUEUE, PRIORITY_CHECK_QUEUE, scheduler
+from sitemap_monitor.tasks.scheduler import QueueStats
+
+
+@pytest.fixture
+async def due_monitors(db, monitor_id) -> tuple[str, str]:
+    """一个普通任务和一个 heavy 任务，均已到期."""
+    monitor = await db.get(MonitorTask, monitor_id)
+    heavy = MonitorTask(
+        user_id=monitor.user_id,
+        name="heavy",
+        sitemap_url="https://example.com/big.xml",
+        last_url_count=get_settings().heavy_check_url_threshold,
+    )
+    db.add(heavy)
+    await db.flush()
+    await db.execute(
+        update(MonitorTask)
+        .where(MonitorTask.id.in_([monitor_id, heavy.id]))
+        .values(next_check_at=datetime.now(timezone.utc) - timedelta(minutes=1))
+    )
+    await db.commit()
+    return monitor_id, heavy.id
+
+
+@pytest.fixture
+def dispatch(monkeypatch, session_factory, due_monitors):
+    """替换队列统计和实际派发，返回派发到各队列的任务 ID（只记录本测试的任务）."""
+    enqueued: dict[str, list[str]] = {}
+
+    def fake_enqueue(claimed):
+        for due in claimed:
+            if due.id in due_monitors:
+                enqueued.setdefault(scheduler.check_queue_for(due), []).append(due.id)
+        return [len(claimed)]
+
+    monkeypatch.setattr(scheduler, "get_session_factory", lambda: session_factory)
+    monkeypatch.setattr(scheduler, "_enqueue_checks", fake_enqueue)
+
+    async def run(stats: QueueStats):
+        monkeypatch.setattr(scheduler, "measure_check_queues", lambda: stats)
+        return await scheduler._dispatch_pending_checks_async(), enqueued
+
+    return run
+
+
+def _stats(depths: dict[str, int], lags: dict[str, float] | None = None) -> QueueStats:
+    queues = (PRIORITY_CHECK_QUEUE, CHECK_QUEUE, HEAVY_CHECK_QUEUE)
+    return QueueStats(
+        depths={queue: depths.get(queue, 0) for queue in queues},
+        lags={queue: (lags or {}).get(queue, 0.0) for queue in queues},
+    )
+
+
+async def test_heavy_backlog_only_holds_heavy_monitors(due_monitors, dispatch):
+    normal_id, heavy_id = due_monitors
+    max_depth = get_settings().dispatch_max_heavy_queue_depth
+
+    result, enqueued = await dispatch(_stats({HEAVY_CHECK_QUEUE: max_depth}))
+
+    assert result["throttled"]
+    assert enqueued == {CHECK_QUEUE: [normal_id]}
+
+    # heavy 任务未被领取，积压消化后派发
+    _, enqueued = await dispatch(_stats({}))
+    assert enqueued == {CHECK_QUEUE: [normal_id], HEAVY_CHECK_QUEUE: [heavy_id]}
+
+
+async def test_lagging_check_queue_only_holds_normal_monitors(due_monitors, dispatch):
+    _, heavy_id = due_monitors
+    lag = get_settings().dispatch_max_queue_lag_seconds + 1
+
+    _, enqueued = await dispatch(_stats({PRIORITY_CHECK_QUEUE: 1}, {PRIORITY_CHECK_QUEUE: lag}))
+
+    assert enqueued == {HEAVY_CHECK_QUEUE: [heavy_id]}
@@ -0,0 +1,166 @@
+"""Sitemap 文档共享缓存测试：URL 条目数上限、过期和并发请求合并."""
+
+import asyncio
+
+import pytest
+
+from sitemap_monitor.config import get_settings
+from sitemap_monitor.core import document_cache
+from sitemap_monitor.core.document_cache import (
+    clear_document_cache,
+    coalesce,
+    get_cached,
+    normalize_url,
+    put_cached,
+)
+
+
+@pytest.fixture(autouse=True)
+def _cache_settings(monkeypatch):
+    settings = get_settings()
+    monkeypatch.setattr(settings, "sitemap_shared_cache_ttl", 30)
+    monkeypatch.setattr(settings, "sitemap_shared_cache_max_urls", 10)
+    monkeypatch.setattr(settings, "sitemap_shared_cache_max_document_urls", 6)
+    clear_document_cache()
+    yield
+    clear_document_cache()
+
+
+@pytest.mark.parametrize(
+    ("url", "expected"),
+    [
+        ("HTTPS://Example.COM/sitemap.xml", "https://example.com/sitemap.xml"),
+        ("https://example.com:443/sitemap.xml#top", "https://example.com/sitemap.xml"),
+        ("http://example.com:8080?page=2", "http://example.com:8080/?page=2"),
+        (" https://example.com ", "https://example.com/"),
+    ],
+)
+def test_normalize_url(url, expected):
+    assert normalize_url(url) == expected
+
+
+def test_evicts_least_recently_used_at_url_count_bound():
+    put_cached("a", "A", size=4)
+    put_cached("b", "B", size=4)
+    assert get_cached("a") == "A"
+
+    # 总数 12 超过上限 10，淘汰最久未使用的 b
+    put_cached("c", "C", size=4)
+
+    assert get_cached("b") is None
+    assert get_cached("a") == "A"
+    assert get_cached("c") == "C"
+    assert document_cache._cache_size == 8
+
+
+def test_replacing_entry_updates_size():
+    put_cached("a", "A", size=4)
+    put_cached("a", "A2", size=2)
+
+    assert get_cached("a") == "A2"
+    assert document_cache._cache_size == 2
+
+
+def test_oversized_document_is_not_cached():
+    put_cached("a", "A", size=4)
+    put_cached("big", "BIG", size=7)
+
+    assert get_cached("big") is None
+    assert get_cached("a") == "A"
+    assert document_cache._cache_size == 4
+
+
+def test_expired_entries_are_dropped(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(document_cache.time, "monotonic", lambda: now[0])
+    put_cached("a", "A", size=4)
+    put_cached("b", "B", size=4)
+
+    now[0] += 20
+    assert get_cached("a") == "A"
+    now[0] += 20
+    assert get_cached("a") is None
+    # 写入时清除其余过期结果
+    put_cached("c", "C", size=1)
+    assert list(document_cache._cache) == ["c"]
+    assert document_cache._cache_size == 1
+
+
+def test_zero_ttl_disables_cache(monkeypatch):
+    monkeypatch.setattr(get_settings(), "sitemap_shared_cache_ttl", 0)
+    put_cached("a", "A", size=1)
+
+    assert get_cached("a") is None
+
+
+async def test_concurrent_callers_share_one_fetch():
+    calls = 0
+    release = asyncio.Event()
+
+    async def fetch():
+        nonlocal calls
+        calls += 1
+        await release.wait()
+        return "document"
+
+    tasks = [asyncio.create_task(coalesce("key", fetch)) for _ in range(5)]
+    await asyncio.sleep(0)
+    release.set()
+    results = await asyncio.gather(*tasks)
+
+    assert calls == 1
+    assert sorted(results, key=lambda result: result[1]) == [("document", False)] + [
+        ("document", True)
+    ] * 4
+    assert not document_cache._inflight[asyncio.get_running_loop()]
+
+
+async def test_fetch_exception_reaches_every_waiter():
+    calls = 0
+    release = asyncio.Event()
+
+    async def fetch():
+        nonlocal calls
+        calls += 1
+        await release.wait()
+        raise RuntimeError("boom")
+
+    tasks = [asyncio.create_task(coalesce("key", fetch)) for _ in range(5)]
+    await asyncio.sleep(0)
+    release.set()
+    results = await asyncio.gather(*tasks, return_exceptions=True)
+
+    assert calls == 1
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert not document_cache._inflight[asyncio.get_running_loop()]
+
+
+async def test_failed_fetch_is_retried_by_next_caller():
+    async def failing():
+        raise RuntimeError("boom")
+
+    async def succeeding():
+        return "document"
+
+    with pytest.raises(RuntimeError):
+        await coalesce("key", failing)
+
+    assert await coalesce("key", succeeding) == ("document", False)
+
+
+async def test_cancelled_fetch_gives_waiters_none():
+    started = asyncio.Event()
+
+    async def fetch():
+        started.set()
+        await asyncio.sleep(60)
+
+    owner = asyncio.create_task(coalesce("key", fetch))
+    await started.wait()
+    waiter = asyncio.create_task(coalesce("key", fetch))
+    await asyncio.sleep(0)
+    owner.cancel()
+
+    assert await waiter == (None, True)
+    with pytest.raises(asyncio.CancelledError):
+        await owner
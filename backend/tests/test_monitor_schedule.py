@@ -0,0 +1,129 @@
+"""检查时间调度测试：时间槽对齐、固定相位、手动检查后的最早时间和间隔变化."""
+
+from datetime import datetime, timedelta, timezone
+from itertools import pairwise
+
+import pytest
+
+from sitemap_monitor.core.monitor_service import check_phase_seconds, schedule_next_check
+from sitemap_monitor.models import MonitorTask
+
+HOUR = 3600
+
+
+def _monitor(
+    monitor_id: str | None = "monitor-1",
+    interval_minutes: int = 60,
+    last_check_at: datetime | None = None,
+) -> MonitorTask:
+    return MonitorTask(
+        id=monitor_id,
+        check_interval_minutes=interval_minutes,
+        adaptive_interval=False,
+        last_check_at=last_check_at,
+    )
+
+
+def _slot_offset(moment: datetime, interval: int) -> int:
+    """时间点相对周期起点的偏移（秒）."""
+    return int(moment.timestamp()) % interval
+
+
+def test_phase_is_stable_and_within_interval():
+    phase = check_phase_seconds("monitor-1", HOUR)
+
+    assert 0 <= phase < HOUR
+    assert check_phase_seconds("monitor-1", HOUR) == phase
+
+
+def test_phases_spread_across_interval():
+    phases = {check_phase_seconds(f"monitor-{i}", HOUR) for i in range(200)}
+
+    # 200 个任务几乎不会落在同一秒，且覆盖周期的前后两半
+    assert len(phases) > 190
+    assert min(phases) < HOUR / 2 < max(phases)
+
+
+def test_next_check_is_aligned_to_monitor_slot():
+    last = datetime(2026, 10, 17, 8, 0, 0, tzinfo=timezone.utc)
+    monitor = _monitor(last_check_at=last)
+
+    schedule_next_check(monitor)
+
+    assert _slot_offset(monitor.next_check_at, HOUR) == check_phase_seconds("monitor-1", HOUR)
+    assert last + timedelta(seconds=HOUR / 2) <= monitor.next_check_at
+    assert monitor.next_check_at <= last + timedelta(seconds=HOUR * 1.5)
+
+
+def test_slot_checks_keep_exact_interval():
+    monitor = _monitor(last_check_at=datetime(2026, 10, 17, 8, 0, 0, tzinfo=timezone.utc))
+    schedule_next_check(monitor)
+    slots = [monitor.next_check_at]
+
+    # 按时间槽执行：每次检查都在上一次算出的时间槽发生
+    for _ in range(3):
+        monitor.last_check_at = monitor.next_check_at
+        schedule_next_check(monitor)
+        slots.append(monitor.next_check_at)
+
+    assert {b - a for a, b in pairwise(slots)} == {timedelta(hours=1)}
+
+
+@pytest.mark.parametrize("offset", [1, 600, 1799, 1800, 1801, 3000])
+def test_manual_check_waits_at_least_half_interval(offset):
+    phase = check_phase_seconds("monitor-1", HOUR)
+    slot = datetime(2026, 10, 17, 8, 0, 0, tzinfo=timezone.utc) + timedelta(seconds=phase)
+    # 在时间槽之后 offset 秒手动检查
+    last = slot + timedelta(seconds=offset)
+    monitor = _monitor(last_check_at=last)
+
+    schedule_next_check(monitor)
+
+    earliest = last + timedelta(seconds=HOUR / 2)
+    assert monitor.next_check_at >= earliest
+    assert monitor.next_check_at - earliest < timedelta(hours=1)
+    assert _slot_offset(monitor.next_check_at, HOUR) == phase
+
+
+def test_interval_change_realigns_to_new_slots():
+    last = datetime(2026, 10, 17, 8, 0, 0, tzinfo=timezone.utc)
+    monitor = _monitor(interval_minutes=60, last_check_at=last)
+    schedule_next_check(monitor)
+
+    monitor.check_interval_minutes = 15
+    schedule_next_check(monitor)
+
+    interval = 15 * 60
+    assert _slot_offset(monitor.next_check_at, interval) == check_phase_seconds(
+        "monitor-1", interval
+    )
+    assert last + timedelta(seconds=interval / 2) <= monitor.next_check_at
+    assert monitor.next_check_at <= last + timedelta(seconds=interval * 1.5)
+
+
+def test_adaptive_interval_is_used_when_enabled():
+    last = datetime(2026, 10, 17, 8, 0, 0, tzinfo=timezone.utc)
+    monitor = _monitor(interval_minutes=60, last_check_at=last)
+    monitor.adaptive_interval = True
+    monitor.effective_interval_minutes = 240
+
+    schedule_next_check(monitor)
+
+    interval = 240 * 60
+    assert _slot_offset(monitor.next_check_at, interval) == check_phase_seconds(
+        "monitor-1", interval
+    )
+    assert monitor.next_check_at >= last + timedelta(seconds=interval / 2)
+
+
+@pytest.mark.parametrize(
+    ("monitor_id", "last_check_at"),
+    [("monitor-1", None), (None, datetime(2026, 10, 17, tzinfo=timezone.utc))],
+)
+def test_unscheduled_monitor_is_due_now(monitor_id, last_check_at):
+    monitor = _monitor(monitor_id=monitor_id, last_check_at=last_check_at)
+    before = datetime.now(timezone.utc)
+
+    schedule_next_check(monitor)
+
+    assert before <= monitor.next_check_at <= datetime.now(timezone.utc)
@@ -0,0 +1,169 @@
+"""按主机限流测试：Retry-After 解析、令牌补充、暂停期和限流器淘汰."""
+
+import asyncio
+import time
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+
+import pytest
+
+from sitemap_monitor.config import get_settings
+from sitemap_monitor.core import http_client, rate_limiter
+from sitemap_monitor.core.rate_limiter import (
+    HostBlockedError,
+    HostRateLimiter,
+    defer_host,
+    get_host_limiter,
+    parse_retry_after,
+    reset_host_limiters,
+)
+
+
+@pytest.fixture(autouse=True)
+def _reset_limiters():
+    yield
+    rate_limiter._limiters.clear()
+
+
+def _limiter(rate=10.0, burst=2, max_concurrency=4, max_wait=1.0) -> HostRateLimiter:
+    return HostRateLimiter(
+        "example.com", rate=rate, burst=burst, max_concurrency=max_concurrency, max_wait=max_wait
+    )
+
+
+@pytest.mark.parametrize(
+    ("value", "expected"),
+    [("120", 120.0), (" 5 ", 5.0), ("0", 0.0), (None, None), ("", None), ("soon", None)],
+)
+def test_parse_retry_after_seconds(value, expected):
+    assert parse_retry_after(value) == expected
+
+
+def test_parse_retry_after_http_date():
+    retry_at = datetime.now(timezone.utc) + timedelta(seconds=90)
+    seconds = parse_retry_after(format_datetime(retry_at, usegmt=True))
+
+    assert seconds is not None
+    assert 85 <= seconds <= 90
+
+
+def test_parse_retry_after_past_date_is_zero():
+    retry_at = datetime.now(timezone.utc) - timedelta(hours=1)
+
+    assert parse_retry_after(format_datetime(retry_at, usegmt=True)) == 0.0
+
+
+def test_tokens_refill_at_rate_up_to_burst():
+    limiter = _limiter(rate=10.0, burst=2)
+    start = limiter._updated
+    limiter._tokens = 0.0
+
+    limiter._refill(start + 0.1)
+    assert limiter._tokens == pytest.approx(1.0)
+
+    limiter._refill(start + 10)
+    assert limiter._tokens == 2
+
+
+async def test_slot_waits_for_token_after_burst():
+    limiter = _limiter(rate=20.0, burst=2)
+    started = time.monotonic()
+    for _ in range(3):
+        async with limiter.slot():
+            pass
+
+    # 前两个请求消耗突发令牌，第三个需要等待约 1/20 秒
+    assert time.monotonic() - started >= 0.04
+
+
+async def test_blocked_host_raises_when_wait_exceeds_limit():
+    limiter = _limiter(max_wait=1.0)
+    limiter.defer(60)
+
+    with pytest.raises(HostBlockedError) as exc_info:
+        async with limiter.slot():
+            pass
+
+    assert exc_info.value.host == "example.com"
+    assert 59 <= exc_info.value.retry_after <= 60
+    assert limiter._active == 0
+
+
+async def test_short_block_is_waited_out():
+    limiter = _limiter(max_wait=1.0)
+    limiter.defer(0.05)
+    started = time.monotonic()
+
+    async with limiter.slot():
+        pass
+
+    assert time.monotonic() - started >= 0.04
+
+
+async def test_defer_host_is_capped(monkeypatch):
+    settings = get_settings()
+    monkeypatch.setattr(settings, "http_retry_after_max", 30)
+    monkeypatch.setattr(settings, "http_host_max_wait", 1.0)
+
+    assert defer_host("https://example.com/sitemap.xml", 3600) == 30
+    with pytest.raises(HostBlockedError) as exc_info:
+        async with get_host_limiter("https://EXAMPLE.com/other.xml").slot():
+            pass
+    assert exc_info.value.retry_after <= 30
+
+
+async def test_idle_limiters_are_evicted_least_recently_used_first(monkeypatch):
+    monkeypatch.setattr(get_settings(), "http_host_limiter_max_hosts", 3)
+    for host in ("a", "b", "c"):
+        get_host_limiter(f"https://{host}.example/")
+    # c 处于暂停期不可淘汰，其余按最近使用顺序淘汰：a 先于刚用过的 b
+    get_host_limiter("https://b.example/")
+    defer_host("https://c.example/", 60)
+
+    get_host_limiter("https://d.example/")
+    get_host_limiter("https://e.example/")
+
+    hosts = list(rate_limiter._limiters[asyncio.get_running_loop()])
+    assert hosts == ["c.example", "d.example", "e.example"]
+
+
+async def test_busy_limiters_are_not_evicted(monkeypatch):
+    monkeypatch.setattr(get_settings(), "http_host_limiter_max_hosts", 1)
+    busy = get_host_limiter("https://busy.example/")
+
+    async with busy.slot():
+        get_host_limiter("https://other.example/")
+        assert get_host_limiter("https://busy.example/") is busy
+
+    # 请求结束且令牌补满后才可淘汰
+    busy._tokens = busy.burst
+    get_host_limiter("https://third.example/")
+    assert "busy.example" not in rate_limiter._limiters[asyncio.get_running_loop()]
+
+
+def test_closed_loops_are_dropped():
+    async def touch():
+        get_host_limiter("https://example.com/")
+        http_client.get_http_client()
+
+    first = asyncio.new_event_loop()
+    first.run_until_complete(touch())
+    first.close()
+    assert first in rate_limiter._limiters
+    assert first in http_client._clients
+
+    second = asyncio.new_event_loop()
+    try:
+        second.run_until_complete(touch())
+        assert first not in rate_limiter._limiters
+        assert first not in http_client._clients
+        second.run_until_complete(http_client.close_http_client())
+    finally:
+        second.close()
+
+
+async def test_reset_host_limiters_clears_current_loop():
+    limiter = get_host_limiter("https://example.com/")
+    reset_host_limiters()
+
+    assert get_host_limiter("https://example.com/") is not limiter
@@ -0,0 +1,182 @@
+"""Sitemap 增量解析器测试."""
+
+import gzip
+import zlib
+
+import pytest
+from lxml import etree
+
+from sitemap_monitor.parsers.sitemap import (
+    SitemapIndexEntry,
+    SitemapStreamParser,
+    SitemapUrl,
+    is_gzip_content,
+)
+
+URLSET = """<?xml version="1.0" encoding="UTF-8"?>
+<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">
+  <url><loc> https://example.com/ </loc><lastmod>2026-01-01</lastmod></url>
+  <url>
+    <loc>https://example.com/日本語/ページ</loc>
+    <changefreq>daily</changefreq>
+    <priority>0.8</priority>
+  </url>
+  <url><loc>https://example.com/ümlaut?q=é&amp;x=1</loc></url>
+  <url><lastmod>2026-01-02</lastmod></url>
+</urlset>
+""".encode()
+
+INDEX = b"""<?xml version="1.0" encoding="UTF-8"?>
+<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">
+  <sitemap><loc>https://example.com/sitemap-1.xml</loc><lastmod>2026-01-01</lastmod></sitemap>
+  <sitemap><loc>https://example.com/sitemap-2.xml</loc></sitemap>
+</sitemapindex>
+"""
+
+EXPECTED_URLS = [
+    SitemapUrl(url="https://example.com/", lastmod="2026-01-01"),
+    SitemapUrl(url="https://example.com/日本語/ページ", changefreq="daily", priority="0.8"),
+    SitemapUrl(url="https://example.com/ümlaut?q=é&x=1"),
+]
+
+EXPECTED_CHILDREN = [
+    SitemapIndexEntry(loc="https://example.com/sitemap-1.xml", lastmod="2026-01-01"),
+    SitemapIndexEntry(loc="https://example.com/sitemap-2.xml"),
+]
+
+
+def parse_chunks(chunks) -> tuple[list, SitemapStreamParser]:
+    parser = SitemapStreamParser()
+    entries = []
+    for chunk in chunks:
+        entries.extend(parser.feed(chunk))
+    entries.extend(parser.close())
+    return entries, parser
+
+
+def split(data: bytes, size: int) -> list[bytes]:
+    return [data[i : i + size] for i in range(0, len(data), size)]
+
+
+def test_whole_document():
+    entries, parser = parse_chunks([URLSET])
+    assert entries == EXPECTED_URLS
+    assert parser.is_index is False
+
+
+@pytest.mark.parametrize("size", [1, 2, 3, 7, 64])
+def test_any_chunk_size(size):
+    entries, _ = parse_chunks(split(URLSET, size))
+    assert entries == EXPECTED_URLS
+
+
+def test_every_split_point():
+    # 包括标签中间、实体中间和多字节 UTF-8 字符中间
+    for position in range(1, len(URLSET)):
+        entries, _ = parse_chunks([URLSET[:position], URLSET[position:]])
+        assert entries == EXPECTED_URLS, position
+
+
+def test_split_inside_multibyte_character():
+    position = URLSET.index("語".encode()) + 1
+    entries, _ = parse_chunks([URLSET[:position], URLSET[position:]])
+    assert entries[1].url == "https://example.com/日本語/ページ"
+
+
+def test_entries_are_returned_as_soon_as_complete():
+    parser = SitemapStreamParser()
+    end_of_first = URLSET.index(b"</url>") + len(b"</url>")
+    assert parser.feed(URLSET[: end_of_first - 1]) == []
+    assert parser.feed(URLSET[end_of_first - 1 : end_of_first]) == EXPECTED_URLS[:1]
+
+
+def test_sitemap_index():
+    entries, parser = parse_chunks(split(INDEX, 5))
+    assert entries == EXPECTED_CHILDREN
+    assert parser.is_index is True
+
+
+@pytest.mark.parametrize(
+    ("document", "is_index"),
+    [
+        (b'<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9"/>', False),
+        (
+            b'<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">'
+            b"</sitemapindex>",
+            True,
+        ),
+    ],
+)
+def test_empty_document_type(document, is_index):
+    entries, parser = parse_chunks([document])
+    assert entries == []
+    assert parser.is_index is is_index
+
+
+def test_malformed_xml_raises():
+    with pytest.raises(etree.XMLSyntaxError):
+        parse_chunks([URLSET[: len(URLSET) // 2]])
+
+
+def gzip_members(*parts: bytes) -> bytes:
+    return b"".join(gzip.compress(part) for part in parts)
+
+
+def test_gzip_detected_by_magic_bytes():
+    # 不依赖 Content-Type / Content-Encoding 响应头，只按内容的文件头识别
+    entries, parser = parse_chunks([gzip.compress(URLSET)])
+    assert entries == EXPECTED_URLS
+    assert parser.is_gzip is True
+
+
+def test_plain_xml_is_not_gzip():
+    _, parser = parse_chunks([URLSET])
+    assert parser.is_gzip is False
+
+
+@pytest.mark.parametrize("size", [1, 2, 5, 100])
+def test_gzip_any_chunk_size(size):
+    entries, _ = parse_chunks(split(gzip.compress(URLSET), size))
+    assert entries == EXPECTED_URLS
+
+
+def test_gzip_index():
+    entries, parser = parse_chunks(split(gzip.compress(INDEX), 3))
+    assert entries == EXPECTED_CHILDREN
+    assert parser.is_index is True
+
+
+def test_multi_member_gzip():
+    middle = URLSET.index(b"<url>", 100)
+    data = gzip_members(URLSET[:middle], URLSET[middle:])
+    for size in (1, 7, len(data)):
+        entries, _ = parse_chunks(split(data, size))
+        assert entries == EXPECTED_URLS, size
+
+
+def test_multi_member_gzip_split_at_member_boundary():
+    first = gzip.compress(URLSET[:100])
+    entries, _ = parse_chunks([first, gzip.compress(URLSET[100:])])
+    assert entries == EXPECTED_URLS
+
+
+def test_truncated_gzip_raises():
+    data = gzip.compress(URLSET)
+    # 截断在压缩数据中间或只缺少尾部校验
+    for size in (len(data) // 2, len(data) - 4):
+        with pytest.raises((EOFError, etree.XMLSyntaxError)):
+            parse_chunks(split(data[:size], 16))
+
+
+def test_corrupt_gzip_raises():
+    data = bytearray(gzip.compress(URLSET))
+    data[len(data) // 2] ^= 0xFF
+    with pytest.raises((zlib.error, EOFError, etree.XMLSyntaxError)):
+        parse_chunks([bytes(data)])
+
+
+def test_is_gzip_content():
+    assert is_gzip_content(gzip.compress(b"<urlset/>"))
+    assert not is_gzip_content(URLSET)
+    assert not is_gzip_content(b"\x1f")
+    assert not is_gzip_content(b"")
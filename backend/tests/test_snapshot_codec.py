@@ -0,0 +1,128 @@
+"""快照编码测试：SMB1 / SMB2 往返编码和损坏数据."""
+
+import struct
+import zlib
+
+import pytest
+
+from sitemap_monitor.core.snapshot_codec import (
+    BLOCK_SIZE,
+    MAGIC,
+    MAGIC_URLS,
+    SnapshotCodecError,
+    decode_snapshot_urls,
+    encode_snapshot_entries,
+    encode_snapshot_urls,
+    is_url_encoded,
+    iter_snapshot_entries,
+)
+
+
+def _item(url: str, lastmod=None, changefreq=None, priority=None) -> dict:
+    return {"url": url, "lastmod": lastmod, "changefreq": changefreq, "priority": priority}
+
+
+def _sorted(items: list[dict]) -> list[dict]:
+    return sorted(items, key=lambda item: (item["url"], str(item)))
+
+
+def test_entries_round_trip():
+    entries = {
+        1: (None, None, None),
+        7: ("", "", ""),
+        8: ("2026-01-01", "daily", "0.5"),
+        2**40: ("2026-01-02", None, "1.0"),
+    }
+    data = encode_snapshot_entries(entries)
+    assert data.startswith(MAGIC)
+    assert not is_url_encoded(data)
+    assert dict(iter_snapshot_entries(data)) == entries
+
+
+def test_entries_empty():
+    assert list(iter_snapshot_entries(encode_snapshot_entries({}))) == []
+
+
+def test_entries_span_blocks():
+    entries = {
+        url_id * 3 + 1: (f"2026-01-{url_id % 28 + 1:02d}", None, None)
+        for url_id in range(BLOCK_SIZE * 2 + 5)
+    }
+    decoded = list(iter_snapshot_entries(encode_snapshot_entries(entries)))
+    # 按 ID 升序产出
+    assert [url_id for url_id, _ in decoded] == sorted(entries)
+    assert dict(decoded) == entries
+
+
+def test_urls_round_trip():
+    urls = [
+        _item("https://example.com/b", "2026-01-01"),
+        _item("https://example.com/a", "", "", ""),
+        _item("https://example.com/a", "2026-01-02", "daily"),
+        _item("https://example.com/ä/日本語?q=é", priority="0.8"),
+        _item("https://example.com/"),
+        _item("https://example.org/", "2026-01-01"),
+    ]
+    data = encode_snapshot_urls(urls)
+    assert data.startswith(MAGIC_URLS)
+    assert is_url_encoded(data)
+    assert _sorted(decode_snapshot_urls(data)) == _sorted(urls)
+
+
+def test_urls_empty():
+    assert decode_snapshot_urls(encode_snapshot_urls([])) == []
+
+
+def test_urls_span_blocks():
+    urls = [_item(f"https://example.com/page/{i}", "2026-01-01") for i in range(BLOCK_SIZE + 1)]
+    urls.append(_item(urls[BLOCK_SIZE - 1]["url"], "2026-01-02"))
+    assert _sorted(decode_snapshot_urls(encode_snapshot_urls(urls))) == _sorted(urls)
+
+
+def _decode_all(data: bytes) -> None:
+    if is_url_encoded(data):
+        decode_snapshot_urls(data)
+    else:
+        list(iter_snapshot_entries(data))
+
+
+def _encoded_samples() -> list[bytes]:
+    entries = {i: (f"2026-01-{i % 9 + 1:02d}", "daily", None) for i in range(50)}
+    urls = [_item(f"https://example.com/{i}", "2026-01-01") for i in range(50)]
+    return [encode_snapshot_entries(entries), encode_snapshot_urls(urls)]
+
+
+@pytest.mark.parametrize("data", _encoded_samples(), ids=["smb2", "smb1"])
+def test_truncated_data_raises(data):
+    for size in range(len(MAGIC), len(data)):
+        with pytest.raises(SnapshotCodecError):
+            _decode_all(data[:size])
+
+
+@pytest.mark.parametrize("data", _encoded_samples(), ids=["smb2", "smb1"])
+def test_corrupt_payload_raises(data):
+    magic = data[:4]
+    payload = bytearray(zlib.decompress(data[4:]))
+    # 改动某个取值的数据仍可能正常解码，但不能抛出 SnapshotCodecError 以外的异常
+    for position in range(len(payload)):
+        corrupt = bytearray(payload)
+        corrupt[position] ^= 0xFF
+        try:
+            _decode_all(magic + zlib.compress(bytes(corrupt)))
+        except SnapshotCodecError:
+            pass
+
+
+@pytest.mark.parametrize(
+    "data",
+    [
+        b"",
+        b"XXXX" + zlib.compress(struct.pack("<I", 0)),
+        MAGIC + b"not zlib data",
+        MAGIC + zlib.compress(struct.pack("<II", 1, 1000)),
+    ],
+    ids=["empty", "unknown-magic", "not-zlib", "short-block"],
+)
+def test_invalid_data_raises(data):
+    with pytest.raises(SnapshotCodecError):
+        list(iter_snapshot_entries(data))
@@ -0,0 +1,328 @@
+"""快照增量链测试：还原、过期清理时的关键帧提升、压缩和链锁."""
+
+import asyncio
+import random
+from datetime import datetime, timedelta, timezone
+from typing import Any
+
+import pytest
+from sqlalchemy import delete, select, update
+
+from sitemap_monitor.config import get_settings
+from sitemap_monitor.core.snapshot_service import (
+    STORAGE_VERSION,
+    SnapshotChainError,
+    apply_snapshot_delta,
+    compact_monitor_snapshots,
+    compute_snapshot_delta,
+    create_snapshot,
+    delete_expired_snapshots,
+    get_latest_snapshot,
+    get_uncompacted_monitor_ids,
+    load_snapshot_entries,
+    lock_snapshot_chain,
+    prune_url_dictionary,
+)
+from sitemap_monitor.core.url_dictionary import UrlDictionary
+from sitemap_monitor.models import MonitorUrl, SitemapSnapshot
+
+
+def _versions(count: int, size: int = 50, seed: int = 0) -> list[list[dict[str, Any]]]:
+    """生成逐次变化的 URL 列表（新增、删除和 lastmod 修改）."""
+    rng = random.Random(seed)
+    versions = []
+    for version in range(count):
+        urls = []
+        for i in range(size + version):
+            if rng.random() < 0.1:
+                continue
+            urls.append(
+                {
+                    "url": f"https://example.com/page/{i}",
+                    "lastmod": f"2026-01-{rng.randint(1, 3):02d}",
+                    "changefreq": rng.choice([None, "daily"]),
+                    "priority": None,
+                }
+            )
+        versions.append(urls)
+    return versions
+
+
+def _canonical(urls: list[dict[str, Any]]) -> list[dict[str, Any]]:
+    return sorted(urls, key=lambda item: item["url"])
+
+
+async def _write_snapshots(
+    db, monitor_id: str, versions: list[list[dict[str, Any]]], chained: bool = True
+) -> list[str]:
+    """按检查流程依次写入快照，chained=False 时每个快照都写成关键帧."""
+    snapshot_ids = []
+    previous = previous_entries = None
+    for i, urls in enumerate(versions):
+        await lock_snapshot_chain(db, monitor_id)
+        dictionary = UrlDictionary(monitor_id)
+        entries = await dictionary.to_entries(db, urls)
+        snapshot = await create_snapshot(
+            db,
+            monitor_task_id=monitor_id,
+            entries=entries,
+            url_count=len(urls),
+            url_hash=str(i),
+            fetch_duration_ms=0,
+            parse_duration_ms=0,
+            previous=previous if chained else None,
+            previous_entries=previous_entries if chained else None,
+        )
+        # 每个快照单独提交，created_at 按事务时间递增
+        await db.commit()
+        previous, previous_entries = snapshot, entries
+        snapshot_ids.append(snapshot.id)
+    return snapshot_ids
+
+
+async def _check(db, monitor_id: str, urls: list[dict[str, Any]]) -> str:
+    """按检查流程写入快照：在链锁内读取最新快照并追加."""
+    await lock_snapshot_chain(db, monitor_id)
+    dictionary = UrlDictionary(monitor_id)
+    entries = await dictionary.to_entries(db, urls)
+    previous = await get_latest_snapshot(db, monitor_id)
+    previous_entries = (
+        await load_snapshot_entries(db, previous, dictionary) if previous else None
+    )
+    snapshot = await create_snapshot(
+        db,
+        monitor_task_id=monitor_id,
+        entries=entries,
+        url_count=len(urls),
+        url_hash="check",
+        fetch_duration_ms=0,
+        parse_duration_ms=0,
+        previous=previous,
+        previous_entries=previous_entries,
+    )
+    await db.commit()
+    return snapshot.id
+
+
+async def _layout(db, snapshot_ids: list[str]) -> list[tuple[str | None, int]]:
+    """各快照的 (关键帧 ID, 链位置)."""
+    result = await db.execute(
+        select(SitemapSnapshot.id, SitemapSnapshot.keyframe_id, SitemapSnapshot.chain_index)
+        .where(SitemapSnapshot.id.in_(snapshot_ids))
+    )
+    rows = {snapshot_id: (keyframe_id, index) for snapshot_id, keyframe_id, index in result}
+    return [rows[snapshot_id] for snapshot_id in snapshot_ids]
+
+
+async def _restore(db, snapshot: SitemapSnapshot) -> list[dict[str, Any]]:
+    """在链锁内还原快照的完整 URL 列表."""
+    await lock_snapshot_chain(db, snapshot.monitor_task_id)
+    dictionary = UrlDictionary(snapshot.monitor_task_id)
+    entries = await load_snapshot_entries(db, snapshot, dictionary)
+    await dictionary.resolve(db, entries)
+    return dictionary.to_urls(entries)
+
+
+async def _assert_restores(db, snapshot_ids: list[str], versions) -> None:
+    db.expunge_all()
+    for snapshot_id, urls in zip(snapshot_ids, versions, strict=True):
+        snapshot = await db.get(SitemapSnapshot, snapshot_id)
+        assert _canonical(await _restore(db, snapshot)) == _canonical(urls)
+    await db.commit()
+
+
+@pytest.fixture
+def keyframe_interval(monkeypatch) -> int:
+    monkeypatch.setattr(get_settings(), "snapshot_keyframe_interval", 4)
+    return 4
+
+
+def test_apply_delta_restores_new_entries():
+    old = {1: ("a", None, None), 2: ("b", "daily", None), 3: ("c", None, "0.5")}
+    new = {1: ("a", None, None), 2: ("b2", "daily", None), 4: ("d", None, None)}
+
+    delta = compute_snapshot_delta(old, new)
+    assert delta["removed"] == [3]
+    restored = dict(old)
+    apply_snapshot_delta(restored, delta)
+    assert restored == new
+
+
+async def test_chain_reconstruction(db, monitor_id, keyframe_interval):
+    versions = _versions(10)
+    snapshot_ids = await _write_snapshots(db, monitor_id, versions)
+
+    layout = await _layout(db, snapshot_ids)
+    assert [index for _, index in layout] == [0, 1, 2, 3, 0, 1, 2, 3, 0, 1]
+    assert layout[5][0] == snapshot_ids[4]
+    await _assert_restores(db, snapshot_ids, versions)
+
+
+async def test_load_rejects_incomplete_chain(db, monitor_id, keyframe_interval):
+    snapshot_ids = await _write_snapshots(db, monitor_id, _versions(4))
+    await db.execute(delete(SitemapSnapshot).where(SitemapSnapshot.id == snapshot_ids[1]))
+    await db.commit()
+
+    snapshot = await db.get(SitemapSnapshot, snapshot_ids[3])
+    with pytest.raises(SnapshotChainError):
+        await _restore(db, snapshot)
+
+
+async def test_expired_keyframe_promotes_first_retained_delta(db, monitor_id, keyframe_interval):
+    versions = _versions(10)
+    snapshot_ids = await _write_snapshots(db, monitor_id, versions)
+    cutoff = datetime.now(timezone.utc) - timedelta(days=1)
+    await db.execute(
+        update(SitemapSnapshot)
+        .where(SitemapSnapshot.id.in_(snapshot_ids[:6]))
+        .values(last_seen_at=cutoff - timedelta(days=1))
+    )
+    await db.commit()
+
+    assert await delete_expired_snapshots(db, monitor_id, cutoff) == 6
+    await db.commit()
+
+    retained = snapshot_ids[6:]
+    # 第 6 个快照的关键帧（第 4 个）已删除，由它自己成为关键帧，第 7 个改挂到它上面
+    assert await _layout(db, retained) == [
+        (None, 0),
+        (snapshot_ids[6], 1),
+        (None, 0),
+        (snapshot_ids[8], 1),
+    ]
+    await _assert_restores(db, retained, versions[6:])
+
+
+async def test_expiry_keeps_latest_snapshot(db, monitor_id, keyframe_interval):
+    versions = _versions(3)
+    snapshot_ids = await _write_snapshots(db, monitor_id, versions)
+    cutoff = datetime.now(timezone.utc) + timedelta(days=1)
+
+    assert await delete_expired_snapshots(db, monitor_id, cutoff) == 2
+    await db.commit()
+
+    assert await _layout(db, snapshot_ids[2:]) == [(None, 0)]
+    await _assert_restores(db, snapshot_ids[2:], versions[2:])
+
+
+async def test_prune_keeps_only_referenced_urls(db, monitor_id, keyframe_interval):
+    # 每个版本整体替换为新的 URL，旧版本的 URL 只被过期快照引用
+    versions = [
+        [
+            {"url": f"https://example.com/{v}/{i}", "lastmod": None, "changefreq": None,
+             "priority": None}
+            for i in range(5)
+        ]
+        for v in range(7)
+    ]
+    snapshot_ids = await _write_snapshots(db, monitor_id, versions)
+    cutoff = datetime.now(timezone.utc) - timedelta(days=1)
+    await db.execute(
+        update(SitemapSnapshot)
+        .where(SitemapSnapshot.id.in_(snapshot_ids[:4]))
+        .values(last_seen_at=cutoff - timedelta(days=1))
+    )
+    await db.commit()
+
+    await delete_expired_snapshots(db, monitor_id, cutoff)
+    # 版本 0-3 的 URL 不再被引用；版本 4 是关键帧，版本 5、6 的增量引用各自的 URL
+    assert await prune_url_dictionary(db, monitor_id) == 20
+    await db.commit()
+
+    result = await db.execute(
+        select(MonitorUrl.url).where(MonitorUrl.monitor_task_id == monitor_id)
+    )
+    remaining = {url.split("/")[3] for url in result.scalars().all()}
+    assert remaining == {"4", "5", "6"}
+    await _assert_restores(db, snapshot_ids[4:], versions[4:])
+    assert await prune_url_dictionary(db, monitor_id) == 0
+
+
+async def test_compaction_rewrites_full_snapshots_as_chains(db, monitor_id, keyframe_interval):
+    versions = _versions(7)
+    snapshot_ids = await _write_snapshots(db, monitor_id, versions, chained=False)
+    assert monitor_id in await get_uncompacted_monitor_ids(db, limit=1000)
+
+    assert await compact_monitor_snapshots(db, monitor_id) == 5
+    await db.commit()
+
+    layout = await _layout(db, snapshot_ids)
+    assert [index for _, index in layout] == [0, 1, 2, 3, 0, 1, 2]
+    assert monitor_id not in await get_uncompacted_monitor_ids(db, limit=1000)
+    await _assert_restores(db, snapshot_ids, versions)
+    # 已经压缩过的链不再改写
+    assert await compact_monitor_snapshots(db, monitor_id) == 0
+
+
+async def test_compaction_converts_legacy_snapshots(db, monitor_id, keyframe_interval):
+    versions = _versions(3)
+    for urls in versions:
+        db.add(
+            SitemapSnapshot(
+                monitor_task_id=monitor_id,
+                urls=urls,
+                url_count=len(urls),
+                url_hash="legacy",
+                fetch_duration_ms=0,
+                parse_duration_ms=0,
+                storage_version=1,
+            )
+        )
+        await db.commit()
+    result = await db.execute(
+        select(SitemapSnapshot.id)
+        .where(SitemapSnapshot.monitor_task_id == monitor_id)
+        .order_by(SitemapSnapshot.created_at)
+    )
+    snapshot_ids = list(result.scalars().all())
+
+    await compact_monitor_snapshots(db, monitor_id)
+    await db.commit()
+
+    result = await db.execute(
+        select(SitemapSnapshot.storage_version, SitemapSnapshot.urls).where(
+            SitemapSnapshot.monitor_task_id == monitor_id
+        )
+    )
+    assert result.tuples().all() == [(STORAGE_VERSION, None)] * 3
+    await _assert_restores(db, snapshot_ids, versions)
+
+
+async def test_chain_lock_excludes_cleanup(session_factory, db, monitor_id, keyframe_interval):
+    snapshot_ids = await _write_snapshots(db, monitor_id, _versions(3))
+    cutoff = datetime.now(timezone.utc) + timedelta(days=1)
+
+    # 模拟正在写入新快照的检查
+    await lock_snapshot_chain(db, monitor_id)
+
+    async def cleanup() -> int:
+        async with session_factory() as other:
+            deleted = await delete_expired_snapshots(other, monitor_id, cutoff)
+            await other.commit()
+            return deleted
+
+    task = asyncio.create_task(cleanup())
+    await asyncio.sleep(0.5)
+    assert not task.done()
+
+    await db.commit()
+    assert await asyncio.wait_for(task, timeout=10) == 2
+    assert await _layout(db, snapshot_ids[2:]) == [(None, 0)]
+
+
+async def test_overlapping_checks_keep_chain_order(
+    session_factory, db, monitor_id, keyframe_interval
+):
+    versions = _versions(4)
+    snapshot_ids = [await _check(db, monitor_id, versions[0])]
+
+    async with session_factory() as early:
+        # 先开始事务的检查（事务时间较早），在另一个检查写入快照之后才拿到链锁
+        await early.execute(select(1))
+        snapshot_ids.append(await _check(db, monitor_id, versions[1]))
+        snapshot_ids.append(await _check(early, monitor_id, versions[2]))
+    snapshot_ids.append(await _check(db, monitor_id, versions[3]))
+
+    assert [index for _, index in await _layout(db, snapshot_ids)] == [0, 1, 2, 3]
+    assert (await get_latest_snapshot(db, monitor_id)).id == snapshot_ids[-1]
+    await _assert_restores(db, snapshot_ids, versions)
@@ -0,0 +1,44 @@
+"""URL 字典测试：按需查询和写入 ID."""
+
+from sitemap_monitor.core.url_dictionary import UrlDictionary
+
+
+def _item(url: str, lastmod: str | None = None) -> dict:
+    return {"url": url, "lastmod": lastmod, "changefreq": None, "priority": None}
+
+
+async def test_ids_are_stable_across_dictionaries(db, monitor_id):
+    first = UrlDictionary(monitor_id)
+    entries = await first.to_entries(
+        db, [_item("https://example.com/a"), _item("https://example.com/b")]
+    )
+    await db.commit()
+
+    second = UrlDictionary(monitor_id)
+    again = await second.to_entries(db, [_item("https://example.com/b", "2026-01-01")])
+    assert again == {first.id_for("https://example.com/b"): ("2026-01-01", None, None)}
+    # 只查询本次用到的 URL
+    assert len(second) == 1
+    assert set(entries) >= set(again)
+
+
+async def test_resolve_loads_urls_by_id(db, monitor_id):
+    writer = UrlDictionary(monitor_id)
+    entries = await writer.to_entries(db, [_item(f"https://example.com/{i}") for i in range(5)])
+    await db.commit()
+
+    reader = UrlDictionary(monitor_id)
+    await reader.resolve(db, entries)
+    assert sorted(item["url"] for item in reader.to_urls(entries)) == sorted(
+        f"https://example.com/{i}" for i in range(5)
+    )
+
+
+async def test_other_monitors_urls_are_separate(db, monitor_id):
+    dictionary = UrlDictionary(monitor_id)
+    await dictionary.add(db, ["https://example.com/a"])
+    await db.commit()
+
+    other = UrlDictionary("00000000-0000-0000-0000-000000000000")
+    await other.resolve(db, [dictionary.id_for("https://example.com/a")])
+    assert len(other) == 0
@@ -0,0 +1,94 @@
+"""URL 列表指纹测试."""
+
+import random
+
+from sitemap_monitor.core.checker import DocumentResult, _collect_entries
+from sitemap_monitor.core.url_hash import (
+    combine_url_hashes,
+    entry_hash,
+    format_url_hash,
+    hash_url_items,
+    item_hash,
+)
+from sitemap_monitor.parsers.sitemap import SitemapIndexEntry, SitemapUrl
+
+
+def _items(count: int) -> list[dict]:
+    return [
+        {
+            "url": f"https://example.com/{i}",
+            "lastmod": f"2026-01-{i % 28 + 1:02d}",
+            "changefreq": "daily" if i % 2 else None,
+            "priority": "0.5" if i % 3 else None,
+        }
+        for i in range(count)
+    ]
+
+
+def test_order_independent():
+    items = _items(100)
+    shuffled = list(items)
+    random.Random(0).shuffle(shuffled)
+    assert hash_url_items(shuffled) == hash_url_items(items)
+
+
+def test_every_field_changes_hash():
+    items = _items(10)
+    original = hash_url_items(items)
+    for name, value in (
+        ("url", "https://example.com/other"),
+        ("lastmod", "2027-01-01"),
+        ("changefreq", "weekly"),
+        ("priority", "0.9"),
+    ):
+        changed = [dict(item) for item in items]
+        changed[3][name] = value
+        assert hash_url_items(changed) != original, name
+
+
+def test_none_differs_from_empty_string():
+    assert entry_hash("https://example.com/", None) != entry_hash("https://example.com/", "")
+
+
+def test_fields_do_not_shift_between_columns():
+    assert entry_hash("u", "a", None) != entry_hash("u", None, "a")
+
+
+def test_duplicates_are_counted():
+    items = _items(5)
+    with_duplicate = [*items, items[2]]
+    # 加法不会让重复条目互相抵消（异或会）
+    assert hash_url_items(with_duplicate) != hash_url_items(items)
+    assert hash_url_items([items[2], items[2]]) != hash_url_items([])
+    assert hash_url_items(with_duplicate) == hash_url_items([items[2], *items])
+
+
+def test_index_hash_combines_children():
+    items = _items(30)
+    children = [items[:10], items[10:25], [], items[25:]]
+    assert combine_url_hashes(hash_url_items(child) for child in children) == hash_url_items(
+        items
+    )
+
+
+def test_combine_wraps_at_128_bits():
+    big = (1 << 128) - 1
+    assert combine_url_hashes([big, 2]) == 1
+    assert format_url_hash(combine_url_hashes([big, 2])) == "0" * 31 + "1"
+    assert len(format_url_hash(hash_url_items(_items(3)))) == 32
+
+
+def test_empty_list():
+    assert hash_url_items([]) == 0
+    assert format_url_hash(0) == "0" * 32
+
+
+def test_parser_accumulation_matches_item_hash():
+    items = _items(20)
+    result = DocumentResult(success=True)
+    # 分多次累加，子 Sitemap 条目不计入指纹
+    _collect_entries([SitemapUrl(**item) for item in items[:7]], result)
+    _collect_entries([SitemapIndexEntry(loc="https://example.com/child.xml")], result)
+    _collect_entries([SitemapUrl(**item) for item in items[7:]], result)
+    assert result.url_hash == hash_url_items(items)
+    assert result.url_hash == combine_url_hashes(item_hash(item) for item in result.urls)
@@ -0,0 +1,56 @@
+"""asyncio 检查 worker 测试：检查时间限制和数据库连接数上限."""
+
+import asyncio
+from datetime import datetime, timezone
+
+import pytest
+
+from sitemap_monitor.config import get_settings
+from sitemap_monitor.models import create_engine
+from sitemap_monitor.tasks import worker
+from sitemap_monitor.tasks.worker import CheckWorker, run_worker
+
+
+async def test_check_is_cancelled_after_time_limit(monkeypatch):
+    cancelled = asyncio.Event()
+
+    async def slow_check(monitor_id, retries=0, run=None):
+        try:
+            await asyncio.sleep(60)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    monkeypatch.setattr(worker, "run_sitemap_check", slow_check)
+    check_worker = CheckWorker(concurrency=1, poll_interval=1, time_limit=0.05)
+    now = datetime.now(timezone.utc)
+
+    await asyncio.wait_for(
+        check_worker._run_check("m", retries=0, due_at=now, enqueued_at=now, delay=0), timeout=5
+    )
+
+    assert cancelled.is_set()
+    # 名额已释放
+    assert check_worker._active == 0
+
+
+async def test_run_worker_rejects_time_limit_beyond_lease(monkeypatch):
+    monkeypatch.setattr(get_settings(), "check_lease_seconds", 60)
+    with pytest.raises(ValueError):
+        await run_worker(concurrency=1)
+
+
+@pytest.mark.parametrize(
+    ("max_connections", "pool_size", "max_overflow"),
+    [(None, 5, 10), (201, 5, 196), (3, 3, 0)],
+)
+async def test_engine_connection_limit(monkeypatch, max_connections, pool_size, max_overflow):
+    settings = get_settings()
+    monkeypatch.setattr(settings, "database_pool_size", 5)
+    monkeypatch.setattr(settings, "database_max_overflow", 10)
+    engine = create_engine(max_connections=max_connections)
+    try:
+        assert engine.pool.size() == pool_size
+        assert engine.pool._max_overflow == max_overflow
+    finally:
+        await engine.dispose()
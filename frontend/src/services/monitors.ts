@@ -5,8 +5,13 @@ export interface Monitor {
   name: string
   sitemap_url: string
   check_interval_minutes: number
+  adaptive_interval: boolean
+  min_interval_minutes: number | null
+  max_interval_minutes: number | null
+  effective_interval_minutes: number | null
   status: 'active' | 'paused' | 'error'
   last_check_at: string | null
+  next_check_at: string | null
   last_error: string | null
   error_count: number
   created_at: string
@@ -22,12 +27,18 @@ export interface CreateMonitorRequest {
   name: string
   sitemap_url: string
   check_interval_minutes?: number
+  adaptive_interval?: boolean
+  min_interval_minutes?: number
+  max_interval_minutes?: number
 }
 
 export interface UpdateMonitorRequest {
   name?: string
   sitemap_url?: string
   check_interval_minutes?: number
+  adaptive_interval?: boolean
+  min_interval_minutes?: number
+  max_interval_minutes?: number
 }
 
 export interface ValidateUrlResponse {